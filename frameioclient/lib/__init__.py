@@ -7,4 +7,14 @@ from .version import ClientVersion
 from .upload import FrameioUploader
 from .transport import APIClient
 from .transfer import AWSClient, FrameioDownloader
+from .destination import Preallocation
+from .iopolicy import IOPolicy
+from .async_transfer import AsyncAWSClient
+from .bandwidth import BandwidthLimiter
+from .remote_file import FrameioRemoteFile
+from .progress import TransferProgress
+from .renditions import RenditionSelector
+from .cache import DownloadCache
+from .probe import HeaderProber
+from .thumbnails import ThumbnailCache, ThumbnailFetcher
 from .utils import Utils, PaginatedResponse, KB, MB, ApiReference
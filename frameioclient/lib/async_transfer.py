@@ -0,0 +1,362 @@
+import asyncio
+import concurrent.futures
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # Optional, install with `pip install frameioclient[async]`
+    aiohttp = None
+
+from .constants import async_writer_threads, download_block_size, max_async_connections
+from .exceptions import DownloadException
+from .logger import SDKLogger
+from .presigned import PresignedUrls
+from .transfer import AWSClient, FrameioDownloader
+
+logger = SDKLogger("downloads")
+
+
+class _RangeFailed(Exception):
+    # Carries how far a range got when its request blew up, and whether its URL expired
+    def __init__(self, position: int, error: Exception, expired: bool = False):
+        self.position = position
+        self.error = error
+        self.expired = expired
+        super().__init__(str(error))
+
+
+class AsyncAWSClient(AWSClient):
+    """asyncio download engine that sits next to the threaded AWSClient.
+
+    Range requests are coroutines on one event loop instead of one OS thread \
+        each, so a single process can keep hundreds of ranges in flight \
+        across many assets. Destination handling, resume journal, checksum \
+        verification and the returned stats are the same as \
+        ``AWSClient.multi_thread_download``.
+
+    Only sockets live on the loop. Writes, hashing and journal updates run \
+        on a small writer pool, so a slow disk (a NAS, say) holds up the \
+        ranges waiting on it and not every connection in the process.
+
+    Requires the optional ``aiohttp`` dependency.
+
+    Example::
+        results = AsyncAWSClient.run(
+            AsyncAWSClient.download_many(downloaders, connections=256)
+        )
+    """
+
+    connect_timeout = 30  # Seconds to open a connection
+    read_timeout = 60  # Seconds without a byte before a range is retried
+
+    def __init__(
+        self,
+        downloader: FrameioDownloader,
+        concurrency: Optional[int] = None,
+        session: Optional["aiohttp.ClientSession"] = None,
+        connections: Optional[asyncio.Semaphore] = None,
+        writers: Optional[concurrent.futures.Executor] = None,
+    ):
+        """
+        :param downloader: The FrameioDownloader for the asset
+        :param concurrency: Maximum number of ranges in flight for this asset
+        :param session: A shared aiohttp.ClientSession (one is created if omitted)
+        :param connections: A semaphore shared by every asset, the global connection budget
+        :param writers: A shared executor for disk work (one is created if omitted)
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncAWSClient requires aiohttp, install it with `pip install frameioclient[async]`"
+            )
+
+        super().__init__(downloader, concurrency=concurrency)
+
+        # The shared connection budget replaces the per-transfer adaptive controller
+        self.controller = None
+        self.session = session
+        self.connections = connections
+        self.writers = writers
+        self.in_flight = 0
+
+    @staticmethod
+    def run(coroutine):
+        """
+        Run a coroutine on a fresh event loop and return its result, like \
+            asyncio.run(), which Python 3.6 doesn't have.
+
+        :param coroutine: The coroutine to run, e.g. download_many(...)
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    @classmethod
+    def _timeout(cls) -> "aiohttp.ClientTimeout":
+        # A large range on a busy link can take many minutes, only a stalled socket is an error
+        return aiohttp.ClientTimeout(
+            total=None, sock_connect=cls.connect_timeout, sock_read=cls.read_timeout
+        )
+
+    async def _off_loop(self, function, *args):
+        # Disk work must never stall the sockets sharing the loop, and inside a \
+        #   coroutine get_event_loop() is the running loop on every Python 3
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.writers, function, *args)
+
+    async def _probe_async(self, url: str) -> Dict:
+        """
+        Async equivalent of AWSClient._probe().
+
+        :Args:
+            url (string): The URL of the object you want to probe
+        """
+        headers = {**self.shared_headers, "Range": "bytes=0-0"}
+
+        # The asset may have been listed long before this transfer got its turn
+        request_url = self._fresh_url(url)
+        refreshed = False
+        while True:
+            start_time = time.time()
+            async with self.session.get(request_url, headers=headers) as r:
+                if not refreshed and await self._is_expired(r):
+                    refreshed = True
+                    fresh = await self._refresh_async(request_url)
+                    if fresh != request_url:
+                        request_url = fresh
+                        continue
+
+                r.raise_for_status()
+                rtt = time.time() - start_time
+                status_code = r.status
+                response_headers = r.headers
+                break
+
+        return self._describe(status_code, response_headers, rtt)
+
+    async def _download_range(self, task: List) -> int:
+        url = task[0]
+        start_byte = task[1]
+        end_byte = task[2]
+
+        self.progress_manager.add("bytes_started", end_byte - start_byte + 1)
+
+        position = start_byte
+        attempt = 0
+        refreshes = 0
+
+        while True:
+            url = self._fresh_url(url)
+            try:
+                position, headers = await self._read_range(url, position, end_byte)
+                if position > end_byte:
+                    break
+                error = "ended early"
+            except _RangeFailed as e:
+                position = e.position
+                error = e.error
+
+                # The URL ran out mid-transfer, carry on with a fresh one
+                if e.expired and refreshes < self.range_retries:
+                    fresh = await self._refresh_async(url)
+                    if fresh != url:
+                        refreshes += 1
+                        continue
+
+                if isinstance(error, aiohttp.ClientResponseError) and not (
+                    error.status >= 500 or error.status == 429
+                ):
+                    await self._off_loop(self._give_up, start_byte, position)
+                    raise error
+            except Exception:
+                await self._off_loop(self._give_up, start_byte, position)
+                raise
+
+            attempt += 1
+            if attempt > self.range_retries:
+                await self._off_loop(self._give_up, start_byte, position)
+                raise DownloadException(
+                    message=f"Range {start_byte}-{end_byte} failed after {attempt} attempts: {error}"
+                )
+
+            delay = self._retry_delay(attempt)
+            self.progress_manager.add("retries")
+            logger.info(
+                f"Range {start_byte}-{end_byte} stopped at byte {position} ({error}), retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+        chunk_size = position - start_byte
+        await self._off_loop(self._complete_range, start_byte, chunk_size, headers, 206)
+
+        return chunk_size
+
+    async def _read_range(self, url: str, position: int, end_byte: int) -> Tuple:
+        # Fetch [position, end_byte], returning how far we got and the response headers
+        headers = {**self.shared_headers, "Range": "bytes=%d-%d" % (position, end_byte)}
+        expired = False
+
+        try:
+            async with self.session.get(url, headers=headers) as r:
+                expired = await self._is_expired(r)
+                r.raise_for_status()
+
+                if r.status != 206 and position != 0:
+                    raise DownloadException(message="Server ignored the range request.")
+                headers = dict(r.headers)
+
+                # Gather up to a block, and write what did arrive even if the connection drops
+                pending = bytearray()
+                try:
+                    while position + len(pending) <= end_byte:
+                        chunk = await r.content.read(
+                            min(
+                                download_block_size - len(pending),
+                                end_byte + 1 - position - len(pending),
+                            )
+                        )
+                        if not chunk:
+                            break  # Ended early, the retry picks up after what we have
+
+                        pending += chunk
+                        if len(pending) >= download_block_size:
+                            block, pending = pending, bytearray()
+                            position = await self._write_received(position, block)
+                finally:
+                    if pending:
+                        position = await self._write_received(position, pending)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _RangeFailed(position, e, expired=expired)
+
+        return position, headers
+
+    async def _write_received(self, position: int, block) -> int:
+        await self.limiter.consume_async(len(block))
+        return position + await self._off_loop(self._write_block, position, block)
+
+    async def _is_expired(self, response: "aiohttp.ClientResponse") -> bool:
+        # Whether a failed response is worth swapping the URL for, see PresignedUrls.is_expired
+        if self.urls is None or response.status not in (400, 403):
+            return False
+
+        body = await response.text(errors="replace") if response.status == 400 else ""
+        return PresignedUrls.is_expired_status(response.status, body)
+
+    async def _refresh_async(self, url: str) -> str:
+        # Fetching the asset is a blocking API call, keep it off the loop
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.urls.refresh, url)
+
+    async def _run_range(self, task: List, limit: asyncio.Semaphore) -> int:
+        async with limit:
+            if self.connections is not None:
+                await self.connections.acquire()
+
+            self.in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+
+            try:
+                return await self._download_range(task)
+            finally:
+                self.in_flight -= 1
+                if self.connections is not None:
+                    self.connections.release()
+
+    async def download(self, url: Optional[str] = None):
+        """
+        Download the asset with concurrent range requests on the event loop.
+
+        :Args:
+            url (string): The URL to download, defaults to the asset's original
+        """
+        url = url or self.downloader.asset["original"]
+
+        owns_session = self.session is None
+        if owns_session:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=self._timeout(),
+            )
+
+        owns_writers = self.writers is None
+        if owns_writers:
+            self.writers = concurrent.futures.ThreadPoolExecutor(
+                max_workers=async_writer_threads
+            )
+
+        try:
+            # Opening, preallocating and loading the journal touch the disk too
+            remote = await self._probe_async(url)
+            tasks = await self._off_loop(self._prepare, url, remote)
+
+            limit = asyncio.Semaphore(self.concurrency)
+            results = await asyncio.gather(
+                *(self._run_range(task, limit) for task in tasks),
+                return_exceptions=True,
+            )
+
+            for result in results:
+                if isinstance(result, Exception):
+                    self._echo(result)
+
+            return await self._off_loop(self._finalize)
+        finally:
+            if owns_session:
+                await self.session.close()
+            if owns_writers:
+                self.writers.shutdown(wait=False)
+
+    @classmethod
+    async def download_many(
+        cls,
+        downloaders: List[FrameioDownloader],
+        connections: Optional[int] = max_async_connections,
+        concurrency: Optional[int] = None,
+    ) -> List:
+        """
+        Download many assets on one event loop and one connection pool.
+
+        Returns one entry per downloader, in order: the same value \
+            multi_thread_download would return, or the exception that \
+            stopped that asset.
+
+        :Args:
+            downloaders (list): FrameioDownloader objects to download
+            connections (int): Range requests in flight across every asset
+            concurrency (int): Range requests in flight per asset
+        """
+        budget = asyncio.Semaphore(connections)
+
+        # Only open as many destinations as we could possibly be feeding
+        files = asyncio.Semaphore(connections)
+
+        connector = aiohttp.TCPConnector(limit=connections, limit_per_host=0)
+        writers = concurrent.futures.ThreadPoolExecutor(max_workers=async_writer_threads)
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=cls._timeout()
+        ) as session:
+
+            async def run(downloader: FrameioDownloader):
+                async with files:
+                    if not downloader._prepare_destination():
+                        return downloader.destination
+
+                    client = cls(
+                        downloader,
+                        concurrency=concurrency,
+                        session=session,
+                        connections=budget,
+                        writers=writers,
+                    )
+                    return await client.download()
+
+            try:
+                return await asyncio.gather(
+                    *(run(downloader) for downloader in downloaders),
+                    return_exceptions=True,
+                )
+            finally:
+                writers.shutdown(wait=False)
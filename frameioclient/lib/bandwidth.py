@@ -1,4 +1,12 @@
+import asyncio
+import io
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
 import speedtest
+from token_bucket import Limiter, MemoryStorage
 
 
 class NetworkBandwidth:
@@ -55,3 +63,183 @@ class DiskBandwidth:
 
     def __repr__(self):
         self.results
+
+
+class BandwidthLimiter(object):
+    """Byte-rate limit shared by every transfer in the process.
+
+    Backed by a token bucket where one token is one byte. Every download \
+        range read and upload part draws from the same bucket, so the cap \
+        holds across all concurrent transfers. The rate can be changed at \
+        runtime and can follow a daily schedule of time windows (local time).
+
+    Example::
+        limiter = BandwidthLimiter.shared()
+        limiter.set_schedule([("09:00", "19:00", 400 * 1000 * 1000 / 8)])  # 400 Mbit/s by day
+        limiter.set_rate(None)  # No cap outside of the scheduled windows
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    key = "transfers"
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        schedule: Optional[List[Tuple[str, str, Optional[float]]]] = None,
+        burst: Optional[float] = 0.25,
+    ):
+        """
+        :param rate: Bytes per second when no scheduled window applies, None for no cap
+        :param schedule: List of ("HH:MM", "HH:MM", bytes per second or None) windows
+        :param burst: Seconds worth of traffic the bucket may hold
+        """
+        self.rate = rate
+        self.burst = burst
+        self.schedule = list()
+        self._limiter = None
+        self._limiter_rate = None
+        self._capacity = 0
+        self._lock = threading.Lock()
+
+        self.set_schedule(schedule or [])
+
+    @classmethod
+    def shared(cls) -> "BandwidthLimiter":
+        """Get the process-wide limiter used by the transfer engines."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def set_rate(self, rate: Optional[float]):
+        """
+        Change the default cap while transfers are running.
+
+        :param rate: Bytes per second, None for no cap
+        """
+        self.rate = rate
+
+    def set_schedule(self, schedule: List[Tuple[str, str, Optional[float]]]):
+        """
+        Replace the daily schedule. Windows may wrap past midnight \
+            ("22:00", "06:00") and the first matching window wins.
+
+        :param schedule: List of ("HH:MM", "HH:MM", bytes per second or None) windows
+        """
+        parsed = list()
+        for start, end, rate in schedule:
+            parsed.append(
+                (
+                    datetime.strptime(start, "%H:%M").time(),
+                    datetime.strptime(end, "%H:%M").time(),
+                    rate,
+                )
+            )
+
+        self.schedule = parsed
+
+    def current_rate(self, now: Optional[datetime] = None) -> Optional[float]:
+        """
+        The cap in effect right now, in bytes per second (None for no cap).
+
+        :param now: Evaluate the schedule at this time instead of now
+        """
+        moment = (now or datetime.now()).time()
+
+        for start, end, rate in self.schedule:
+            if start <= end:
+                inside = start <= moment < end
+            else:
+                inside = moment >= start or moment < end
+            if inside:
+                return rate
+
+        return self.rate
+
+    def _acquire(self, nbytes: int) -> Tuple[int, float]:
+        # Try to take up to nbytes, return (bytes taken, seconds to wait before retrying)
+        rate = self.current_rate()
+        if not rate:
+            return nbytes, 0
+
+        with self._lock:
+            if self._limiter is None or self._limiter_rate != rate:
+                self._capacity = max(1, int(rate * self.burst))
+                self._limiter = Limiter(rate, self._capacity, MemoryStorage())
+                self._limiter_rate = rate
+
+            piece = min(nbytes, self._capacity)
+            if self._limiter.consume(self.key, piece):
+                return piece, 0
+
+        # Wake up at least a few times a second so rate changes apply quickly
+        return 0, min(piece / rate, 0.25)
+
+    def consume(self, nbytes: int):
+        """
+        Block until nbytes may be transferred.
+
+        :param nbytes: Number of bytes about to be (or just) transferred
+        """
+        while nbytes > 0:
+            taken, wait = self._acquire(nbytes)
+            nbytes -= taken
+            if wait:
+                time.sleep(wait)
+
+    async def consume_async(self, nbytes: int):
+        """
+        Async equivalent of consume() for the asyncio engine.
+
+        :param nbytes: Number of bytes about to be (or just) transferred
+        """
+        while nbytes > 0:
+            taken, wait = self._acquire(nbytes)
+            nbytes -= taken
+            if wait:
+                await asyncio.sleep(wait)
+
+
+class ThrottledReader(io.RawIOBase):
+    """File-like view of an upload body that draws from a BandwidthLimiter \
+        as requests streams it out, with tell/seek so urllib3 can rewind it \
+        on retries.
+    """
+
+    def __init__(self, data: bytes, limiter: BandwidthLimiter):
+        self.data = memoryview(data)
+        self.limiter = limiter
+        self.position = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = len(self.data) + offset
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self.data) - self.position
+
+        block = self.data[self.position : self.position + size]
+        self.limiter.consume(len(block))
+        self.position += len(block)
+
+        return bytes(block)
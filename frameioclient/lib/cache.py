@@ -0,0 +1,203 @@
+import os
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+
+from .constants import download_cache_size
+from .logger import SDKLogger
+from .utils import FormatTypes, Utils
+
+logger = SDKLogger("downloads")
+
+
+class DownloadCache(object):
+    """Local content-addressed store of downloaded originals.
+
+    Files are kept under their xxHash (``<directory>/ab/abcdef...``), so the \
+        same original pulled by another job, from a copy in another project \
+        or by a re-run is materialized from disk instead of the network. \
+        Entries are linked into place (reflink, then hardlink, then a plain \
+        copy), and the least recently used ones are evicted once the store \
+        grows past ``max_size``.
+
+    The store's size is kept as a running total, so adding an entry only \
+        walks the directory when it pushes the total over ``max_size``. \
+        Eviction then goes down to ``evict_target`` of it, which leaves room \
+        for the next entries without another walk.
+
+    Only verified content goes in: a file is stored after its checksum \
+        matched the asset's.
+
+    Hardlinked downloads share their bytes with the cache, pass \
+        ``modes=("reflink", "copy")`` if you edit downloaded files in place.
+
+    Example::
+        cache = DownloadCache("~/.frameio/cache", max_size=200 * 1024 ** 3)
+        client.assets.download(asset, "./downloads", cache=cache)
+        cache.hits, cache.misses
+    """
+
+    sidecar_suffix = ".json"  # Metadata kept next to an entry, not counted as one
+    evict_target = 0.9  # Fraction of max_size left after an eviction
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: Optional[int] = download_cache_size,
+        modes: Optional[Tuple] = ("reflink", "hardlink", "copy"),
+    ):
+        """
+        :param directory: Where the cached files live
+        :param max_size: Bytes the store may hold before evicting, None for no limit
+        :param modes: Ways to link files in and out of the store, tried in order
+        """
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_size = max_size
+        self.modes = modes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Bytes held, unknown until the first walk
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, checksum: str) -> str:
+        return os.path.join(self.directory, checksum[:2], checksum)
+
+    def lookup(self, checksum: str, size: int) -> Optional[str]:
+        """
+        Path of the cached copy of this content, or None.
+
+        :param checksum: xxHash of the content
+        :param size: Expected size in bytes, a cheap guard against damaged entries
+        """
+        path = self.path(checksum)
+        try:
+            found = os.path.getsize(path)
+            if found != size:
+                logger.info(f"Dropping damaged cache entry {checksum}")
+                os.remove(path)
+                self._account(-found)
+                return None
+
+            # Recently used, the mtime is the LRU clock
+            os.utime(path)
+        except OSError:
+            return None
+
+        return path
+
+    def fetch(self, checksum: str, size: int, destination: str) -> Optional[str]:
+        """
+        Materialize cached content at destination, return the mode used \
+            or None on a miss.
+
+        :param checksum: xxHash of the content
+        :param size: Size of the content in bytes
+        :param destination: Path to create
+        """
+        path = self.lookup(checksum, size)
+        if path is not None:
+            if os.path.exists(destination):
+                os.remove(destination)
+
+            try:
+                mode = Utils.link_or_copy(path, destination, self.modes)
+            except OSError as e:
+                logger.info(f"Unable to use cache entry {checksum}: {e}")
+            else:
+                with self._lock:
+                    self.hits += 1
+                return mode
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, checksum: str, source: str):
+        """
+        Add a verified file to the store and evict what no longer fits.
+
+        :param checksum: xxHash of the file, already verified by the caller
+        :param source: Path of the file
+        """
+        path = self.path(checksum)
+        if os.path.exists(path):
+            os.utime(path)
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Link under a temporary name so concurrent readers never see a partial entry
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            Utils.link_or_copy(source, temporary, self.modes)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.info(f"Unable to cache {checksum}: {e}")
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+
+        self._account(os.path.getsize(path))
+        self.evict()
+
+    def entries(self) -> Dict:
+        """Every cached file as path -> (size, mtime)."""
+        found = dict()
+        for folder, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith((".tmp", self.sidecar_suffix)):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Evicted by someone else meanwhile
+                found[path] = (stat.st_size, stat.st_mtime)
+
+        return found
+
+    def size(self) -> int:
+        return sum(size for (size, _) in self.entries().values())
+
+    def evict(self):
+        """Remove least recently used entries once the store outgrows max_size."""
+        if self.max_size is None:
+            return
+
+        with self._lock:
+            if self._size is not None and self._size <= self.max_size:
+                return
+
+        # Over the limit, or never counted, take stock of what's really there
+        entries = self.entries()
+        total = sum(size for (size, _) in entries.values())
+        target = self.max_size if total <= self.max_size else self.max_size * self.evict_target
+
+        for path, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= target:
+                break
+            try:
+                self.remove(path)
+            except OSError:
+                continue
+            total -= size
+            logger.info(
+                f"Evicted {os.path.basename(path)} ({Utils.format_value(size, type=FormatTypes.SIZE)}) from the download cache"
+            )
+
+        with self._lock:
+            self._size = total
+
+    def _account(self, delta: int):
+        # Track entries added or dropped without walking the store
+        with self._lock:
+            if self._size is not None:
+                self._size += delta
+
+    def remove(self, path: str):
+        os.remove(path)
+
+    def stats(self) -> Dict:
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
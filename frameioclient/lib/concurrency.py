@@ -0,0 +1,175 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from .constants import default_thread_count, max_download_concurrency
+from .logger import SDKLogger
+
+logger = SDKLogger("downloads")
+
+
+class AdaptiveConcurrency(object):
+    """AIMD controller for the number of concurrent range requests.
+
+    Workers report every block they receive. Once per ``interval`` the \
+        controller compares the total throughput of the last window with the \
+        previous one and adjusts the worker limit:
+
+    - Slow start: double the limit while total throughput keeps growing fast
+    - Additive increase: add a worker while total throughput still improves
+    - Multiplicative decrease: back off after errors or a throughput drop
+    - On a plateau, drop a worker if per-connection throughput fell (the \
+        link is saturated), otherwise probe with one more
+
+    Every transfer gets its own controller, so concurrent transfers never \
+        mix their windows or worker counts. Only the limit is shared: the \
+        last one a transfer settled on is kept per CDN for the whole \
+        process, and is the starting point for the next transfer to it.
+
+    Example::
+        controller = AdaptiveConcurrency.for_cdn(AWSClient.check_cdn(url))
+        controller.record(len(block))
+    """
+
+    _learned: Dict[Optional[str], int] = dict()  # CDN -> last limit settled on
+    _registry_lock = threading.Lock()
+
+    growth_threshold = 0.05  # Relative gain that counts as "still improving"
+    slow_start_threshold = 0.25  # Relative gain that keeps us in slow start
+    drop_threshold = 0.10  # Relative loss that triggers a multiplicative decrease
+    decrease_factor = 0.75
+    error_decrease_factor = 0.5
+
+    def __init__(
+        self,
+        initial: Optional[int] = default_thread_count,
+        minimum: Optional[int] = 2,
+        maximum: Optional[int] = max_download_concurrency,
+        interval: Optional[float] = 1.0,
+    ):
+        """
+        :param initial: Number of workers to start with
+        :param minimum: Never go below this many workers
+        :param maximum: Never go above this many workers
+        :param interval: Seconds of transfer per measurement window
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.interval = interval
+        self.cdn = None
+        self.shared = False  # Whether the learned limit is kept for the CDN, see for_cdn()
+        self.slow_start = True
+        self.active = 0
+        self.last_throughput = None
+        self.last_per_connection = None
+        self._window_start = time.time()
+        self._window_bytes = 0
+        self._window_errors = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_cdn(cls, cdn: Optional[str]) -> "AdaptiveConcurrency":
+        """
+        Get a controller for one transfer from a CDN ('S3', 'Cloudfront' or \
+            None), starting at the limit the previous transfer learned.
+
+        :param cdn: The CDN as returned by AWSClient.check_cdn()
+        """
+        with cls._registry_lock:
+            initial = cls._learned.get(cdn, default_thread_count)
+
+        controller = cls(initial=initial)
+        controller.cdn = cdn
+        controller.shared = True
+        return controller
+
+    def start(self):
+        """Begin a fresh measurement window, call this when a transfer starts."""
+        with self._lock:
+            self._reset_window(time.time())
+            self.last_throughput = None
+            self.last_per_connection = None
+
+    def set_active(self, count: int):
+        """
+        Tell the controller how many range requests are currently in flight.
+
+        :param count: Number of in-flight range requests
+        """
+        with self._lock:
+            self.active = count
+
+    def record(self, nbytes: int) -> int:
+        """
+        Report bytes received by any worker.
+
+        :param nbytes: Number of bytes received
+        """
+        with self._lock:
+            self._window_bytes += nbytes
+            self._maybe_adjust()
+            return self.limit
+
+    def record_error(self) -> int:
+        """Report a failed or throttled range request."""
+        with self._lock:
+            self._window_errors += 1
+            self._maybe_adjust()
+            return self.limit
+
+    def _maybe_adjust(self):
+        now = time.time()
+        elapsed = now - self._window_start
+        if elapsed < self.interval:
+            return
+
+        # Near the end of a transfer there isn't enough work to fill every
+        # slot, so the window says nothing about the link
+        if self._window_errors == 0 and self.active < self.limit:
+            self._reset_window(now)
+            return
+
+        throughput = self._window_bytes / elapsed
+        per_connection = throughput / self.limit
+        previous = self.last_throughput
+        previous_limit = self.limit
+
+        if self._window_errors > 0:
+            self.slow_start = False
+            self.limit = int(self.limit * self.error_decrease_factor)
+        elif previous is None:
+            pass  # First window of the transfer, nothing to compare against yet
+        elif throughput > previous * (1 + self.slow_start_threshold) and self.slow_start:
+            self.limit = self.limit * 2
+        elif throughput > previous * (1 + self.growth_threshold):
+            self.limit += 1
+        elif throughput < previous * (1 - self.drop_threshold):
+            self.slow_start = False
+            self.limit = int(self.limit * self.decrease_factor)
+        else:
+            self.slow_start = False
+            if per_connection < self.last_per_connection * (1 - self.growth_threshold):
+                self.limit -= 1
+            else:
+                self.limit += 1
+
+        self.limit = max(self.minimum, min(self.limit, self.maximum))
+        if self.limit != previous_limit:
+            logger.info(
+                f"Adjusting concurrency {previous_limit} -> {self.limit} ({round(throughput / 1024 / 1024, 2)} MB/s)"
+            )
+
+        self.last_throughput = throughput
+        self.last_per_connection = per_connection
+        self._reset_window(now)
+
+        # Hand what this transfer learned to the next one from the same CDN
+        if self.shared:
+            with self._registry_lock:
+                self._learned[self.cdn] = self.limit
+
+    def _reset_window(self, now: float):
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_errors = 0
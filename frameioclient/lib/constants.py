@@ -12,12 +12,25 @@ asset_excludes = {
         "a.inserted_at",
         "a.original",
         "a.upload_completed_at",
+        "a.checksums",  # Verifying and deduplicating downloads needs the xxHash
     ],
     "excluded_fields": ["a.checksums", "a.h264_1080_best", "a.source"],
-    "drop_includes": ["a.trancode_statuses", "a.transcodes", "a.source", "a.checksums"],
+    "drop_includes": ["a.trancode_statuses", "a.transcodes", "a.source"],
     "hard_drop_fields": ["a.transcodes", "a.source"],
 }
 
 default_thread_count = 5
 
 retryable_statuses = [400, 429, 500, 503]
+
+download_block_size = 1024 * 1024  # Bytes read from the socket per write
+whole_download_buffer = 8 * 1024 * 1024  # Buffer reused by single-stream downloads
+hash_reorder_buffer = 64 * 1024 * 1024  # Out-of-order bytes held for hashing
+stream_reorder_window = 128 * 1024 * 1024  # Out-of-order bytes held when streaming to a sink
+max_download_concurrency = 64  # Upper bound for adaptive range workers
+max_async_connections = 256  # Range requests in flight across every asset
+async_writer_threads = 8  # Threads doing disk work for the asyncio engine
+download_cache_size = 50 * 1024 * 1024 * 1024  # Default bound of a DownloadCache
+direct_io_alignment = 4096  # Offset, length and buffer alignment for O_DIRECT
+page_cache_drop_interval = 64 * 1024 * 1024  # Bytes written between page cache drops
+thumbnail_cache_size = 2 * 1024 * 1024 * 1024  # Default bound of a ThumbnailCache
@@ -0,0 +1,504 @@
+import enum
+import errno
+import mmap
+import os
+import shutil
+import threading
+from typing import Callable, Optional
+
+from .constants import (
+    direct_io_alignment,
+    download_block_size,
+    page_cache_drop_interval,
+    stream_reorder_window,
+)
+from .exceptions import DownloadException, InsufficientDiskSpace
+from .iopolicy import IOPolicy, PageCache
+from .logger import SDKLogger
+from .utils import FormatTypes, Utils
+
+logger = SDKLogger("downloads")
+
+
+class Preallocation(enum.Enum):
+    """How disk space is claimed for a download before any range is written.
+
+    - NONE: Let the file grow as ranges land (default)
+    - SPARSE: Truncate the file to its final size up front, no blocks reserved
+    - RESERVE: fallocate the whole file so it gets contiguous extents and \
+        ENOSPC surfaces before the transfer starts
+    """
+
+    NONE = "none"
+    SPARSE = "sparse"
+    RESERVE = "reserve"
+
+
+class FileDestination(object):
+    """Positional writer shared by every range worker of a download.
+
+    The destination file is opened once per transfer and each worker writes \
+        at an explicit offset (pwrite), so chunks never reopen the file and \
+        never fight over a shared file position.
+
+    With ``io_policy`` set to DONTNEED, written pages are flushed and \
+        dropped from the page cache every ``page_cache_drop_interval`` \
+        bytes. With DIRECT, the page-aligned middle of every block is \
+        written with O_DIRECT through a second descriptor and only the \
+        unaligned edges touch the cache.
+
+    Example::
+        with FileDestination("./downloads/file.mov", size=1024).open() as destination:
+            destination.write_at(0, b"data")
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: Optional[int] = None,
+        preallocation: Optional[Preallocation] = Preallocation.NONE,
+        io_policy: Optional[IOPolicy] = IOPolicy.BUFFERED,
+    ):
+        """
+        :param path: Where the file will be written
+        :param size: The final size of the file, enables the free space preflight
+        :param preallocation: A Preallocation mode (or its string value)
+        :param io_policy: An IOPolicy (or its string value) for the page cache
+        """
+        self.path = path
+        self.size = size
+        self.preallocation = Preallocation(preallocation or Preallocation.NONE)
+        self.io_policy = IOPolicy.resolve(io_policy)
+        self.fd = None
+        self.direct_fd = None
+        self.reserved = False  # Every block of the file was claimed up front
+        self.dirty = 0  # Bytes written since the page cache was last dropped
+        self._lock = threading.Lock()  # Only used when os.pwrite isn't available
+        self._dirty_lock = threading.Lock()
+        self._local = threading.local()  # Aligned buffer per worker for O_DIRECT
+
+    def open(self):
+        if self.size is not None:
+            FileDestination.check_free_space(self.path, self.size)
+
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self.fd = os.open(self.path, flags, 0o644)
+
+        if self.io_policy == IOPolicy.DIRECT:
+            self.direct_fd = PageCache.open_direct(self.path, os.O_RDWR)
+            if self.direct_fd is None:
+                self.io_policy = IOPolicy.DONTNEED
+
+        try:
+            self._preallocate()
+        except Exception:
+            self.close()
+            raise
+
+        return self
+
+    @staticmethod
+    def check_free_space(path: str, size: int):
+        """
+        Fail fast if the volume can't hold the rest of the file.
+
+        :param path: Where the file will be written
+        :param size: The final size of the file
+        """
+        # Blocks that already belong to a partial file don't need new space
+        allocated = 0
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            allocated = getattr(stat, "st_blocks", 0) * 512 or stat.st_size
+
+        needed = size - allocated
+        free = shutil.disk_usage(os.path.dirname(os.path.abspath(path))).free
+
+        if needed > free:
+            raise InsufficientDiskSpace(
+                message=f"{Utils.format_value(needed, type=FormatTypes.SIZE)} needed at {path} but only {Utils.format_value(free, type=FormatTypes.SIZE)} is free."
+            )
+
+    def _preallocate(self):
+        if self.size is None or self.preallocation == Preallocation.NONE:
+            return
+
+        if self.preallocation == Preallocation.RESERVE and hasattr(
+            os, "posix_fallocate"
+        ):
+            try:
+                os.posix_fallocate(self.fd, 0, self.size)
+                self.reserved = True
+                return
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise InsufficientDiskSpace
+                # Filesystem can't reserve blocks, a sparse file is the next best thing
+                logger.info(f"Unable to reserve disk space ({e}), using a sparse file")
+
+        if os.fstat(self.fd).st_size < self.size:
+            os.ftruncate(self.fd, self.size)
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Write data at the given offset, retrying short writes.
+
+        :param offset: Absolute byte offset in the destination file
+        :param data: Any bytes-like object
+        """
+        view = memoryview(data).cast("B")
+
+        if self.direct_fd is not None:
+            return self._write_direct(offset, view)
+
+        written = self._write_buffered(offset, view)
+        if self.io_policy == IOPolicy.DONTNEED:
+            self._drop_written(written)
+
+        return written
+
+    def _write_buffered(self, offset: int, view: memoryview) -> int:
+        written = 0
+        while written < len(view):
+            written += self._pwrite(view[written:], offset + written)
+
+        return written
+
+    def _write_direct(self, offset: int, view: memoryview) -> int:
+        # Only whole aligned pages can go around the cache, the edges are written buffered
+        end = offset + len(view)
+        head = min(end, -(-offset // direct_io_alignment) * direct_io_alignment)
+        tail = max(head, end // direct_io_alignment * direct_io_alignment)
+
+        if head > offset:
+            self._write_buffered(offset, view[: head - offset])
+        if end > tail:
+            self._write_buffered(tail, view[tail - offset :])
+
+        length = tail - head
+        if length > 0:
+            aligned = memoryview(self._direct_buffer(length))[:length]
+            aligned[:] = view[head - offset : tail - offset]
+            written = os.pwrite(self.direct_fd, aligned, head)
+
+            if written < length:
+                self._write_buffered(head + written, view[head + written - offset : tail - offset])
+
+        return len(view)
+
+    def _direct_buffer(self, length: int):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) < length:
+            size = -(-length // mmap.PAGESIZE) * mmap.PAGESIZE
+            buffer = self._local.buffer = PageCache.aligned_buffer(size)
+
+        return buffer
+
+    def _drop_written(self, length: int):
+        with self._dirty_lock:
+            self.dirty += length
+            if self.dirty < page_cache_drop_interval:
+                return
+            self.dirty = 0
+
+        # Dirty pages can't be dropped, flush them first
+        PageCache.drop(self.fd, sync=True)
+
+    def _pwrite(self, data, offset: int) -> int:
+        if hasattr(os, "pwrite"):
+            return os.pwrite(self.fd, data, offset)
+
+        # Windows has no pwrite, so serialize seek + write on the shared fd
+        with self._lock:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            return os.write(self.fd, data)
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        """
+        Read back bytes that were already written to the destination.
+
+        :param offset: Absolute byte offset in the destination file
+        :param length: Number of bytes to read
+        """
+        if hasattr(os, "pread"):
+            return os.pread(self.fd, length, offset)
+
+        with self._lock:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            return os.read(self.fd, length)
+
+    def close(self):
+        if self.direct_fd is not None:
+            os.close(self.direct_fd)
+            self.direct_fd = None
+
+        if self.fd is not None:
+            try:
+                # Whatever this transfer still has in the cache (edges, read backs) goes too
+                if self.io_policy != IOPolicy.BUFFERED:
+                    PageCache.drop(self.fd, sync=True)
+            finally:
+                os.close(self.fd)
+                self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class MmapDestination(FileDestination):
+    """Memory-mapped writer shared by every range worker of a download.
+
+    The file is sized once and mapped, and range workers read responses \
+        straight into their slice of the mapping with view_at(), so writes \
+        cost neither a syscall nor a copy. Falls back to pwrite for empty \
+        files.
+
+    Writing into a hole of a mapping on a full disk raises SIGBUS instead \
+        of an OSError, so every block is reserved with posix_fallocate \
+        before mapping, and open() raises DownloadException where that \
+        isn't possible.
+
+    Example::
+        with MmapDestination("./downloads/file.mov", size=1024).open() as destination:
+            destination.write_at(0, b"data")
+    """
+
+    def __init__(self, path: str, size: int):
+        """
+        :param path: Where the file will be written
+        :param size: The final size of the file, the mapping covers all of it
+        """
+        super().__init__(path, size=size, preallocation=Preallocation.RESERVE)
+        self.map = None
+
+    def open(self):
+        super().open()
+
+        try:
+            if self.size > 0:
+                if not self.reserved:
+                    raise DownloadException(
+                        message=f"Unable to reserve disk space for {self.path}, it can't be memory-mapped safely."
+                    )
+                self.map = mmap.mmap(self.fd, self.size)
+        except Exception:
+            self.close()
+            raise
+
+        return self
+
+    def write_at(self, offset: int, data) -> int:
+        if self.map is None:
+            return super().write_at(offset, data)
+
+        length = len(data)
+        self.map[offset : offset + length] = data
+        return length
+
+    def view_at(self, offset: int, length: int) -> memoryview:
+        """
+        A writable window on the mapping, to receive data in place.
+
+        :param offset: Absolute byte offset in the file
+        :param length: Length of the window
+        """
+        return memoryview(self.map)[offset : offset + length]
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        if self.map is None:
+            return super().read_at(offset, length)
+
+        return self.map[offset : offset + length]
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        super().close()
+
+
+
+class BufferDestination(object):
+    """Writer over a caller-provided buffer (bytearray, memoryview, NumPy array).
+
+    Range workers write straight into their slice of the buffer, or read \
+        the response into it with view_at(), so the asset never touches the \
+        disk and no intermediate copies are made.
+
+    Example::
+        buffer = bytearray(asset["filesize"])
+        with BufferDestination(buffer, size=len(buffer)).open() as destination:
+            destination.write_at(0, b"data")
+    """
+
+    def __init__(self, buffer, size: int):
+        """
+        :param buffer: Any writable, contiguous object supporting the buffer protocol
+        :param size: The total number of bytes that will be written
+        """
+        view = memoryview(buffer)
+        if view.readonly:
+            raise DownloadException(message="The buffer to download into is read-only.")
+        if not view.c_contiguous:
+            raise DownloadException(message="The buffer to download into must be contiguous.")
+
+        self.buffer = buffer
+        self.size = size
+        self.view = view.cast("B")
+
+        if len(self.view) < size:
+            raise DownloadException(
+                message=f"The buffer holds {len(self.view)} bytes but the download needs {size}."
+            )
+
+    def open(self):
+        return self
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Copy data into the buffer at the given offset.
+
+        :param offset: Absolute byte offset in the buffer
+        :param data: Any bytes-like object
+        """
+        length = len(data)
+        self.view[offset : offset + length] = data
+        return length
+
+    def view_at(self, offset: int, length: int) -> memoryview:
+        """
+        A writable window on the buffer, to receive data in place.
+
+        :param offset: Absolute byte offset in the buffer
+        :param length: Length of the window
+        """
+        return self.view[offset : offset + length]
+
+    def read_at(self, offset: int, length: int) -> memoryview:
+        return self.view[offset : offset + length]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SinkDestination(object):
+    """In-order writer to any writable stream (pipe, socket, stdout).
+
+    Range workers still write at explicit offsets, but bytes reach the \
+        sink strictly in order. Blocks that arrive ahead of the sink's \
+        position are held in a reorder window, and a worker that gets more \
+        than ``window`` bytes ahead waits until the sink catches up, which \
+        caps memory and pushes back on the connection.
+
+    Example::
+        process = subprocess.Popen(["ffprobe", "-"], stdin=subprocess.PIPE)
+        destination = SinkDestination(process.stdin, size=asset["filesize"])
+    """
+
+    def __init__(
+        self,
+        sink,
+        size: int,
+        window: Optional[int] = stream_reorder_window,
+        on_write: Optional[Callable[[int, bytes], None]] = None,
+    ):
+        """
+        :param sink: Any object with a write() method, it is not closed
+        :param size: The total number of bytes that will be written
+        :param window: Maximum number of out-of-order bytes held in memory
+        :param on_write: Called with (offset, data) for every in-order write
+        """
+        self.sink = sink
+        self.size = size
+        self.window = max(window, 2 * download_block_size)
+        self.on_write = on_write
+        self.position = 0  # Everything before this offset has reached the sink
+        self.pending = dict()  # offset -> bytes waiting for the sink
+        self.buffered = 0
+        self.error = None
+        self._cond = threading.Condition()
+
+    def open(self):
+        return self
+
+    def write_at(self, offset: int, data) -> int:
+        """
+        Hand over a block, blocking while it's too far ahead of the sink.
+
+        :param offset: Absolute byte offset of the block
+        :param data: Any bytes-like object
+        """
+        with self._cond:
+            # The block the sink is waiting for always goes straight through
+            while (
+                self.error is None
+                and offset != self.position
+                and offset + len(data) > self.position + self.window
+            ):
+                self._cond.wait()
+
+            if self.error is not None:
+                raise DownloadException(message=f"Stream aborted: {self.error}")
+
+            if offset == self.position:
+                self._emit(data)
+                self._drain()
+                self._cond.notify_all()
+            else:
+                self.pending[offset] = bytes(data)
+                self.buffered += len(data)
+
+        return len(data)
+
+    def _emit(self, data):
+        try:
+            self.sink.write(data)
+        except Exception as e:
+            # The reader went away, wake everyone up so the transfer stops
+            self.abort(e)
+            raise
+
+        if self.on_write:
+            self.on_write(self.position, data)
+        self.position += len(data)
+
+    def _drain(self):
+        while self.position in self.pending:
+            data = self.pending.pop(self.position)
+            self.buffered -= len(data)
+            self._emit(data)
+
+    def abort(self, error: Exception):
+        """
+        Fail every pending and future write, e.g. after a range gave up.
+
+        :param error: The reason the stream can't continue
+        """
+        with self._cond:
+            if self.error is None:
+                self.error = error
+            self.pending.clear()
+            self.buffered = 0
+            self._cond.notify_all()
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        raise DownloadException(message="A stream can't be read back.")
+
+    def close(self):
+        if self.error is None and hasattr(self.sink, "flush"):
+            self.sink.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -62,3 +62,14 @@ class AssetChecksumMismatch(Exception):
     ):
         self.message = message
         super().__init__(self.message)
+
+
+class InsufficientDiskSpace(Exception):
+    """Exception raised when the download destination doesn't have room for the file."""
+
+    def __init__(
+        self,
+        message="Not enough free disk space at the download destination for this asset.",
+    ):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,119 @@
+import threading
+from typing import Callable, Optional
+
+import xxhash
+
+from .constants import download_block_size, hash_reorder_buffer
+from .journal import RangeSet
+
+
+class IncrementalHasher(object):
+    """Build an xxh64 digest while a multi-part download is still running.
+
+    Range workers hand over every block right after writing it. Blocks that \
+        extend the contiguous prefix are hashed immediately. Blocks that \
+        arrive ahead of the prefix are held in a bounded reorder buffer, and \
+        anything that didn't fit is read back from the destination once the \
+        prefix reaches it, so memory stays capped at ``max_buffer``.
+
+    Example::
+        hasher = IncrementalHasher(filesize, destination.read_at)
+        hasher.update(0, b"data")
+        hasher.hexdigest()
+    """
+
+    def __init__(
+        self,
+        size: int,
+        read_at: Callable[[int, int], bytes],
+        max_buffer: Optional[int] = hash_reorder_buffer,
+    ):
+        """
+        :param size: Total size of the object being hashed
+        :param read_at: Callable that reads back already written bytes (offset, length)
+        :param max_buffer: Maximum number of out-of-order bytes held in memory
+        """
+        self.size = size
+        self.read_at = read_at
+        self.max_buffer = max_buffer
+        self.position = 0  # Everything before this offset has been hashed
+        self.pending = dict()  # offset -> bytes waiting for the prefix
+        self.buffered = 0
+        self.written = RangeSet()
+        self.bytes_reread = 0
+        self._hash = xxhash.xxh64()
+        self._lock = threading.Lock()
+
+    def update(self, offset: int, data):
+        """
+        Feed a block that has just been written to the destination.
+
+        :param offset: Absolute byte offset of the block
+        :param data: The block's bytes
+        """
+        end = offset + len(data)
+
+        with self._lock:
+            self.written.add(offset, end)
+
+            if offset <= self.position < end:
+                self._hash.update(memoryview(data)[self.position - offset :])
+                self.position = end
+            elif offset > self.position and self.buffered + len(data) <= self.max_buffer:
+                self.pending[offset] = bytes(data)
+                self.buffered += len(data)
+
+            self._drain()
+
+    def add_written(self, start: int, end: int):
+        """
+        Tell the hasher that [start, end) is already on disk, e.g. when resuming.
+
+        :param start: First byte of the range
+        :param end: One past the last byte of the range
+        """
+        with self._lock:
+            self.written.add(start, end)
+            self._drain()
+
+    def hexdigest(self) -> str:
+        """Hash whatever is left (read back from disk) and return the digest."""
+        with self._lock:
+            self.written.add(0, self.size)
+            self._drain()
+            return self._hash.hexdigest()
+
+    def _drain(self):
+        while self.position < self.size:
+            data = self._pop_pending()
+            if data is None:
+                data = self._read_written()
+            if not data:
+                break  # The next byte hasn't been downloaded yet
+
+            self._hash.update(data)
+            self.position += len(data)
+
+    def _pop_pending(self):
+        block = None
+        for offset in list(self.pending):
+            data = self.pending[offset]
+            if offset + len(data) <= self.position:
+                # Already covered by a disk read or an overlapping block
+                del self.pending[offset]
+                self.buffered -= len(data)
+            elif offset <= self.position and block is None:
+                del self.pending[offset]
+                self.buffered -= len(data)
+                block = memoryview(data)[self.position - offset :]
+
+        return block
+
+    def _read_written(self):
+        for start, end in self.written.ranges:
+            if start <= self.position < end:
+                length = min(download_block_size, end - self.position)
+                self.bytes_reread += length
+                return self.read_at(self.position, length)
+
+        return None
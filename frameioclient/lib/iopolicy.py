@@ -0,0 +1,86 @@
+import enum
+import mmap
+import os
+from typing import Optional
+
+from .logger import SDKLogger
+
+logger = SDKLogger("downloads")
+
+
+class IOPolicy(enum.Enum):
+    """How bulk transfers treat the OS page cache.
+
+    - BUFFERED: Plain buffered I/O, the kernel keeps whatever it likes (default)
+    - DONTNEED: Buffered I/O, but written or read ranges are flushed and \
+        dropped from the cache (POSIX_FADV_DONTNEED) as the transfer goes, \
+        so cold media doesn't push hot data out of memory
+    - DIRECT: Aligned O_DIRECT I/O that bypasses the cache altogether, for \
+        a flat memory footprint on multi-TB runs. Unaligned edges go \
+        through the cache and are dropped when the file is closed
+
+    Policies the platform or filesystem can't do fall back to the next \
+        weaker one (DIRECT -> DONTNEED -> BUFFERED).
+    """
+
+    BUFFERED = "buffered"
+    DONTNEED = "dontneed"
+    DIRECT = "direct"
+
+    @classmethod
+    def resolve(cls, policy: Optional["IOPolicy"]) -> "IOPolicy":
+        policy = cls(policy or cls.BUFFERED)
+
+        if policy == cls.DIRECT and not hasattr(os, "O_DIRECT"):
+            policy = cls.DONTNEED
+        if policy == cls.DONTNEED and not hasattr(os, "posix_fadvise"):
+            policy = cls.BUFFERED
+
+        return policy
+
+
+class PageCache(object):
+    """Small helpers around fadvise and O_DIRECT."""
+
+    @staticmethod
+    def advise_sequential(fd: int):
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    @staticmethod
+    def drop(fd: int, offset: Optional[int] = 0, length: Optional[int] = 0, sync=False):
+        """
+        Evict a range of a file from the page cache (0 length means to the end).
+
+        :param fd: Open file descriptor
+        :param offset: Start of the range
+        :param length: Length of the range
+        :param sync: Flush dirty pages first, only clean pages can be dropped
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return
+
+        if sync:
+            os.fdatasync(fd)
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+
+    @staticmethod
+    def open_direct(path: str, flags: int, mode: Optional[int] = 0o644) -> Optional[int]:
+        """
+        Open a file for O_DIRECT, or return None when the filesystem refuses \
+            (tmpfs, some network mounts).
+
+        :param path: The file to open
+        :param flags: os.open flags, O_DIRECT is added
+        :param mode: Permissions if the file is created
+        """
+        try:
+            return os.open(path, flags | os.O_DIRECT, mode)
+        except OSError as e:
+            logger.info(f"Direct I/O isn't available for {path} ({e})")
+            return None
+
+    @staticmethod
+    def aligned_buffer(size: int) -> mmap.mmap:
+        # Anonymous maps are page aligned, which satisfies O_DIRECT
+        return mmap.mmap(-1, size)
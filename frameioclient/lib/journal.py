@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from .logger import SDKLogger
+
+logger = SDKLogger("downloads")
+
+
+class RangeSet(object):
+    """A sorted set of merged, half-open byte ranges: [start, end)."""
+
+    def __init__(self, ranges: Optional[List[Tuple[int, int]]] = None):
+        self.ranges = list()
+        for start, end in ranges or []:
+            self.add(start, end)
+
+    def add(self, start: int, end: int):
+        """
+        Add [start, end) to the set, merging it with any touching ranges.
+
+        :param start: First byte of the range
+        :param end: One past the last byte of the range
+        """
+        if end <= start:
+            return
+
+        merged = list()
+        for existing_start, existing_end in self.ranges:
+            if existing_end < start or existing_start > end:
+                merged.append((existing_start, existing_end))
+            else:
+                start = min(start, existing_start)
+                end = max(end, existing_end)
+
+        merged.append((start, end))
+        self.ranges = sorted(merged)
+
+    def missing(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Return the gaps of [start, end) that are not in the set.
+
+        :param start: First byte of the range
+        :param end: One past the last byte of the range
+        """
+        gaps = list()
+        cursor = start
+        for existing_start, existing_end in self.ranges:
+            if existing_end <= cursor:
+                continue
+            if existing_start >= end:
+                break
+            if existing_start > cursor:
+                gaps.append((cursor, existing_start))
+            cursor = max(cursor, existing_end)
+
+        if cursor < end:
+            gaps.append((cursor, end))
+
+        return gaps
+
+    def covers(self, start: int, end: int) -> bool:
+        return len(self.missing(start, end)) == 0
+
+    def total(self) -> int:
+        return sum(end - start for start, end in self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __repr__(self):
+        return f"RangeSet({self.ranges})"
+
+
+class RangeJournal(object):
+    """Sidecar journal of the byte ranges already written to a destination.
+
+    The journal lives next to the destination (``<destination>.fiojournal``) \
+        and records the completed ranges along with the ETag they were \
+        fetched against, so an interrupted multi-part download can resume \
+        with only the missing ranges. A journal written for a different \
+        object (ETag or size changed) is thrown away.
+
+    Example::
+        journal = RangeJournal("./downloads/file.mov")
+        completed = journal.load(etag='"abc123"', filesize=1024)
+    """
+
+    suffix = ".fiojournal"
+
+    def __init__(self, destination: str):
+        self.path = destination + self.suffix
+        self.etag = None
+        self.filesize = None
+        self.completed = RangeSet()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def exists(cls, destination: str) -> bool:
+        return os.path.isfile(destination + cls.suffix)
+
+    def load(self, etag: Optional[str], filesize: int) -> RangeSet:
+        """
+        Load the completed ranges for this object, discarding a stale journal.
+
+        :param etag: The ETag of the object about to be downloaded
+        :param filesize: The size of the object about to be downloaded
+        """
+        self.etag = etag
+        self.filesize = filesize
+        self.completed = RangeSet()
+
+        try:
+            with open(self.path, "r") as fp:
+                state = json.load(fp)
+        except (OSError, ValueError):
+            return self.completed
+
+        if etag is None or state.get("etag") != etag or state.get("filesize") != filesize:
+            logger.info("Remote object changed since the last attempt, starting over")
+            self.discard()
+            return self.completed
+
+        self.completed = RangeSet([tuple(r) for r in state.get("completed", [])])
+        return self.completed
+
+    def record(self, start: int, end: int):
+        """
+        Mark [start, end) as written and persist the journal.
+
+        :param start: First byte of the range
+        :param end: One past the last byte of the range
+        """
+        with self._lock:
+            self.completed.add(start, end)
+            self._persist()
+
+    def _persist(self):
+        # Without an ETag we can't tell whether the object changed, so don't resume
+        if self.etag is None:
+            return
+
+        state = {
+            "etag": self.etag,
+            "filesize": self.filesize,
+            "completed": self.completed.ranges,
+        }
+
+        # Write a temp file and swap it in so a crash never leaves half a journal
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(state, fp)
+        os.replace(tmp_path, self.path)
+
+    def discard(self):
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
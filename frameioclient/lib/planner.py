@@ -0,0 +1,122 @@
+import math
+from typing import List, NamedTuple, Optional
+
+from .constants import default_thread_count
+from .utils import MB
+
+
+class ByteRange(NamedTuple):
+    """An inclusive byte range, the same way an HTTP Range header spells it."""
+
+    start: int
+    end: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    def header(self) -> str:
+        return "bytes=%d-%d" % (self.start, self.end)
+
+
+class ChunkPlan(object):
+    """The non-overlapping ranges a multi-part download will request.
+
+    Example::
+        plan = ChunkPlanner().plan(filesize=10 * GB, rtt=0.08, concurrency=8)
+        plan.chunk_size, plan.chunks, plan.ranges[0]
+    """
+
+    def __init__(
+        self,
+        filesize: int,
+        chunk_size: int,
+        ranges: List[ByteRange],
+        rtt: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.filesize = filesize
+        self.chunk_size = chunk_size
+        self.ranges = ranges
+        self.rtt = rtt
+        self.concurrency = concurrency
+
+    @property
+    def chunks(self) -> int:
+        return len(self.ranges)
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __repr__(self):
+        return f"ChunkPlan(filesize={self.filesize}, chunk_size={self.chunk_size}, chunks={self.chunks})"
+
+
+class ChunkPlanner(object):
+    """Pick a range size from the file size, round-trip time and concurrency.
+
+    - Aim for ``ranges_per_worker`` ranges per worker so the adaptive \
+        controller has work to hand out when it adds workers
+    - Never go below what a connection can move in ``rtt_budget`` round \
+        trips, so per-request latency stays a small fraction of each range
+    - Clamp to [min_chunk_size, max_chunk_size] and align to 1 MB
+    - Fold a tail smaller than ``tail_ratio`` of a chunk into the previous range
+
+    Example::
+        ChunkPlanner().plan(asset["filesize"], rtt=0.05, concurrency=5)
+    """
+
+    min_chunk_size = 8 * MB
+    max_chunk_size = 256 * MB
+    alignment = MB
+    ranges_per_worker = 4
+    rtt_budget = 20
+    connection_rate = 8 * MB  # Conservative per-connection bytes/sec
+    tail_ratio = 0.5
+
+    def plan(
+        self,
+        filesize: int,
+        rtt: Optional[float] = None,
+        concurrency: Optional[int] = default_thread_count,
+    ) -> ChunkPlan:
+        """
+        Build the chunk plan for a download.
+
+        :param filesize: Size of the object in bytes
+        :param rtt: Measured round-trip time to the CDN in seconds
+        :param concurrency: Number of range workers we expect to run
+        """
+        chunk_size = self.chunk_size(filesize, rtt, concurrency)
+
+        ranges = list()
+        for start in range(0, filesize, chunk_size):
+            end = min(start + chunk_size, filesize) - 1
+            ranges.append(ByteRange(start, end))
+
+        # Merge a tiny tail into the range before it
+        if len(ranges) > 1 and ranges[-1].length < chunk_size * self.tail_ratio:
+            tail = ranges.pop()
+            ranges[-1] = ByteRange(ranges[-1].start, tail.end)
+
+        return ChunkPlan(filesize, chunk_size, ranges, rtt, concurrency)
+
+    def chunk_size(
+        self,
+        filesize: int,
+        rtt: Optional[float] = None,
+        concurrency: Optional[int] = default_thread_count,
+    ) -> int:
+        target = math.ceil(filesize / max(1, concurrency * self.ranges_per_worker))
+
+        floor = self.min_chunk_size
+        if rtt:
+            floor = max(floor, int(rtt * self.rtt_budget * self.connection_rate))
+
+        chunk_size = max(floor, min(target, self.max_chunk_size))
+        chunk_size = math.ceil(chunk_size / self.alignment) * self.alignment
+
+        return max(1, min(chunk_size, filesize))
@@ -0,0 +1,155 @@
+import threading
+from typing import Callable, Dict, Optional
+
+import requests
+
+from .logger import SDKLogger
+
+logger = SDKLogger("transfers")
+
+
+class PresignedUrls(object):
+    """Keeps the presigned URLs of a long-running transfer fresh.
+
+    When a range or part comes back with an expiry response, the asset is \
+        fetched again (``client.assets.get``) and every URL it holds is \
+        swapped for the one at the same place in the new asset: \
+        ``original``, the renditions in ``downloads`` and each entry of \
+        ``upload_urls``. Workers map the URLs of their tasks through \
+        current() before every attempt, so queued ranges and parts pick up \
+        the new URLs too. Many workers hitting the expiry at once cause a \
+        single fetch.
+
+    Example::
+        urls = PresignedUrls(asset, lambda: client.assets.get(asset["id"]))
+        url = urls.refresh(url)
+    """
+
+    def __init__(self, asset: Dict, fetch: Callable[[], Dict]):
+        """
+        :param asset: The asset whose URLs are being used, updated in place
+        :param fetch: Returns a freshly fetched copy of the asset
+        """
+        self.asset = asset
+        self.fetch = fetch
+        self.refreshes = 0
+        self._renamed = dict()  # Stale URL -> its replacement
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_expired(response: Optional[requests.Response]) -> bool:
+        """
+        Whether a failed response looks like the signature ran out. S3 says \
+            "Request has expired" with a 403 (or 400 for expired tokens), \
+            CloudFront only says "Access denied".
+
+        :param response: The failed response
+        """
+        if response is None:
+            return False
+        if response.status_code != 400:
+            return PresignedUrls.is_expired_status(response.status_code)
+
+        try:
+            text = response.text
+        except Exception:
+            return False
+        return PresignedUrls.is_expired_status(400, text)
+
+    @staticmethod
+    def is_expired_status(status: int, body: Optional[str] = "") -> bool:
+        """
+        is_expired() for clients that aren't requests (aiohttp).
+
+        :param status: HTTP status of the failed response
+        :param body: Its body, only looked at for a 400
+        """
+        if status == 403:
+            return True
+
+        return status == 400 and "expired" in (body or "").lower()
+
+    def current(self, url: str) -> str:
+        """
+        The latest URL for one that may have been replaced.
+
+        :param url: A URL taken from the asset at any point
+        """
+        with self._lock:
+            while url in self._renamed:
+                url = self._renamed[url]
+
+        return url
+
+    def refresh(self, url: str) -> str:
+        """
+        Replace an expired URL, returning it unchanged if the asset has \
+            nothing newer for that spot.
+
+        :param url: The URL that just failed
+        """
+        with self._lock:
+            # Someone else already replaced it while we were failing
+            if url in self._renamed:
+                while url in self._renamed:
+                    url = self._renamed[url]
+                return url
+
+            spot = PresignedUrls._locate(self.asset, url)
+            if spot is None:
+                return url
+
+            fresh_asset = self.fetch()
+            fresh = PresignedUrls._lookup(fresh_asset, spot)
+            if not fresh or fresh == url:
+                return url
+
+            # Every URL of the asset was signed at the same time, so swap them all at once
+            for other_spot, stale in list(PresignedUrls._spots(self.asset)):
+                replacement = PresignedUrls._lookup(fresh_asset, other_spot)
+                if replacement and isinstance(replacement, str) and replacement != stale:
+                    self._renamed[stale] = replacement
+                    PresignedUrls._store(self.asset, other_spot, replacement)
+            self.refreshes += 1
+
+        logger.info("Refreshed an expired transfer URL")
+        return fresh
+
+    @staticmethod
+    def _spots(asset: Dict):
+        # Every URL in the asset with where it lives: a top level key, a rendition or an upload part
+        for key, value in asset.items():
+            if isinstance(value, str) and value.startswith("http"):
+                yield (key,), value
+
+        for key, value in (asset.get("downloads") or {}).items():
+            if isinstance(value, str):
+                yield ("downloads", key), value
+
+        for index, value in enumerate(asset.get("upload_urls") or []):
+            yield ("upload_urls", index), value
+
+    @staticmethod
+    def _locate(asset: Dict, url: str):
+        for spot, value in PresignedUrls._spots(asset):
+            if value == url:
+                return spot
+
+        return None
+
+    @staticmethod
+    def _lookup(asset: Dict, spot) -> Optional[str]:
+        try:
+            value = asset
+            for step in spot:
+                value = value[step]
+            return value
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    @staticmethod
+    def _store(asset: Dict, spot, url: str):
+        container = asset
+        for step in spot[:-1]:
+            container = container[step]
+        container[spot[-1]] = url
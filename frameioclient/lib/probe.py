@@ -0,0 +1,149 @@
+import concurrent.futures
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from token_bucket import Limiter, MemoryStorage
+
+from .bandwidth import BandwidthLimiter
+from .constants import download_block_size
+from .exceptions import DownloadException
+from .transport import TransferSessionPool
+from .utils import KB
+
+
+class HeaderProber(object):
+    """Fetch the same byte range (container headers, usually) from many assets.
+
+    Ranged GETs run on a thread pool over the shared transfer connection \
+        pool. Requests per second can be capped and bytes count against the \
+        process-wide BandwidthLimiter. Assets are consumed lazily and results \
+        come back as soon as each request finishes, so a 10k asset project \
+        streams through in bounded memory.
+
+    A failure is returned as the exception for that asset instead of \
+        stopping the whole run.
+
+    Example::
+        prober = HeaderProber(length=512 * KB, concurrency=64)
+        for asset_id, data in prober.probe(assets):
+            if isinstance(data, Exception):
+                continue
+            parse_moov(data)
+    """
+
+    key = "probes"
+
+    def __init__(
+        self,
+        length: Optional[int] = 256 * KB,
+        offset: Optional[int] = 0,
+        concurrency: Optional[int] = 64,
+        requests_per_second: Optional[float] = None,
+    ):
+        """
+        :param length: Number of bytes to fetch from each asset
+        :param offset: First byte to fetch
+        :param concurrency: Requests in flight
+        :param requests_per_second: Cap on new requests per second, None for no cap
+        """
+        self.length = length
+        self.offset = offset
+        self.concurrency = max(1, concurrency)
+        self.requests_per_second = requests_per_second
+        self.limiter = BandwidthLimiter.shared()
+
+        self._request_limiter = None
+        if requests_per_second:
+            self._request_limiter = Limiter(
+                requests_per_second, max(1, int(requests_per_second)), MemoryStorage()
+            )
+        self._lock = threading.Lock()
+
+    def probe(
+        self, assets: Iterable[Dict]
+    ) -> Iterator[Tuple[str, Union[bytes, Exception]]]:
+        """
+        Yield (asset_id, bytes) for every file, in completion order.
+
+        :param assets: Asset dicts, anything that isn't a file is skipped
+        """
+        TransferSessionPool.ensure_capacity(self.concurrency)
+        files = (asset for asset in assets if asset.get("_type", "file") == "file")
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.concurrency
+        ) as executor:
+            futures = dict()
+
+            # Keep a couple of requests queued per worker, never the whole project
+            for asset in files:
+                futures[executor.submit(self.fetch, asset)] = asset["id"]
+                if len(futures) < 2 * self.concurrency:
+                    continue
+
+                done, _ = concurrent.futures.wait(
+                    list(futures), return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield self._result(futures.pop(future), future)
+
+            for future in concurrent.futures.as_completed(list(futures)):
+                yield self._result(futures.pop(future), future)
+
+    @staticmethod
+    def _result(asset_id: str, future) -> Tuple[str, Union[bytes, Exception]]:
+        try:
+            return (asset_id, future.result())
+        except Exception as e:
+            return (asset_id, e)
+
+    def fetch(self, asset: Dict) -> bytes:
+        """
+        Fetch the configured range of one asset's original.
+
+        :param asset: The asset object
+        """
+        url = asset.get("original")
+        if not url:
+            raise DownloadException(message="This asset has no original to probe.")
+
+        if self.length <= 0:
+            return b""
+
+        self._throttle()
+
+        end_byte = self.offset + self.length - 1
+        headers = {"Range": "bytes=%d-%d" % (self.offset, end_byte)}
+
+        session = TransferSessionPool.get_session()
+        with session.get(url, headers=headers, stream=True) as r:
+            if r.status_code == 416:
+                return b""  # The file is shorter than the offset
+            r.raise_for_status()
+
+            # A server that ignores the range sends everything, skip to the offset
+            skip = self.offset if r.status_code == 200 else 0
+            data = bytearray()
+            for block in r.iter_content(chunk_size=min(self.length, download_block_size)):
+                if skip:
+                    dropped = min(skip, len(block))
+                    block = block[dropped:]
+                    skip -= dropped
+
+                data += block[: self.length - len(data)]
+                if len(data) >= self.length:
+                    break
+
+        self.limiter.consume(len(data))
+        return bytes(data)
+
+    def _throttle(self):
+        if self._request_limiter is None:
+            return
+
+        while True:
+            with self._lock:
+                if self._request_limiter.consume(self.key):
+                    return
+            time.sleep(1 / self.requests_per_second)
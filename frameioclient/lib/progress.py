@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+
+class TransferProgress(object):
+    """Thread-safe progress and metrics for a single transfer.
+
+    Every worker thread counts into its own slot, so updating a counter \
+        never takes a lock; slots are only summed when someone reads. On top \
+        of the counters sit a throughput sampler (a short ring of \
+        (time, bytes) samples) and subscriber callbacks that fire at most \
+        once per ``interval``, which keeps polling thousands of transfers \
+        cheap and the terminal quiet.
+
+    Counters used by the transfer engines:
+
+    - bytes_started: Bytes handed to range workers
+    - bytes_written: Bytes that reached the destination, drives rate and ETA
+    - bytes_completed: Bytes of ranges (or parts) that finished
+    - ranges_completed, retries, hedges: Event counts
+
+    Example::
+        progress = downloader.progress
+        progress.subscribe(lambda snapshot: print(snapshot["percent"]))
+        progress.snapshot()["rate"]
+    """
+
+    progress_counter = "bytes_written"
+
+    def __init__(
+        self,
+        total: Optional[int] = None,
+        interval: Optional[float] = 0.5,
+        samples: Optional[int] = 20,
+    ):
+        """
+        :param total: Number of bytes the transfer will move, if known
+        :param interval: Minimum seconds between samples and subscriber callbacks
+        :param samples: Number of samples the throughput is averaged over
+        """
+        self.total = total
+        self.interval = interval
+        self.started = time.time()
+        self.finished = None
+        self.subscribers = list()
+        self.samples = deque([(time.monotonic(), 0)], maxlen=max(2, samples))
+
+        self._slots = list()  # One dict of counters per thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._next_tick = time.monotonic() + interval
+
+    def add(self, counter: str, amount: Optional[int] = 1):
+        """
+        Bump a counter from any thread.
+
+        :param counter: Name of the counter, e.g. 'bytes_written'
+        :param amount: How much to add
+        """
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            slot = self._local.slot = dict()
+            with self._lock:
+                self._slots.append(slot)
+
+        # Only this thread ever writes to its slot
+        slot[counter] = slot.get(counter, 0) + amount
+
+        if time.monotonic() >= self._next_tick:
+            self._tick()
+
+    def get(self, counter: str) -> int:
+        """
+        Current value of a counter, summed over every worker.
+
+        :param counter: Name of the counter
+        """
+        with self._lock:
+            slots = list(self._slots)
+
+        return sum(slot.get(counter, 0) for slot in slots)
+
+    def counters(self) -> Dict:
+        with self._lock:
+            slots = list(self._slots)
+
+        totals = dict()
+        for slot in slots:
+            for counter, value in list(slot.items()):
+                totals[counter] = totals.get(counter, 0) + value
+
+        return totals
+
+    def rate(self) -> float:
+        """Bytes per second over the sampling window."""
+        if self.finished is not None:
+            return self.get(self.progress_counter) / max(self.finished - self.started, 0.001)
+
+        (first_time, first_bytes) = self.samples[0]
+        now = time.monotonic()
+        elapsed = now - first_time
+        if elapsed <= 0:
+            return 0.0
+
+        return (self.get(self.progress_counter) - first_bytes) / elapsed
+
+    def snapshot(self) -> Dict:
+        """Everything a progress bar or dashboard needs, as a plain dict."""
+        counters = self.counters()
+        done = counters.get(self.progress_counter, 0)
+        rate = self.rate()
+
+        percent = None
+        eta = None
+        if self.total:
+            percent = round(min(done / self.total, 1.0) * 100, 2)
+            if rate > 0:
+                eta = max(self.total - done, 0) / rate
+
+        return {
+            **counters,
+            "total": self.total,
+            "percent": percent,
+            "rate": rate,
+            "eta": eta,
+            "elapsed": (self.finished or time.time()) - self.started,
+            "finished": self.finished is not None,
+        }
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """
+        Call back with a snapshot at most once per interval, and once at the end.
+
+        :param callback: Called with the snapshot dict
+        """
+        self.subscribers.append(callback)
+
+    def finish(self):
+        """Mark the transfer as done and send subscribers the final snapshot."""
+        if self.finished is not None:
+            return
+
+        self.finished = time.time()
+        self._notify(self.snapshot())
+
+    def _tick(self):
+        # Whoever gets the lock samples, everyone else just keeps going
+        if not self._lock.acquire(blocking=False):
+            return
+
+        try:
+            now = time.monotonic()
+            if now < self._next_tick:
+                return
+            self._next_tick = now + self.interval
+        finally:
+            self._lock.release()
+
+        self.samples.append((now, self.get(self.progress_counter)))
+        if self.subscribers:
+            self._notify(self.snapshot())
+
+    def _notify(self, snapshot: Dict):
+        for callback in list(self.subscribers):
+            callback(snapshot)
@@ -0,0 +1,198 @@
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+from .bandwidth import BandwidthLimiter
+from .constants import download_block_size
+from .exceptions import DownloadException
+from .transport import TransferSessionPool
+from .utils import Utils
+
+
+class FrameioRemoteFile(io.RawIOBase):
+    """Read-only, seekable file object over an asset's original.
+
+    Reads are served from an LRU cache of fixed-size blocks, and missing \
+        blocks are fetched with range requests on the shared transfer \
+        connection pool. Sequential reads grow a read-ahead window so \
+        streaming through a file costs a handful of requests, while random \
+        access (parsing MOV atoms, MXF partitions) only touches the blocks \
+        it actually reads.
+
+    Example::
+        with FrameioRemoteFile(asset) as remote:
+            remote.seek(-1024, io.SEEK_END)
+            footer = remote.read(1024)
+
+        # Wrap it for small buffered reads
+        reader = io.BufferedReader(FrameioRemoteFile(asset))
+    """
+
+    def __init__(
+        self,
+        asset: Union[Dict, str],
+        block_size: Optional[int] = download_block_size,
+        cache_blocks: Optional[int] = 64,
+        read_ahead: Optional[int] = 8,
+    ):
+        """
+        :param asset: An asset dict, or the URL of the object to read
+        :param block_size: Size of the blocks that are fetched and cached
+        :param cache_blocks: Maximum number of blocks kept in memory
+        :param read_ahead: Maximum number of extra blocks fetched on sequential reads
+        """
+        super().__init__()
+
+        if isinstance(asset, dict):
+            self.url = asset.get("original")
+            self.size = asset.get("filesize")
+            self.name = asset.get("name")
+        else:
+            self.url = asset
+            self.size = None
+            self.name = None
+
+        if not self.url:
+            raise DownloadException(message="This asset has no original to read from.")
+
+        self.block_size = block_size
+        self.cache_blocks = max(1, cache_blocks)
+        self.read_ahead = max(0, min(read_ahead, self.cache_blocks - 1))
+        self.etag = None
+        self.position = 0
+
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_fetched = 0
+
+        self._cache = OrderedDict()  # block index -> bytes, oldest first
+        self._last_block = None
+        self._ahead = 0
+        self._lock = threading.Lock()
+        self.limiter = BandwidthLimiter.shared()
+
+        # Learn the size and pin the version we are reading
+        if self.size != 0:
+            self._fetch(0, 0 if self.size is None else min(self.block_size, self.size) - 1)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+
+        self.position = position
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+        view = memoryview(buffer).cast("B")
+        want = min(len(view), max(0, self.size - self.position))
+        filled = 0
+
+        with self._lock:
+            while filled < want:
+                offset = self.position + filled
+                index = offset // self.block_size
+                block = self._get_block(index, self.position + want - 1)
+
+                start = offset - index * self.block_size
+                length = min(len(block) - start, want - filled)
+                view[filled : filled + length] = block[start : start + length]
+                filled += length
+
+        self.position += filled
+        return filled
+
+    def close(self):
+        self._cache.clear()
+        super().close()
+
+    def _get_block(self, index: int, last_byte: int) -> bytes:
+        if index in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(index)
+            self._last_block = index
+            return self._cache[index]
+
+        self.misses += 1
+
+        # Grow the read-ahead window while access stays sequential
+        if self._last_block is not None and index == self._last_block + 1:
+            self._ahead = min(max(1, self._ahead * 2), self.read_ahead)
+        else:
+            self._ahead = 0
+
+        # One request for every missing block up to the end of the read plus read-ahead
+        last = min(
+            last_byte // self.block_size + self._ahead,
+            index + self.cache_blocks - 1,
+            (self.size - 1) // self.block_size,
+        )
+        end = index
+        while end < last and end + 1 not in self._cache:
+            end += 1
+
+        self._fetch(
+            index * self.block_size, min((end + 1) * self.block_size, self.size) - 1
+        )
+        self._last_block = index
+
+        return self._cache[index]
+
+    def _fetch(self, start_byte: int, end_byte: int):
+        headers = {"Range": "bytes=%d-%d" % (start_byte, end_byte)}
+
+        session = TransferSessionPool.get_session()
+        r = session.get(self.url, headers=headers)
+        r.raise_for_status()
+        self.requests += 1
+
+        if r.status_code != 206:
+            raise DownloadException(message="Server ignored the range request.")
+
+        if self.size is None:
+            self.size = Utils.content_size(r.status_code, r.headers)
+        if self.size is None:
+            raise DownloadException(message="Unable to determine the size of the remote file.")
+
+        etag = r.headers.get("ETag")
+        if self.etag is None:
+            self.etag = etag
+        elif etag and etag != self.etag:
+            raise DownloadException(message="The remote file changed while reading it.")
+
+        data = r.content
+        self.bytes_fetched += len(data)
+        self.limiter.consume(len(data))
+
+        # Cache whole blocks only, a partial first probe is simply dropped
+        for offset in range(0, len(data), self.block_size):
+            block = data[offset : offset + self.block_size]
+            index = (start_byte + offset) // self.block_size
+            if len(block) == self.block_size or start_byte + offset + len(block) == self.size:
+                self._cache[index] = block
+                self._cache.move_to_end(index)
+
+        while len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
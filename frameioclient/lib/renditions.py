@@ -0,0 +1,178 @@
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from .exceptions import DownloadException
+from .transport import TransferSessionPool
+from .utils import MB, Utils
+
+
+class Rendition(NamedTuple):
+    """One downloadable version of an asset."""
+
+    key: str
+    url: str
+    height: Optional[int]  # None when unknown (usually the original)
+    size: Optional[int] = None
+
+
+class RenditionSelector(object):
+    """Pick which version of an asset to download: the original, an \
+        ``h264_*`` rendition or a proxy.
+
+    - With no constraints: the original if there is one, otherwise the \
+        highest resolution rendition
+    - ``min_height`` only: the smallest rendition at or above that height
+    - ``max_size`` or ``max_seconds``: the best version that fits the \
+        budget (and ``min_height``), where seconds are converted to bytes \
+        with ``bandwidth`` or, when omitted, a short measured transfer
+
+    Sizes of renditions aren't part of the asset, so they are probed with \
+        a one byte range request when a budget needs them.
+
+    Example::
+        selector = RenditionSelector(min_height=720, max_seconds=600)
+        url = selector.select(asset).url
+    """
+
+    sample_size = 8 * MB  # Bytes fetched to measure bandwidth
+
+    def __init__(
+        self,
+        min_height: Optional[int] = None,
+        max_size: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        bandwidth: Optional[float] = None,
+    ):
+        """
+        :param min_height: Lowest acceptable vertical resolution, e.g. 720
+        :param max_size: Largest acceptable download in bytes
+        :param max_seconds: Longest acceptable download time
+        :param bandwidth: Bytes per second to assume for max_seconds, measured if omitted
+        """
+        self.min_height = min_height
+        self.max_size = max_size
+        self.max_seconds = max_seconds
+        self.bandwidth = bandwidth
+
+    @staticmethod
+    def candidates(asset: Dict) -> List[Rendition]:
+        """
+        Every version of the asset that has a URL, best first.
+
+        :param asset: The asset object
+        """
+        found = dict()
+
+        if asset.get("original"):
+            found["original"] = Rendition(
+                "original",
+                asset["original"],
+                (asset.get("transcodes") or {}).get("original_height"),
+                asset.get("filesize"),
+            )
+
+        # Renditions show up both in the downloads map and on the asset itself
+        sources = dict(asset.get("downloads") or {})
+        for key, url in asset.items():
+            if key.startswith("h264_") or key == "proxy":
+                sources.setdefault(key, url)
+
+        for key, url in sources.items():
+            if not url or not isinstance(url, str):
+                continue
+
+            match = re.match(r"h264_(\d+)", key)
+            if match:
+                found[key] = Rendition(key, url, int(match.group(1)))
+            elif key == "proxy":
+                found[key] = Rendition(key, url, None)
+
+        def quality(rendition: Rendition):
+            # The original beats everything, then higher resolutions, then '_best' variants
+            return (
+                rendition.key == "original",
+                rendition.height or 0,
+                rendition.key.endswith("_best"),
+            )
+
+        return sorted(found.values(), key=quality, reverse=True)
+
+    def select(self, asset: Dict) -> Rendition:
+        """
+        Choose the rendition to download.
+
+        :param asset: The asset object
+        """
+        candidates = RenditionSelector.candidates(asset)
+        if not candidates:
+            raise DownloadException(message="This asset has no downloadable renditions.")
+
+        if self.min_height:
+            candidates = [
+                c
+                for c in candidates
+                if (c.key == "original" and c.height is None)
+                or (c.height or 0) >= self.min_height
+            ]
+            if not candidates:
+                raise DownloadException(
+                    message=f"No rendition of at least {self.min_height}p is available."
+                )
+
+        budget = self.budget(candidates)
+        if budget is None:
+            # Smallest acceptable one when asked for a minimum, the best one otherwise
+            return candidates[-1] if self.min_height else candidates[0]
+
+        for candidate in candidates:
+            size = candidate.size
+            if size is None:
+                size = self.probe_size(candidate.url)
+            if size is not None and size <= budget:
+                return candidate._replace(size=size)
+
+        raise DownloadException(message="No rendition fits the size or time budget.")
+
+    def budget(self, candidates: List[Rendition]) -> Optional[float]:
+        """Maximum number of bytes we may download, None for no limit."""
+        limits = list()
+        if self.max_size is not None:
+            limits.append(self.max_size)
+
+        if self.max_seconds is not None:
+            bandwidth = self.bandwidth
+            if bandwidth is None:
+                # Measure against the smallest candidate, the cheapest one to sample
+                bandwidth = self.measure_bandwidth(candidates[-1].url)
+            limits.append(bandwidth * self.max_seconds)
+
+        return min(limits) if limits else None
+
+    @staticmethod
+    def probe_size(url: str) -> Optional[int]:
+        """
+        Learn the size of a rendition from a one byte range request.
+
+        :param url: The rendition's URL
+        """
+        session = TransferSessionPool.get_session()
+        with session.get(url, headers={"Range": "bytes=0-0"}, stream=True) as r:
+            r.raise_for_status()
+            return Utils.content_size(r.status_code, r.headers)
+
+    def measure_bandwidth(self, url: str) -> float:
+        """
+        Bytes per second over one connection, from a short ranged download.
+
+        :param url: Any URL on the CDN that will serve the download
+        """
+        session = TransferSessionPool.get_session()
+        headers = {"Range": "bytes=0-%d" % (self.sample_size - 1)}
+
+        start_time = time.time()
+        with session.get(url, headers=headers, stream=True) as r:
+            r.raise_for_status()
+            received = sum(len(block) for block in r.iter_content(chunk_size=MB))
+
+        return received / max(time.time() - start_time, 0.001)
@@ -0,0 +1,342 @@
+import concurrent.futures
+import os
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+from .concurrency import AdaptiveConcurrency
+from .constants import max_download_concurrency
+from .journal import RangeJournal
+from .logger import SDKLogger
+from .planner import ChunkPlanner
+from .transfer import AWSClient, FrameioDownloader
+from .transport import TransferSessionPool
+from .utils import FormatTypes, Utils
+
+logger = SDKLogger("downloads")
+
+
+class ScheduledDownload(object):
+    """Scheduler bookkeeping for a single asset."""
+
+    def __init__(self, downloader: FrameioDownloader, small: bool):
+        self.downloader = downloader
+        self.small = small
+        self.client = None
+        self.tasks = None  # Range tasks still to submit, None until prepared
+        self.whole = False  # Downloaded in one piece (cache hit or single stream)
+        self.cacheable = False
+        self.starting = False
+        self.finishing = False
+        self.in_flight = 0
+        self.done = False
+        self.result = None
+
+    @property
+    def exhausted(self) -> bool:
+        # Nothing left to hand out, though ranges may still be running
+        return self.done or self.finishing or (self.tasks is not None and not self.tasks)
+
+
+class DownloadScheduler(object):
+    """Download many assets through one shared pool of range workers.
+
+    Instead of one AWSClient and thread pool per file, every asset's ranges \
+        are fed into a single pool sized by one connection budget (adaptive \
+        by default). Ordering aims at a short makespan:
+
+    - Large files are started first (longest processing time first), and \
+        their ranges soak up most of the budget
+    - A share of the slots (``small_file_share``) is reserved for small, \
+        latency-bound files, smallest first, so they are packed in between \
+        the big transfers instead of all waiting until the end
+    - Whenever a file runs out of ranges, its idle slots go straight to the \
+        next file in line
+
+    Files with the same checksum and size (copies in several folders or \
+        version stacks) are transferred once, and the other paths are \
+        linked or copied from it locally (``deduplicate``).
+
+    Example::
+        DownloadScheduler(downloaders).run()
+    """
+
+    def __init__(
+        self,
+        downloaders: List[FrameioDownloader],
+        concurrency: Optional[int] = None,
+        small_file_share: Optional[float] = 0.25,
+        deduplicate: Optional[bool] = True,
+        link_modes: Optional[Tuple] = ("reflink", "hardlink", "copy"),
+    ):
+        """
+        :param downloaders: FrameioDownloader objects to download
+        :param concurrency: Fixed connection budget, adaptive when omitted
+        :param small_file_share: Fraction of the budget reserved for small files
+        :param deduplicate: Transfer identical files once and materialize the copies locally
+        :param link_modes: How copies are materialized, see Utils.link_or_copy
+        """
+        self.small_file_share = small_file_share
+        self.link_modes = link_modes
+        self.concurrency = concurrency
+        self.controller = None
+        if concurrency is None:
+            self.controller = AdaptiveConcurrency(maximum=max_download_concurrency)
+
+        self.jobs = list()
+        self.entries = list()  # One job, or (downloader, job), per downloader in order
+        unique = dict()
+
+        for downloader in downloaders:
+            key = DownloadScheduler.content_key(downloader) if deduplicate else None
+            if key is not None and key in unique:
+                self.entries.append((downloader, unique[key]))
+                continue
+
+            job = ScheduledDownload(
+                downloader, small=downloader.filesize <= ChunkPlanner.min_chunk_size
+            )
+            if key is not None:
+                unique[key] = job
+            self.jobs.append(job)
+            self.entries.append(job)
+
+        # Largest first for the big queue, smallest first for the small one
+        by_size = sorted(self.jobs, key=lambda job: job.downloader.filesize, reverse=True)
+        self.large = deque(job for job in by_size if not job.small)
+        self.small = deque(job for job in reversed(by_size) if job.small)
+        self.small_in_flight = 0
+
+    @staticmethod
+    def content_key(downloader: FrameioDownloader) -> Optional[Tuple]:
+        # Watermarked assets and renditions aren't the bytes the checksum describes
+        if (
+            downloader.original_checksum is None
+            or downloader.watermarked == True
+            or downloader.rendition is not None
+        ):
+            return None
+
+        return (downloader.original_checksum, downloader.filesize)
+
+    @property
+    def budget(self) -> int:
+        return self.controller.limit if self.controller else self.concurrency
+
+    def _start(self, job: ScheduledDownload):
+        downloader = job.downloader
+        job.client = AWSClient(downloader, concurrency=self.budget)
+        job.client.controller = self.controller  # One controller for the whole pool
+
+        # The same URL, cache and path choices as FrameioDownloader.download()
+        url = downloader.get_download_key()
+        job.cacheable = downloader._cacheable(url)
+        if job.cacheable:
+            cached = downloader._download_from_cache()
+            if cached is not None:
+                job.whole = True
+                return cached
+
+        # Watermarked streams and renditions can't be split, they take one slot as a unit
+        if not downloader.ranged(url):
+            job.whole = True
+            return job.client._download_whole(url)
+
+        return job.client._prepare(url, job.client._probe(url))
+
+    def _finish(self, job: ScheduledDownload):
+        result = job.client._finalize()
+
+        if job.cacheable:
+            job.downloader._store_in_cache()
+            if isinstance(result, dict):
+                result.update(job.downloader.cache.stats(), cache="miss")
+
+        return result
+
+    def _next_unit(self, queue: deque):
+        # Drop the files at the front that have nothing left to hand out
+        while queue and queue[0].exhausted:
+            queue.popleft()
+
+        for job in queue:
+            if job.done or job.starting or job.finishing:
+                continue
+            if job.tasks is None:
+                return ("start", job, None)
+            if job.tasks:
+                return ("range", job, job.tasks.popleft())
+
+        return None
+
+    def _pick(self):
+        small_slots = int(self.budget * self.small_file_share)
+        if self.small_in_flight < small_slots:
+            order = (self.small, self.large)
+        else:
+            order = (self.large, self.small)
+
+        for queue in order:
+            unit = self._next_unit(queue)
+            if unit:
+                return unit
+
+        return None
+
+    def _submit(self, executor, futures, unit):
+        kind, job, task = unit
+
+        if kind == "start":
+            job.starting = True
+            future = executor.submit(self._start, job)
+        elif kind == "range":
+            future = executor.submit(job.client._download_chunk, task)
+            job.client.peak_concurrency = max(
+                job.client.peak_concurrency, job.in_flight + 1
+            )
+        else:
+            job.finishing = True
+            future = executor.submit(self._finish, job)
+
+        if kind != "finish":
+            job.in_flight += 1
+            if job.small:
+                self.small_in_flight += 1
+
+        futures[future] = unit
+
+    def _collect(self, executor, futures, future):
+        kind, job, task = futures.pop(future)
+
+        if kind != "finish":
+            job.in_flight -= 1
+            if job.small:
+                self.small_in_flight -= 1
+
+        try:
+            result = future.result()
+        except Exception as exc:
+            if kind == "range":
+                job.client._echo(exc)
+                if self.controller:
+                    self.controller.record_error()
+            else:
+                # Preparing or verifying this file failed, report it and move on
+                job.done = True
+                job.result = exc
+                if job.client and job.client.writer and kind == "start":
+                    job.client.writer.close()
+                return
+
+        if kind == "start" and job.whole:
+            job.done = True
+            job.result = result
+            return
+        elif kind == "start":
+            job.starting = False
+            job.tasks = result
+        elif kind == "finish":
+            job.done = True
+            job.result = result
+
+        # Verify the file as soon as its last range lands
+        if job.tasks is not None and not job.tasks and job.in_flight == 0:
+            if not job.finishing and not job.done:
+                self._submit(executor, futures, ("finish", job, None))
+
+    def run(self) -> List:
+        """
+        Download every asset and return one entry per downloader, in order: \
+            the same value multi_thread_download would return, or the \
+            exception that stopped that asset.
+        """
+        start_time = time.time()
+        total_bytes = 0
+
+        for job in self.jobs:
+            if not job.downloader._prepare_destination():
+                job.done = True
+                job.result = job.downloader.destination
+            else:
+                total_bytes += job.downloader.filesize
+
+        if self.controller:
+            self.controller.start()
+
+        max_workers = self.controller.maximum if self.controller else self.concurrency
+        TransferSessionPool.ensure_capacity(max_workers)
+        futures = dict()
+
+        # Extra threads so verifying finished files never starves the transfers
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers + 4) as executor:
+            while True:
+                while (
+                    sum(1 for unit in futures.values() if unit[0] != "finish")
+                    < self.budget
+                ):
+                    unit = self._pick()
+                    if unit is None:
+                        break
+                    self._submit(executor, futures, unit)
+
+                if not futures:
+                    break
+
+                if self.controller:
+                    self.controller.set_active(len(futures))
+
+                done, _ = concurrent.futures.wait(
+                    list(futures),
+                    timeout=self.controller.interval if self.controller else None,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+
+                for future in done:
+                    self._collect(executor, futures, future)
+
+        elapsed = max(time.time() - start_time, 0.001)
+        logger.info(
+            f"Downloaded {len(self.jobs)} assets, {Utils.format_value(total_bytes, type=FormatTypes.SIZE)} at {Utils.format_value(total_bytes / elapsed, type=FormatTypes.SPEED)}"
+        )
+
+        results = list()
+        for entry in self.entries:
+            if isinstance(entry, ScheduledDownload):
+                results.append(entry.result)
+            else:
+                results.append(self._materialize(*entry))
+
+        return results
+
+    def _materialize(self, downloader: FrameioDownloader, job: ScheduledDownload):
+        # Give a duplicate the bytes its twin just downloaded
+        if isinstance(job.result, Exception):
+            return job.result
+
+        if not downloader._prepare_destination():
+            return downloader.destination
+
+        # Whatever an interrupted attempt left behind is replaced as a whole
+        if os.path.exists(downloader.destination):
+            os.remove(downloader.destination)
+        if RangeJournal.exists(downloader.destination):
+            RangeJournal(downloader.destination).discard()
+
+        source = job.downloader.destination
+        try:
+            mode = Utils.link_or_copy(source, downloader.destination, self.link_modes)
+        except OSError as e:
+            return e
+
+        downloader.checksum = job.downloader.checksum
+        logger.info(f"Materialized {downloader.destination} from {source} ({mode})")
+
+        if not downloader.stats:
+            return downloader.destination
+
+        return {
+            "destination": downloader.destination,
+            "size": downloader.filesize,
+            "duplicate_of": source,
+            "link": mode,
+        }
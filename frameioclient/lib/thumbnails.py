@@ -0,0 +1,270 @@
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Optional, Union
+from urllib.parse import urlsplit
+
+from .bandwidth import BandwidthLimiter
+from .cache import DownloadCache
+from .constants import thumbnail_cache_size
+from .exceptions import DownloadException
+from .renditions import RenditionSelector
+from .transport import TransferSessionPool
+
+
+class ThumbnailCache(DownloadCache):
+    """On-disk cache of thumbnails and proxies, keyed by asset and kind.
+
+    Each entry has a JSON sidecar with its validators (ETag, Last-Modified), \
+        the URL path it came from and when it was last checked. Entries are \
+        evicted least recently used first once the cache passes ``max_size``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = "~/.frameio/thumbnails",
+        max_size: Optional[int] = thumbnail_cache_size,
+    ):
+        """
+        :param directory: Where the cached files live
+        :param max_size: Bytes the cache may hold before evicting, None for no limit
+        """
+        super().__init__(directory, max_size=max_size, modes=("copy",))
+
+    def read_meta(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self.path(key) + self.sidecar_suffix, "r") as fp:
+                meta = json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+        # The entry itself may have been evicted
+        return meta if os.path.isfile(self.path(key)) else None
+
+    def write_meta(self, key: str, meta: Dict):
+        path = self.path(key) + self.sidecar_suffix
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(meta, fp)
+        os.replace(tmp_path, path)
+
+    def put(self, key: str, data: bytes, meta: Dict):
+        """
+        Store an entry and its metadata, then evict what no longer fits.
+
+        :param key: Cache key
+        :param data: The fetched bytes
+        :param meta: Validators and bookkeeping for the entry
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+
+        # Swap files in so a concurrent reader never sees half an image
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_path, path)
+        self.write_meta(key, meta)
+
+        self._account(len(data) - replaced)
+        self.evict()
+
+    def touch(self, key: str):
+        # Recently used, the mtime is the LRU clock
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+    def remove(self, path: str):
+        os.remove(path)
+        try:
+            os.remove(path + self.sidecar_suffix)
+        except OSError:
+            pass
+
+
+class ThumbnailFetcher(object):
+    """Fetch thumbnails or proxies for many assets through a persistent cache.
+
+    Cached entries younger than ``max_age`` are served straight from disk, \
+        without any request, even for bare asset IDs. Older ones are \
+        revalidated with a conditional GET (If-None-Match / If-Modified-Since), \
+        and a new URL path (the asset got a new thumbnail) always refetches. \
+        Misses download concurrently over the shared transfer connection pool.
+
+    Signed URLs change on every API call, so entries are keyed by asset ID \
+        and kind, and compared by URL path only.
+
+    Example::
+        fetcher = ThumbnailFetcher(client=client, kind="thumb", concurrency=32)
+        paths = fetcher.fetch(assets)  # asset id -> local file path, or the exception
+    """
+
+    kinds = {
+        "thumb": ("thumb_540", "thumb", "thumb_orig"),
+        "thumb_small": ("thumb", "thumb_540", "thumb_orig"),
+        "thumb_scrub": ("thumb_scrub",),
+    }
+
+    def __init__(
+        self,
+        client=None,
+        kind: Optional[str] = "thumb",
+        cache: Optional[ThumbnailCache] = None,
+        concurrency: Optional[int] = 16,
+        max_age: Optional[float] = 24 * 60 * 60,
+    ):
+        """
+        :param client: A FrameioClient, needed to look up assets passed by ID
+        :param kind: 'thumb', 'thumb_small', 'thumb_scrub' or 'proxy' (the smallest rendition)
+        :param cache: The ThumbnailCache to use, one in ~/.frameio/thumbnails if omitted
+        :param concurrency: Requests in flight
+        :param max_age: Seconds an entry is used without revalidating it
+        """
+        if kind != "proxy" and kind not in self.kinds:
+            raise ValueError(f"Unknown thumbnail kind ({kind})")
+
+        self.client = client
+        self.kind = kind
+        self.cache = cache or ThumbnailCache()
+        self.concurrency = max(1, concurrency)
+        self.max_age = max_age
+        self.limiter = BandwidthLimiter.shared()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, assets: Iterable[Union[Dict, str]]) -> Dict:
+        """
+        Make every asset's thumbnail available locally.
+
+        Returns a dict of asset id -> path of the cached file, or the \
+            exception for assets that failed.
+
+        :param assets: Asset dicts or asset IDs
+        """
+        TransferSessionPool.ensure_capacity(self.concurrency)
+
+        results = dict()
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.concurrency
+        ) as executor:
+            futures = {
+                executor.submit(self.fetch_one, item): ThumbnailFetcher._asset_id(item)
+                for item in assets
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+
+        return results
+
+    def fetch_one(self, item: Union[Dict, str]) -> str:
+        """
+        Path of the cached thumbnail for one asset, fetching it if needed.
+
+        :param item: An asset dict or asset ID
+        """
+        asset_id = ThumbnailFetcher._asset_id(item)
+        key = f"{asset_id}.{self.kind}"
+        meta = self.cache.read_meta(key)
+
+        asset = item if isinstance(item, dict) else None
+        url = self.pick_url(asset) if asset is not None else None
+        path = urlsplit(url).path if url else None
+
+        # Fresh, and the asset (if we have it) still points at the same file
+        if (
+            meta is not None
+            and time.time() - meta["checked"] < self.max_age
+            and (path is None or path == meta["path"])
+        ):
+            self.cache.touch(key)
+            with self._lock:
+                self.hits += 1
+            return self.cache.path(key)
+
+        if asset is None:
+            if self.client is None:
+                raise DownloadException(message="A client is needed to fetch assets by ID.")
+            asset = self.client.assets.get(asset_id)
+            url = self.pick_url(asset)
+            path = urlsplit(url).path if url else None
+
+        if not url:
+            raise DownloadException(message=f"Asset {asset_id} has no {self.kind}.")
+
+        # Same file as before, ask the CDN whether it changed
+        headers = dict()
+        if meta is not None and meta["path"] == path:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        session = TransferSessionPool.get_session()
+        r = session.get(url, headers=headers)
+
+        if r.status_code == 304 and meta is not None:
+            meta["checked"] = time.time()
+            self.cache.write_meta(key, meta)
+            self.cache.touch(key)
+            with self._lock:
+                self.revalidated += 1
+            return self.cache.path(key)
+
+        r.raise_for_status()
+        self.limiter.consume(len(r.content))
+
+        self.cache.put(
+            key,
+            r.content,
+            {
+                "path": path,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "content_type": r.headers.get("Content-Type"),
+                "checked": time.time(),
+            },
+        )
+        with self._lock:
+            self.fetched += 1
+
+        return self.cache.path(key)
+
+    def pick_url(self, asset: Dict) -> Optional[str]:
+        """
+        The URL of this fetcher's kind for an asset, None if it has none.
+
+        :param asset: The asset object
+        """
+        if self.kind == "proxy":
+            renditions = [
+                r for r in RenditionSelector.candidates(asset) if r.key != "original"
+            ]
+            return renditions[-1].url if renditions else None
+
+        for field in self.kinds[self.kind]:
+            if asset.get(field):
+                return asset[field]
+
+        return None
+
+    @staticmethod
+    def _asset_id(item: Union[Dict, str]) -> str:
+        return item["id"] if isinstance(item, dict) else str(item)
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "revalidated": self.revalidated, "fetched": self.fetched}
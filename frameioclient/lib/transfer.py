@@ -1,12 +1,16 @@
 import concurrent.futures
+import http.client
 import math
 import os
+import statistics
+import threading
 import time
-from pprint import pprint
-from random import randint
+from collections import deque
+from random import randint, random
 from typing import Dict, List, Optional
 
 import requests
+import urllib3
 
 from .exceptions import (
     AssetChecksumMismatch,
@@ -18,13 +22,34 @@ from .utils import FormatTypes, Utils
 
 logger = SDKLogger("downloads")
 
-from .bandwidth import DiskBandwidth, NetworkBandwidth
+from .bandwidth import BandwidthLimiter
+from .cache import DownloadCache
+from .concurrency import AdaptiveConcurrency
+from .constants import (
+    download_block_size,
+    stream_reorder_window,
+    whole_download_buffer,
+)
+from .destination import (
+    BufferDestination,
+    FileDestination,
+    MmapDestination,
+    Preallocation,
+    SinkDestination,
+)
+from .hashing import IncrementalHasher
+from .iopolicy import IOPolicy
+from .journal import RangeJournal
+from .planner import ChunkPlanner
+from .presigned import PresignedUrls
+from .progress import TransferProgress
+from .renditions import RenditionSelector
 from .exceptions import (
     AssetNotFullyUploaded,
     DownloadException,
     WatermarkIDDownloadException,
 )
-from .transport import HTTPClient
+from .transport import TransferSessionPool
 
 
 class FrameioDownloader(object):
@@ -35,12 +60,25 @@ class FrameioDownloader(object):
         prefix: str,
         multi_part: bool = False,
         replace: bool = False,
+        preallocation: Optional[Preallocation] = Preallocation.NONE,
+        memory_map: bool = False,
+        rendition: Optional[RenditionSelector] = None,
+        cache: Optional[DownloadCache] = None,
+        io_policy: Optional[IOPolicy] = IOPolicy.BUFFERED,
+        client=None,
     ):
         self.multi_part = multi_part
         self.asset = asset
         self.asset_type = None
         self.download_folder = download_folder
         self.replace = replace
+        self.preallocation = Preallocation(preallocation or Preallocation.NONE)
+        self.memory_map = memory_map
+        self.rendition = rendition
+        self.selected = None  # The Rendition the selector picked, once it has
+        self.cache = cache
+        self.io_policy = IOPolicy(io_policy or IOPolicy.BUFFERED)
+        self.client = client
         self.resolution_map = dict()
         self.destination = None
         self.watermarked = asset["is_session_watermarked"]  # Default is probably false
@@ -52,9 +90,7 @@ class FrameioDownloader(object):
         self.chunk_size = 25 * 1024 * 1024  # 25 MB chunk size
         self.chunks = math.ceil(self.filesize / self.chunk_size)
         self.prefix = prefix
-        self.bytes_started = 0
-        self.bytes_completed = 0
-        self.in_progress = 0
+        self.progress = TransferProgress(total=self.filesize)
         self.aws_client = None
         self.session = None
         self.filename = Utils.normalize_filename(asset["name"])
@@ -64,6 +100,19 @@ class FrameioDownloader(object):
         self._evaluate_asset()
         self._get_path()
 
+        # With a client, URLs that expire during a long transfer are re-fetched
+        self.urls = None
+        if client is not None and asset.get("id"):
+            self.urls = PresignedUrls(asset, lambda: client.assets.get(asset["id"]))
+
+    @property
+    def bytes_started(self) -> int:
+        return self.progress.get("bytes_started")
+
+    @property
+    def bytes_completed(self) -> int:
+        return self.progress.get("bytes_completed")
+
     def get_path(self):
         if self.prefix != None:
             self.filename = self.prefix + self.filename
@@ -122,37 +171,30 @@ class FrameioDownloader(object):
         return self.original_checksum
 
     def get_download_key(self):
-        try:
-            url = self.asset["original"]
-        except KeyError as e:
-            if self.watermarked == True:
-                resolution_list = list()
-                try:
-                    for resolution_key, download_url in sorted(
-                        self.asset["downloads"].items()
-                    ):
-                        resolution = resolution_key.split("_")[
-                            1
-                        ]  # Grab the item at index 1 (resolution)
-                        try:
-                            resolution = int(resolution)
-                        except ValueError:
-                            continue
+        # An explicit selector can trade the original for a lighter rendition
+        if self.rendition is not None:
+            self.selected = self.rendition.select(self.asset)
+            return self.selected.url
 
-                        if download_url is not None:
-                            resolution_list.append(download_url)
+        if self.asset.get("original"):
+            return self.asset["original"]
 
-                    # Grab the highest resolution (first item) now
-                    url = resolution_list[0]
-                except KeyError:
-                    raise DownloadException
-            else:
-                raise WatermarkIDDownloadException
+        if self.watermarked != True:
+            raise WatermarkIDDownloadException
 
-        return url
+        # Grab the highest resolution rendition, compared numerically
+        renditions = [
+            r
+            for r in RenditionSelector.candidates({"downloads": self.asset.get("downloads")})
+            if r.height is not None
+        ]
+        if not renditions:
+            raise DownloadException
 
-    def download(self):
-        """Call this to perform the actual download of your asset!"""
+        return renditions[0].url
+
+    def _prepare_destination(self) -> bool:
+        """Create the download folder and decide whether there's anything to download."""
 
         # Check folders
         if os.path.isdir(os.path.join(os.path.curdir, self.download_folder)):
@@ -168,52 +210,218 @@ class FrameioDownloader(object):
         if os.path.isfile(self.get_path()) and self.replace == True:
             os.remove(self.get_path())
 
-        if os.path.isfile(self.get_path()) and self.replace == False:
+        # A journal next to the file means a previous attempt was interrupted
+        if (
+            os.path.isfile(self.get_path())
+            and self.replace == False
+            and not RangeJournal.exists(self.destination)
+        ):
             logger.info("File already exists at this location.")
+            return False
+
+        return True
+
+    def download(self):
+        """Call this to perform the actual download of your asset!"""
+
+        if not self._prepare_destination():
             return self.destination
 
         # Get URL
         url = self.get_download_key()
 
+        cacheable = self._cacheable(url)
+        if cacheable:
+            cached = self._download_from_cache()
+            if cached is not None:
+                return cached
+
         # AWS Client
-        self.aws_client = AWSClient(downloader=self, concurrency=5)
+        self.aws_client = AWSClient(downloader=self)
 
-        # Handle watermarking
-        if self.watermarked == True:
-            return self.aws_client._download_whole(url)
+        # Watermarked and other renditions aren't the original the size and checksum describe
+        if not self.ranged(url):
+            result = self.aws_client._download_whole(url)
 
         else:
             # Don't use multi-part download for files below 25 MB
             if self.asset["filesize"] < 26214400:
-                return self.aws_client._download_whole(url)
-            if self.multi_part == True:
-                return self.aws_client.multi_thread_download(url)
+                result = self.aws_client._download_whole(url)
+            elif self.multi_part == True:
+                result = self.aws_client.multi_thread_download(url)
             else:
-                return self.aws_client._download_whole(url)
+                result = self.aws_client._download_whole(url)
+
+        if cacheable:
+            self._store_in_cache()
+            if isinstance(result, dict):
+                result.update(self.cache.stats(), cache="miss")
+
+        return result
+
+    def ranged(self, url: str) -> bool:
+        """Whether url is the original, the only download that can be split into ranges."""
+        return self.watermarked != True and url == self.asset.get("original")
+
+    def _cacheable(self, url: str) -> bool:
+        # Only the original is addressed by the asset's checksum
+        return (
+            self.cache is not None
+            and self.original_checksum is not None
+            and self.ranged(url)
+        )
+
+    def _download_from_cache(self):
+        start_time = time.time()
+        mode = self.cache.fetch(self.original_checksum, self.filesize, self.destination)
+        if mode is None:
+            return None
 
+        # A cache hit finishes whatever an interrupted attempt left behind
+        if RangeJournal.exists(self.destination):
+            RangeJournal(self.destination).discard()
+
+        self.checksum = self.original_checksum
+        self.progress.add("bytes_written", self.filesize)
+        self.progress.add("bytes_completed", self.filesize)
+        self.progress.finish()
+
+        elapsed = round(max(time.time() - start_time, 0.001), 3)
+        logger.info(
+            f"Copied {Utils.format_value(self.filesize, type=FormatTypes.SIZE)} from the download cache ({mode})"
+        )
+
+        if not self.stats:
+            return self.destination
+
+        return {
+            "destination": self.destination,
+            "speed": round(self.filesize / elapsed, 2),
+            "elapsed": elapsed,
+            "cdn": None,
+            "concurrency": 0,
+            "peak_concurrency": 0,
+            "size": self.filesize,
+            "chunks": 0,
+            "chunk_size": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "retries": 0,
+            "cache": mode,
+            **self.cache.stats(),
+        }
+
+    def _store_in_cache(self):
+        # Multi-part downloads were verified on the fly, single streams weren't
+        checksum = self.checksum
+        if checksum is None:
+            checksum = Utils.calculate_hash(self.destination, io_policy=self.io_policy)
+
+        if checksum != self.original_checksum:
+            logger.info(f"Not caching {self.filename}, its checksum doesn't match the asset")
+            return
+
+        self.cache.store(self.original_checksum, self.destination)
+
+
+class RangeProgress(object):
+    """Shared progress of one range, for its worker and any hedge racing it.
+
+    Both requests start at or behind ``position`` and only ever write the \
+        bytes past it, so every byte of the range is written (and hashed) \
+        exactly once, by whichever request gets there first.
+    """
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end  # Inclusive
+        self.position = start  # Everything before this offset is written
+        self.started = time.time()
+        self.completed = False
+        self.hedged = False
+        self.finished_by = None  # Thread of the request that wrote the last byte
+        self.lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.position > self.end
+
+    @property
+    def remaining(self) -> int:
+        return self.end + 1 - self.position
+
+    def rate(self) -> float:
+        return (self.position - self.start) / max(time.time() - self.started, 0.001)
+
+
+class AWSClient(object):
+    range_retries = 5  # Attempts per range after the first one
+    retry_backoff = 0.5  # Seconds before the first retry, doubled every attempt
+    retry_backoff_max = 30
+    connect_timeout = 30
+    read_timeout = 60  # Seconds without a byte before a range request is retried
+
+    # Hedging: once every range has been handed out, race a duplicate request \
+    #   against any range running at under hedge_ratio of the median rate
+    hedging = True
+    hedge_ratio = 0.5
+    hedge_after = 2.0  # Seconds a range must have run before it can be hedged
+    hedge_min_bytes = 4 * 1024 * 1024  # Not worth a new request below this
+    max_hedges = 4  # Per download
 
-class AWSClient(HTTPClient, object):
     def __init__(self, downloader: FrameioDownloader, concurrency=None, progress=True):
-        super().__init__(self)  # Initialize via inheritance
+        # Sessions, retries and connections belong to the process-wide TransferSessionPool
+        self.shared_headers = TransferSessionPool.shared_headers()
         self.progress = progress
-        self.progress_manager = None
+        self.progress_manager = downloader.progress
         self.destination = downloader.destination
-        self.bytes_started = 0
-        self.bytes_completed = 0
         self.downloader = downloader
         self.futures = []
-        self.original = self.downloader.asset["original"]
-
-        # Ensure this is a valid number before assigning
+        self.original = self.downloader.asset.get("original")
+        self.writer = None
+        self.journal = None
+        self.hasher = None
+        self.controller = None
+        self.plan = None
+        self.start_time = None
+        self.peak_concurrency = 0
+        self.ranges = dict()  # Future -> (task, RangeProgress) for ranges in flight
+        self.range_rates = list()
+        self.sink = None
+        self.buffer = None
+        self.window = stream_reorder_window
+        self.limiter = BandwidthLimiter.shared()
+        self.urls = downloader.urls
+
+        # Ensure this is a valid number before assigning, otherwise adapt as we go
         if concurrency is not None and type(concurrency) == int and concurrency > 0:
             self.concurrency = concurrency
-        # else:
-        #     self.concurrency = self._optimize_concurrency()
+        else:
+            self.concurrency = self._optimize_concurrency()
+
+        # Size the shared per-host pools for the most workers we might run
+        TransferSessionPool.ensure_capacity(
+            self.controller.maximum if self.controller else self.concurrency
+        )
+
+    @property
+    def bytes_started(self) -> int:
+        return self.progress_manager.get("bytes_started")
+
+    @property
+    def bytes_completed(self) -> int:
+        return self.progress_manager.get("bytes_completed")
+
+    def _get_session(self):
+        # Transfers share one process-wide pool so connections survive across assets
+        return TransferSessionPool.get_session()
 
     @staticmethod
     def check_cdn(url):
         # TODO improve this algo
-        if "assets.frame.io" in url:
+        if not url:
+            return None
+        elif "assets.frame.io" in url:
             return "Cloudfront"
         elif "s3" in url:
             return "S3"
@@ -221,9 +429,9 @@ class AWSClient(HTTPClient, object):
             return None
 
     def _create_file_stub(self):
+        # Disk space is claimed later by FileDestination, per the preallocation mode
         try:
-            fp = open(self.downloader.destination, "w")
-            # fp.write(b"\0" * self.filesize) # Disabled to prevent pre-allocatation of disk space
+            fp = open(self.downloader.destination, "wb")
             fp.close()
         except FileExistsError as e:
             if self.replace == True:
@@ -239,29 +447,26 @@ class AWSClient(HTTPClient, object):
 
     def _optimize_concurrency(self):
         """
-        This method looks as the net_stats and disk_stats that we've run on \
-            the current environment in order to suggest the best optimized \
-            number of concurrent TCP connections.
+        Hand the number of concurrent TCP connections over to the adaptive \
+            controller for this CDN, which adds or removes range workers \
+            during the transfer based on measured throughput. Returns the \
+            number of workers to start with.
 
         Example::
-            AWSClient._optimize_concurrency()
+            AWSClient(downloader)._optimize_concurrency()
         """
+        self.controller = AdaptiveConcurrency.for_cdn(
+            AWSClient.check_cdn(self.original)
+        )
 
-        net_stats = NetworkBandwidth
-        disk_stats = DiskBandwidth
-
-        # Algorithm ensues
-        #
-        #
-
-        return 5
+        return self.controller.limit
 
     def _get_byte_range(
         self, url: str, start_byte: Optional[int] = 0, end_byte: Optional[int] = 2048
     ):
         """
-        Get a specific byte range from a given URL. This is **not** optimized \
-            for heavily-threaded operations currently.
+        Get a specific byte range from a given URL, on the shared transfer \
+            connection pool.
 
         :Args:
             url (string): The URL you want to fetch a byte-range from
@@ -276,160 +481,657 @@ class AWSClient(HTTPClient, object):
 
         headers = {**self.shared_headers, **range_header}
 
-        br = requests.get(url, headers=headers).content
+        br = self._get_session().get(url, headers=headers).content
         return br
 
+    def _probe(self, url: str) -> Dict:
+        """
+        Request the first byte of an object to learn its ETag, total size \
+            and whether the server honours range requests.
+
+        :Args:
+            url (string): The URL of the object you want to probe
+
+        Example::
+            AWSClient(downloader)._probe(asset["original"])
+        """
+        start_time = time.time()
+        session = self._get_session()
+        headers = {**self.shared_headers, "Range": "bytes=0-0"}
+
+        # The asset may have been listed long before this transfer got its turn
+        request_url = self._fresh_url(url)
+        r = session.get(request_url, headers=headers, stream=True)
+        fresh = self._refresh_if_expired(request_url, r)
+        if fresh is not None:
+            r.close()
+            start_time = time.time()
+            r = session.get(fresh, headers=headers, stream=True)
+
+        with r:
+            r.raise_for_status()
+            rtt = time.time() - start_time
+            status_code = r.status_code
+            response_headers = r.headers
+
+            # Read the single byte so the connection goes back to the pool
+            if status_code == 206:
+                AWSClient._readinto(r.raw, memoryview(bytearray(1)))
+
+        return AWSClient._describe(status_code, response_headers, rtt)
+
+    @staticmethod
+    def _describe(status_code: int, response_headers: Dict, rtt: float) -> Dict:
+        """
+        What a probe learned about the remote object, shared by the threaded \
+            and asyncio engines.
+
+        :param status_code: HTTP status of the probe
+        :param response_headers: Headers of the probe's response
+        :param rtt: Seconds the probe took to answer
+        """
+        # Ranges of an encoded body can't be decoded one by one, it has to come in one piece
+        encoded = response_headers.get("Content-Encoding", "identity") != "identity"
+
+        return {
+            "etag": response_headers.get("ETag"),
+            "size": Utils.content_size(status_code, response_headers),
+            "accept_ranges": not encoded
+            and (status_code == 206 or response_headers.get("Accept-Ranges") == "bytes"),
+            "rtt": rtt,
+        }
+
     def _download_whole(self, url: str):
+        """
+        Download an object over a single connection. Unencoded bodies are \
+            read from the socket straight into one reusable MB-sized buffer \
+            (see _readinto) and written from there, so there is no per-4 KB \
+            loop and no intermediate copy. When the server \
+            honours range requests and the object is big enough to split, \
+            this hands off to the parallel range engine instead.
+
+        :Args:
+            url (string): The URL of the object you want to download
+        """
+        remote = None
+        if url != self.original or self.downloader.filesize >= 2 * ChunkPlanner.min_chunk_size:
+            remote = self._probe(url)
+
+        if url != self.original:
+            # A rendition, the asset's size and checksum belong to the original
+            size = remote["size"]
+            selected = self.downloader.selected
+            if size is None and selected is not None and selected.url == url:
+                size = selected.size
+
+            self.downloader.filesize = size
+            self.downloader.checksum_verification = False
+            self.progress_manager.total = size
+
+        if (
+            remote is not None
+            and remote["accept_ranges"]
+            and remote["size"] is not None
+            and remote["size"] >= 2 * ChunkPlanner.min_chunk_size
+        ):
+            return self._download_ranges(url, remote)
+
         start_time = time.time()
         print(
             "Beginning download -- {} -- {}".format(
-                self.asset["name"],
-                Utils.format_value(self.downloader.filesize, type=FormatTypes.SIZE),
+                self.downloader.asset["name"],
+                Utils.format_value(self.downloader.filesize, type=FormatTypes.SIZE)
+                if self.downloader.filesize is not None
+                else "unknown size",
             )
         )
 
-        # Downloading
-        self.session = self._get_session()
-        r = self.session.get(url, stream=True)
-
-        # Downloading
-        with open(self.downloader.destination, "wb") as handle:
-            try:
-                # TODO make sure this approach works for SBWM download
-                for chunk in r.iter_content(chunk_size=4096):
-                    if chunk:
-                        handle.write(chunk)
-            except requests.exceptions.ChunkedEncodingError as e:
-                raise e
+        # Fail fast instead of running out of space halfway through
+        if self.downloader.filesize is not None:
+            FileDestination.check_free_space(
+                self.downloader.destination, self.downloader.filesize
+            )
 
-        download_time = time.time() - start_time
-        download_speed = Utils.format_value(
-            math.ceil(self.downloader.filesize / (download_time))
-        )
+        session = self._get_session()
+        size = 0
+
+        request_url = self._fresh_url(url)
+        r = session.get(request_url, headers=self.shared_headers, stream=True)
+        fresh = self._refresh_if_expired(request_url, r)
+        if fresh is not None:
+            r.close()
+            r = session.get(fresh, headers=self.shared_headers, stream=True)
+
+        with r:
+            r.raise_for_status()
+            expected = int(r.headers.get("Content-Length", -1))
+            if url != self.original and expected >= 0:
+                self.progress_manager.total = expected
+
+            with FileDestination(
+                self.downloader.destination, io_policy=self.downloader.io_policy
+            ).open() as handle:
+                if r.headers.get("Content-Encoding"):
+                    # Let requests decode it, readinto would hand us the encoded bytes
+                    expected = -1
+                    for block in r.iter_content(chunk_size=download_block_size):
+                        self.limiter.consume(len(block))
+                        handle.write_at(size, block)
+                        size += len(block)
+                        self.progress_manager.add("bytes_written", len(block))
+                else:
+                    buffer = memoryview(bytearray(whole_download_buffer))
+                    while True:
+                        filled = self._fill_buffer(r.raw, buffer)
+                        if filled == 0:
+                            break
+
+                        self.limiter.consume(filled)
+                        handle.write_at(size, buffer[:filled])
+                        size += filled
+                        self.progress_manager.add("bytes_written", filled)
+
+                # Drop anything left over from an earlier, longer attempt
+                os.ftruncate(handle.fd, size)
+
+        # A dropped connection can look like a short but clean body
+        if size < expected:
+            raise DownloadException(message=f"Download ended early at {size} of {expected} bytes.")
+
+        self.progress_manager.add("bytes_completed", size)
+        self.progress_manager.finish()
+
+        download_time = round(max(time.time() - start_time, 0.001), 2)
+        download_speed = round(size / max(download_time, 0.01), 2)
         print(
-            f"Downloaded {Utils.format_value(self.downloader.filesize, type=FormatTypes.SIZE)} at {Utils.format_value(download_speed, type=FormatTypes.SPEED)}"
+            f"Downloaded {Utils.format_value(size, type=FormatTypes.SIZE)} at {Utils.format_value(download_speed, type=FormatTypes.SPEED)}"
         )
 
-        return self.destination, download_speed
+        if self.downloader.stats:
+            return {
+                "destination": self.destination,
+                "speed": download_speed,
+                "elapsed": download_time,
+                "cdn": AWSClient.check_cdn(url),
+                "concurrency": 1,
+                "peak_concurrency": 1,
+                "size": size,
+                "chunks": 1,
+                "chunk_size": size,
+                "hedges": 0,
+                "hedge_wins": 0,
+                "retries": 0,
+            }
+        else:
+            return self.destination
+
+    @staticmethod
+    def _fill_buffer(raw, buffer: memoryview) -> int:
+        # Keep reading until the buffer is full or the body ends
+        filled = 0
+        while filled < len(buffer):
+            count = AWSClient._readinto(raw, buffer[filled:])
+            if not count:
+                break
+            filled += count
 
-    def _download_chunk(self, task: List):
-        # Download a particular chunk
-        # Called by the threadpool executor
+        return filled
 
-        # Destructure the task object into its parts
-        url = task[0]
-        start_byte = task[1]
-        end_byte = task[2]
-        chunk_number = task[3]
-        # in_progress = task[4]
+    @staticmethod
+    def _readinto(raw, buffer) -> int:
+        """
+        Read the next bytes of a response body into buffer. urllib3's own \
+            readinto reads into a temporary bytes object and copies that \
+            over, so unencoded bodies are read from the http.client response \
+            underneath, which fills the buffer straight from the socket.
+
+        :Args:
+            raw (urllib3.HTTPResponse): The response's raw stream
+            buffer (memoryview): Where the bytes go
+        """
+        fp = getattr(raw, "_fp", None)
+        if not isinstance(fp, http.client.HTTPResponse) or raw.headers.get(
+            "Content-Encoding"
+        ):
+            return raw.readinto(buffer)
+
+        try:
+            count = fp.readinto(buffer)
+        except (http.client.HTTPException, OSError) as e:
+            # What urllib3 would have raised, so the range retries as usual
+            raise urllib3.exceptions.ProtocolError(f"Connection broken: {e!r}", e)
 
-        # Set the initial chunk_size, but prepare to overwrite
-        chunk_size = end_byte - start_byte
+        # Body complete, hand the connection back to the pool as urllib3 would
+        if fp.isclosed():
+            raw.release_conn()
 
-        if self.bytes_started + (chunk_size) > self.downloader.filesize:
-            difference = abs(
-                self.downloader.filesize - (self.bytes_started + chunk_size)
-            )  # should be negative
-            chunk_size = chunk_size - difference
-            print(f"Chunk size as done via math: {chunk_size}")
+        return count
+
+    def _echo(self, message):
+        # A stream may be going to stdout, so keep progress chatter off it
+        if self.sink is None:
+            print(message)
         else:
-            pass
+            logger.info(message)
 
-        # Set chunk size in a smarter way
-        self.bytes_started += chunk_size
+    def _write_block(self, offset: int, block) -> int:
+        # Write a received block and feed everything that tracks the transfer
+        written = self.writer.write_at(offset, block)
+        self._record_block(offset, block)
 
-        # Specify the start and end of the range request
-        headers = {"Range": "bytes=%d-%d" % (start_byte, end_byte)}
+        return written
 
-        # Grab the data as a stream
-        self.session = self._get_session()
-        r = self.session.get(url, headers=headers, stream=True)
+    def _record_block(self, offset: int, block):
+        # Account for a block that is now in the destination
+        self.progress_manager.add("bytes_written", len(block))
+        if self.hasher and self.sink is None:  # A sink hashes in order itself
+            self.hasher.update(offset, block)
+        if self.controller:
+            self.controller.record(len(block))
 
-        # Write the file to disk
-        with open(self.destination, "r+b") as fp:
-            fp.seek(start_byte)  # Seek to the right spot in the file
-            chunk_size = len(r.content)  # Get the final chunk size
-            fp.write(r.content)  # Write the data
+    def _complete_range(
+        self, start_byte: int, chunk_size: int, headers: Dict, http_status: int
+    ):
+        # Only journal the range once every byte of it is on disk
+        self.journal.record(start_byte, start_byte + chunk_size)
 
         # Save requests logs
         self.downloader.request_logs.append(
             {
-                "headers": r.headers,
-                "http_status": r.status_code,
-                "bytes_transferred": len(r.content),
+                "headers": headers,
+                "http_status": http_status,
+                "bytes_transferred": chunk_size,
             }
         )
 
-        # Increase the count for bytes_completed, but only if it doesn't overrun file length
-        self.bytes_completed += chunk_size
-        if self.bytes_completed > self.downloader.filesize:
-            self.bytes_completed = self.downloader.filesize
+        self.progress_manager.add("bytes_completed", chunk_size)
+        self.progress_manager.add("ranges_completed")
+
+    def _download_chunk(
+        self,
+        task: List,
+        progress: Optional[RangeProgress] = None,
+        hedge: bool = False,
+    ):
+        # Download a particular chunk
+        # Called by the threadpool executor
+
+        # Destructure the task object into its parts
+        url = task[0]
+        start_byte = task[1]
+        end_byte = task[2]
+        chunk_number = task[3]
+        # in_progress = task[4]
+
+        # A hedge shares the progress of the range it races
+        if progress is None:
+            progress = RangeProgress(start_byte, end_byte)
+        if not hedge:
+            # Ranges are inclusive and never overlap, so this is exact
+            self.progress_manager.add("bytes_started", end_byte - start_byte + 1)
+
+        session = self._get_session()
+        attempt = 0
+        refreshes = 0
+
+        while not progress.done:
+            position = progress.position
+            url = self._fresh_url(url)
+            try:
+                # Only ask for what isn't on disk yet
+                headers = {"Range": "bytes=%d-%d" % (position, end_byte)}
+                r = session.get(
+                    url,
+                    headers=headers,
+                    stream=True,
+                    timeout=(self.connect_timeout, self.read_timeout),
+                )
+
+                # The URL ran out mid-transfer, carry on with a fresh one
+                fresh = self._refresh_if_expired(url, r)
+                if fresh is not None and refreshes < self.range_retries:
+                    r.close()
+                    refreshes += 1
+                    continue
+
+                r.raise_for_status()
+
+                if r.status_code != 206 and position != 0:
+                    r.close()
+                    raise DownloadException(message="Server ignored the range request.")
+
+                # Stream the response to disk in fixed-size blocks at the right offset
+                with r:
+                    if hasattr(self.writer, "view_at") and not r.headers.get(
+                        "Content-Encoding"
+                    ):
+                        position = self._receive_range(r.raw, progress, position)
+                    else:
+                        for block in r.iter_content(chunk_size=download_block_size):
+                            self.limiter.consume(len(block))
+                            self._write_range_block(progress, position, block)
+                            position += len(block)
+                            if progress.done:
+                                break  # Done, or the racing request got there first
+
+                if progress.done:
+                    break
+
+                # A dropped connection can look like a short but clean body
+                error = "ended early"
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+                if hedge:
+                    return 0  # The original request is still on it
+                if not AWSClient._is_retryable(e):
+                    self._give_up(start_byte, progress.position)
+                    raise
+                error = e
+            except Exception:
+                if hedge:
+                    return 0
+                self._give_up(start_byte, progress.position)
+                raise
+
+            if hedge:
+                return 0
+            if progress.done:
+                break  # A hedge finished the range while this request was stuck
+
+            attempt += 1
+            if attempt > self.range_retries:
+                self._give_up(start_byte, progress.position)
+                raise DownloadException(
+                    message=f"Range {start_byte}-{end_byte} failed after {attempt} attempts: {error}"
+                )
+
+            delay = self._retry_delay(attempt)
+            logger.info(
+                f"Range {start_byte}-{end_byte} stopped at byte {progress.position} ({error}), retrying in {delay:.1f}s"
+            )
+            self.progress_manager.add("retries")
+            if self.controller:
+                self.controller.record_error()
+            time.sleep(delay)
+
+        # Only the request that wrote the last byte reports the range, \
+        #   one that got there second (or never sent anything) leaves it be
+        with progress.lock:
+            if progress.completed or progress.finished_by != threading.get_ident():
+                return 0
+            progress.completed = True
+
+        if hedge:
+            self.progress_manager.add("hedge_wins")
+        self.range_rates.append(progress.rate())
+
+        chunk_size = end_byte + 1 - start_byte
+        self._complete_range(start_byte, chunk_size, r.headers, r.status_code)
 
         # After the function completes, we report back the # of bytes transferred
         return chunk_size
 
-    def multi_thread_download(self):
-        start_time = time.time()
+    def _write_range_block(self, progress: RangeProgress, offset: int, block):
+        # Write only the part of the block past the range's shared position
+        with progress.lock:
+            skip = progress.position - offset
+            if skip >= len(block):
+                return
+
+            if skip > 0:
+                block = memoryview(block)[skip:]
+            progress.position += self._write_block(progress.position, block)
+            if progress.done:
+                progress.finished_by = threading.get_ident()
+
+    def _receive_range(self, raw, progress: RangeProgress, position: int) -> int:
+        # Read the response straight into the destination, no intermediate blocks
+        while not progress.done and position <= progress.end:
+            length = min(download_block_size, progress.end + 1 - position)
+            count = AWSClient._readinto(raw, self.writer.view_at(position, length))
+            if not count:
+                break
+
+            self.limiter.consume(count)
+            with progress.lock:
+                # A racing request may already have landed (the same) bytes here
+                if position + count > progress.position:
+                    start = max(position, progress.position)
+                    self._record_block(start, self.writer.read_at(start, position + count - start))
+                    progress.position = position + count
+                    if progress.done:
+                        progress.finished_by = threading.get_ident()
+            position += count
+
+        return position
+
+    def _hedge_candidates(self) -> List:
+        # Ranges running well behind the median rate, slowest first
+        running = [
+            (future, task, progress)
+            for future, (task, progress) in self.ranges.items()
+            if not progress.done
+        ]
+        rates = self.range_rates + [progress.rate() for _, _, progress in running]
+        if not running or len(rates) < 2:
+            return []
+
+        threshold = statistics.median(rates) * self.hedge_ratio
+        now = time.time()
+
+        candidates = [
+            (future, task, progress)
+            for future, task, progress in running
+            if not progress.hedged
+            and now - progress.started >= self.hedge_after
+            and progress.remaining >= self.hedge_min_bytes
+            and progress.rate() < threshold
+        ]
+        return sorted(candidates, key=lambda item: item[2].rate())
+
+    def _fresh_url(self, url: str) -> str:
+        return self.urls.current(url) if self.urls is not None else url
+
+    def _refresh_if_expired(self, url: str, response) -> Optional[str]:
+        # A replacement URL when the response says the signature ran out
+        if self.urls is None or response.ok or not PresignedUrls.is_expired(response):
+            return None
 
-        # Generate stub
-        try:
-            self._create_file_stub()
-        except Exception as e:
-            raise DownloadException(message=e)
+        fresh = self.urls.refresh(url)
+        return fresh if fresh != url else None
 
-        pprint(self.downloader)
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        # Client errors won't fix themselves, throttling and server errors might
+        response = getattr(error, "response", None)
+        if isinstance(error, requests.exceptions.HTTPError) and response is not None:
+            return response.status_code >= 500 or response.status_code == 429
 
-        offset = math.ceil(self.downloader.filesize / self.downloader.chunks)
-        in_byte = 0  # Set initially here, but then override
+        return True
 
-        print(
-            f"Multi-part download -- {self.downloader.asset['name']} -- {Utils.format_value(self.downloader.filesize, type=FormatTypes.SIZE)}"
+    def _retry_delay(self, attempt: int) -> float:
+        # Exponential backoff with jitter so failed ranges don't retry in lockstep
+        delay = min(self.retry_backoff * 2 ** (attempt - 1), self.retry_backoff_max)
+        return delay * (0.5 + random() / 2)
+
+    def _give_up(self, start_byte: int, position: int):
+        # Journal what did make it to disk so the next attempt starts from there
+        if position > start_byte:
+            self.journal.record(start_byte, position)
+
+    def _prepare(self, url: str, remote: Dict) -> deque:
+        """
+        Set up the destination, journal, hasher and chunk plan for a \
+            multi-part download and return the range tasks still to fetch. \
+            Shared by every engine that drives range workers.
+
+        :Args:
+            url (string): The URL being downloaded
+            remote (dict): The result of probing the URL
+        """
+        self.start_time = time.time()
+
+        if self.sink is not None:
+            return self._prepare_stream(url, remote)
+        if self.buffer is not None:
+            return self._prepare_buffer(url, remote)
+
+        # Pick up where an interrupted attempt left off, if the object is unchanged
+        self.journal = RangeJournal(self.destination)
+        if self.downloader.replace or not os.path.isfile(self.destination):
+            self.journal.discard()
+
+        completed = self.journal.load(remote["etag"], self.downloader.filesize)
+
+        if len(completed) > 0:
+            logger.info(
+                f"Resuming download, {Utils.format_value(completed.total(), type=FormatTypes.SIZE)} already on disk"
+            )
+        else:
+            # Generate stub
+            try:
+                self._create_file_stub()
+            except Exception as e:
+                raise DownloadException(message=e)
+
+        # Open the destination once, every range worker writes through it
+        self.writer = None
+        if self.downloader.memory_map:
+            # A mapping lives in the page cache, so the I/O policy doesn't apply
+            try:
+                self.writer = MmapDestination(
+                    self.destination, size=self.downloader.filesize
+                ).open()
+            except DownloadException as e:
+                logger.info(f"{e}, writing with pwrite instead")
+
+        if self.writer is None:
+            self.writer = FileDestination(
+                self.destination,
+                size=self.downloader.filesize,
+                preallocation=self.downloader.preallocation,
+                io_policy=self.downloader.io_policy,
+            ).open()
+
+        # Hash while downloading so verification doesn't re-read the file
+        if self.downloader.checksum_verification == True:
+            self.hasher = IncrementalHasher(
+                self.downloader.filesize, self.writer.read_at
+            )
+            for start, end in completed.ranges:
+                self.hasher.add_written(start, end)
+
+        # Size the ranges for this file, link latency and worker count
+        planner = ChunkPlanner()
+        if self.hasher:
+            # Keep the ranges ahead of the hashed prefix inside the reorder buffer
+            planner.max_chunk_size = max(
+                planner.min_chunk_size, self.hasher.max_buffer // self.concurrency
+            )
+        self.plan = planner.plan(
+            self.downloader.filesize, rtt=remote["rtt"], concurrency=self.concurrency
         )
 
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.concurrency
-        ) as executor:
-            for i in range(int(self.downloader.chunks)):
-                # Increment by the iterable + 1 so we don't mutiply by zero
-                out_byte = offset * (i + 1)
+        return self._plan_tasks(url, completed)
 
-                # Create task tuple
-                task = (self.downloader.asset["original"], in_byte, out_byte, i)
+    def _prepare_stream(self, url: str, remote: Dict) -> deque:
+        # A stream can't be resumed, so completed ranges are only tracked in memory
+        self.journal = RangeJournal(self.downloader.destination)
 
-                # Stagger start for each chunk by 0.1 seconds
-                if i < self.concurrency:
-                    time.sleep(randint(1, 5) / 10)
+        self.writer = SinkDestination(
+            self.sink, self.downloader.filesize, window=self.window
+        ).open()
 
-                # Append tasks to futures list
-                self.futures.append(executor.submit(self._download_chunk, task))
+        # Bytes reach the sink in order, so the digest never needs a read back
+        if self.downloader.checksum_verification == True:
+            self.hasher = IncrementalHasher(
+                self.downloader.filesize, self.writer.read_at
+            )
+            self.writer.on_write = self.hasher.update
+
+        # Keep enough ranges inside the reorder window to feed every worker
+        planner = ChunkPlanner()
+        planner.max_chunk_size = max(
+            planner.min_chunk_size, self.writer.window // (2 * self.concurrency)
+        )
+        self.plan = planner.plan(
+            self.downloader.filesize, rtt=remote["rtt"], concurrency=self.concurrency
+        )
 
-                # Reset new in byte equal to last out byte
-                in_byte = out_byte
+        return self._plan_tasks(url, self.journal.completed)
 
-            # Wait on threads to finish
-            for future in concurrent.futures.as_completed(self.futures):
-                try:
-                    chunk_size = future.result()
-                    print(chunk_size)
-                except Exception as exc:
-                    print(exc)
+    def _prepare_buffer(self, url: str, remote: Dict) -> deque:
+        # Nothing in memory survives a failure, so completed ranges aren't persisted
+        self.journal = RangeJournal(self.downloader.destination)
 
-        # Calculate and print stats
-        download_time = round((time.time() - start_time), 2)
-        pprint(self.downloader)
-        download_speed = round((self.downloader.filesize / download_time), 2)
+        self.writer = BufferDestination(self.buffer, self.downloader.filesize).open()
 
+        # Reading back from memory is free, so the hasher never holds copies
         if self.downloader.checksum_verification == True:
-            # Check for checksum, if not present throw error
-            if self.downloader._get_checksum() == None:
-                raise AssetChecksumNotPresent
-
-            # Calculate the file hash
-            if (
-                Utils.calculate_hash(self.destination)
-                != self.downloader.original_checksum
+            self.hasher = IncrementalHasher(
+                self.downloader.filesize, self.writer.read_at, max_buffer=0
+            )
+
+        self.plan = ChunkPlanner().plan(
+            self.downloader.filesize, rtt=remote["rtt"], concurrency=self.concurrency
+        )
+
+        return self._plan_tasks(url, self.journal.completed)
+
+    def _plan_tasks(self, url: str, completed) -> deque:
+        self.downloader.chunk_size = self.plan.chunk_size
+        self.downloader.chunks = self.plan.chunks
+
+        self._echo(
+            f"Multi-part download -- {self.downloader.asset['name']} -- {Utils.format_value(self.downloader.filesize, type=FormatTypes.SIZE)}"
+        )
+
+        tasks = deque()
+        for i, byte_range in enumerate(self.plan):
+            # Only request the parts of this chunk that aren't on disk yet
+            for gap_start, gap_end in completed.missing(
+                byte_range.start, byte_range.end + 1
             ):
-                raise AssetChecksumMismatch
+                # Create task tuple
+                tasks.append((url, gap_start, gap_end - 1, i))
+
+        return tasks
+
+    def _finalize(self):
+        """
+        Verify a multi-part download once its range workers are done and \
+            return the destination, or a dict of stats when stats are enabled.
+        """
+        try:
+            # Keep the journal around so the next attempt only fetches what's missing
+            if not self.journal.completed.covers(0, self.downloader.filesize):
+                if self.sink is not None:
+                    raise DownloadException(message="Stream incomplete.")
+                if self.buffer is not None:
+                    raise DownloadException(message="Download incomplete.")
+                raise DownloadException(
+                    message="Download incomplete, run it again to resume from the journal."
+                )
+
+            # Every byte is on disk, nothing left to resume
+            if self.sink is None and self.buffer is None:
+                self.journal.discard()
+
+            # Calculate and print stats
+            download_time = max(round((time.time() - self.start_time), 2), 0.01)
+            download_speed = round((self.downloader.filesize / download_time), 2)
+
+            if self.downloader.checksum_verification == True:
+                # Check for checksum, if not present throw error
+                if self.downloader._get_checksum() == None:
+                    raise AssetChecksumNotPresent
+
+                # The digest was built during the transfer, only the tail is left
+                self.downloader.checksum = self.hasher.hexdigest()
+                if self.downloader.checksum != self.downloader.original_checksum:
+                    raise AssetChecksumMismatch
+        finally:
+            self.writer.close()
+            self.progress_manager.finish()
 
         # Log completion event
         SDKLogger("downloads").info(
@@ -454,13 +1156,170 @@ class AWSClient(HTTPClient, object):
                 "elapsed": download_time,
                 "cdn": AWSClient.check_cdn(self.original),
                 "concurrency": self.concurrency,
+                "peak_concurrency": self.peak_concurrency,
                 "size": self.downloader.filesize,
-                "chunks": self.downloader.chunks,
+                "chunks": self.plan.chunks,
+                "chunk_size": self.plan.chunk_size,
+                "hedges": self.progress_manager.get("hedges"),
+                "hedge_wins": self.progress_manager.get("hedge_wins"),
+                "retries": self.progress_manager.get("retries"),
+                "bytes_reread": self.hasher.bytes_reread if self.hasher else 0,
             }
             return dl_info
         else:
             return self.destination
 
+    def multi_thread_download(self, url: Optional[str] = None):
+        url = url or self.downloader.asset["original"]
+
+        return self._download_ranges(url, self._probe(url))
+
+    def _download_ranges(self, url: str, remote: Dict):
+        tasks = self._prepare(url, remote)
+        return self._run_ranges(tasks)
+
+    def stream(
+        self,
+        sink,
+        url: Optional[str] = None,
+        window: Optional[int] = stream_reorder_window,
+    ):
+        """
+        Download with parallel range requests but write the bytes, in \
+            order, to any writable stream instead of a file.
+
+        :Args:
+            sink (object): Anything with a write() method, e.g. sys.stdout.buffer
+            url (string): The URL to download, defaults to the asset's original
+            window (int): Maximum number of out-of-order bytes held in memory
+
+        Example::
+            process = subprocess.Popen(["ffmpeg", "-i", "-", ...], stdin=subprocess.PIPE)
+            AWSClient(downloader).stream(process.stdin)
+            process.stdin.close()
+        """
+        self.sink = sink
+        self.window = window
+        self.destination = getattr(sink, "name", None)
+
+        url = url or self.downloader.asset["original"]
+        tasks = self._prepare(url, self._probe(url))
+
+        return self._run_ranges(tasks)
+
+    def download_into(self, buffer, url: Optional[str] = None):
+        """
+        Download with parallel range requests into a caller-provided \
+            buffer of at least filesize bytes. Each range worker reads its \
+            response straight into its slice, nothing is written to disk.
+
+        Returns (buffer, checksum), the checksum is verified against the \
+            asset unless verification is turned off.
+
+        :Args:
+            buffer (object): A writable bytearray, memoryview or NumPy array
+            url (string): The URL to download, defaults to the asset's original
+
+        Example::
+            buffer = bytearray(asset["filesize"])
+            buffer, checksum = AWSClient(downloader).download_into(buffer)
+        """
+        self.buffer = buffer
+
+        url = url or self.downloader.asset["original"]
+        tasks = self._prepare(url, self._probe(url))
+        self._run_ranges(tasks)
+
+        return (buffer, self.downloader.checksum)
+
+    def _run_ranges(self, tasks: deque):
+
+        # The pool can grow up to the controller's ceiling, the limit decides how many run
+        max_workers = self.controller.maximum if self.controller else self.concurrency
+        if self.controller:
+            self.controller.start()
+
+        in_flight = set()
+        hedges = dict()  # Hedge future -> the future of the range it races
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers + (self.max_hedges if self.hedging else 0)
+        ) as executor:
+            while tasks or in_flight:
+                if self.controller:
+                    self.concurrency = self.controller.limit
+
+                while tasks and len(in_flight) < self.concurrency:
+                    # Stagger start for the first batch of chunks by 0.1 seconds
+                    if len(self.futures) < self.concurrency:
+                        time.sleep(randint(1, 5) / 10)
+
+                    task = tasks.popleft()
+                    progress = RangeProgress(task[1], task[2])
+                    future = executor.submit(self._download_chunk, task, progress)
+                    self.ranges[future] = (task, progress)
+                    self.futures.append(future)
+                    in_flight.add(future)
+
+                # Nothing left to hand out, so spare workers go to the stragglers
+                if self.hedging and not tasks:
+                    for future, task, progress in self._hedge_candidates():
+                        if (
+                            len(in_flight) >= self.concurrency
+                            or self.progress_manager.get("hedges") >= self.max_hedges
+                        ):
+                            break
+
+                        progress.hedged = True
+                        self.progress_manager.add("hedges")
+                        logger.info(
+                            f"Hedging range {progress.start}-{progress.end} from byte {progress.position}"
+                        )
+                        hedge = executor.submit(
+                            self._download_chunk, task, progress, True
+                        )
+                        hedges[hedge] = future
+                        in_flight.add(hedge)
+
+                self.peak_concurrency = max(self.peak_concurrency, len(in_flight))
+                if self.controller:
+                    self.controller.set_active(len(in_flight))
+
+                # Wake up at least once per interval so limit changes apply mid-range
+                timeout = self.controller.interval if self.controller else None
+                if self.hedging and not tasks:
+                    timeout = min(timeout or self.hedge_after, self.hedge_after / 2)
+
+                done, in_flight = concurrent.futures.wait(
+                    in_flight,
+                    timeout=timeout,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+
+                for future in done:
+                    if future in hedges:
+                        hedges.pop(future)
+                        try:
+                            future.result()
+                        except Exception as exc:
+                            # The original request is still responsible for the range
+                            logger.info(f"Hedge request failed: {exc}")
+                        continue
+
+                    self.ranges.pop(future, None)
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        self._echo(exc)
+                        if self.controller:
+                            self.controller.record_error()
+
+                        # The sink can't skip a range, so stop instead of stalling
+                        if self.sink is not None:
+                            self.writer.abort(exc)
+                            tasks.clear()
+
+        return self._finalize()
+
 
 class TransferJob(AWSClient):
     # These will be used to track the job and then push telemetry
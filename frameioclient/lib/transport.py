@@ -45,16 +45,20 @@ class HTTPClient(object):
         self.shared_headers = {"x-frameio-client": f"python/{self.client_version}"}
 
         # Configure retry strategy (very broad right now)
-        self.retry_strategy = Retry(
+        self.retry_strategy = HTTPClient.build_retry_strategy()
+
+        # Create real thread
+        self._initialize_thread()
+
+    @staticmethod
+    def build_retry_strategy() -> Retry:
+        return Retry(
             total=100,
             backoff_factor=2,
             status_forcelist=retryable_statuses,
             method_whitelist=["GET", "POST", "PUT", "GET", "DELETE"],
         )
 
-        # Create real thread
-        self._initialize_thread()
-
     def _initialize_thread(self):
         self.thread_local = threading.local()
 
@@ -72,6 +76,100 @@ class HTTPClient(object):
         return self.thread_local.session
 
 
+class TransferSessionPool(object):
+    """Process-wide connection pool for transfer traffic (S3 and CloudFront).
+
+    Every transfer in the process shares one HTTPAdapter, and with it one \
+        urllib3 PoolManager, while each thread gets its own lightweight \
+        requests.Session mounting that adapter. Connections (and their TLS \
+        sessions) are therefore reused across threads, files and clients \
+        instead of every AWSClient paying fresh handshakes to the same hosts.
+
+    Example::
+        TransferSessionPool.ensure_capacity(32)
+        session = TransferSessionPool.get_session()
+    """
+
+    pool_hosts = 16  # Distinct hosts (buckets, CDN edges) to keep pools for
+    pool_size = default_thread_count  # Connections kept per host
+    connection_retries = 3  # Quick reconnects before a request fails to its caller
+
+    _adapter = None
+    _headers = None
+    _generation = 0
+    _lock = threading.Lock()
+    _thread_local = threading.local()
+
+    @classmethod
+    def ensure_capacity(cls, concurrency: int):
+        """
+        Make sure each host's pool can hold a connection per concurrent worker.
+
+        :param concurrency: The number of workers that may hit one host at once
+        """
+        with cls._lock:
+            if cls._adapter is not None and concurrency <= cls.pool_size:
+                return
+
+            cls.pool_size = max(cls.pool_size, concurrency)
+            cls._new_adapter()
+
+    @classmethod
+    def build_retry_strategy(cls) -> Retry:
+        """
+        Retry policy for transfer requests. Only connections that fail to \
+            open or drop before a response are retried here, every HTTP \
+            status goes straight back to the caller. The range and part \
+            loops decide what a 4xx/5xx means: resume with backoff, swap an \
+            expired URL or give up.
+        """
+        return Retry(
+            total=cls.connection_retries,
+            connect=cls.connection_retries,
+            read=cls.connection_retries,
+            backoff_factor=0.2,
+            respect_retry_after_header=False,  # 429 and 503 are the caller's to handle
+            # A PUT body may be half sent by the time its read fails
+            method_whitelist=["GET", "HEAD"],
+        )
+
+    @classmethod
+    def _new_adapter(cls):
+        # Existing sessions keep the old adapter until they notice the new generation
+        cls._adapter = HTTPAdapter(
+            pool_connections=cls.pool_hosts,
+            pool_maxsize=cls.pool_size,
+            max_retries=cls.build_retry_strategy(),
+        )
+        cls._generation += 1
+
+    @classmethod
+    def shared_headers(cls) -> Dict:
+        """Headers every transfer request carries, the client version."""
+        if cls._headers is None:
+            cls._headers = {"x-frameio-client": f"python/{ClientVersion.version()}"}
+
+        return cls._headers
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """Get this thread's session on the shared connection pool."""
+        local = cls._thread_local
+
+        if getattr(local, "generation", None) != cls._generation or cls._adapter is None:
+            with cls._lock:
+                if cls._adapter is None:
+                    cls._new_adapter()
+
+                http = requests.Session()
+                http.mount("https://", cls._adapter)
+                http.mount("http://", cls._adapter)
+                local.session = http
+                local.generation = cls._generation
+
+        return local.session
+
+
 class APIClient(HTTPClient, object):
     """Frame.io API Client that handles automatic pagination, and lots of other nice things.
 
@@ -1,24 +1,39 @@
 import concurrent.futures
 import math
 import os
-import threading
+import time
+from random import random
 from typing import List
 
 import requests
 
+from .bandwidth import BandwidthLimiter, ThrottledReader
+from .presigned import PresignedUrls
+from .progress import TransferProgress
+from .transport import TransferSessionPool
 from .utils import FormatTypes, Utils
 
-thread_local = threading.local()
-
 
 class FrameioUploader(object):
-    def __init__(self, asset=None, file=None):
+    url_refreshes = 3  # Fresh URLs tried per part before giving up
+    part_retries = 5  # Attempts per part after the first one, for 5xx, 429 and dropped connections
+    retry_backoff = 0.5  # Seconds before the first retry, doubled every attempt
+    retry_backoff_max = 30
+
+    def __init__(self, asset=None, file=None, client=None):
         self.asset = asset
         self.file = file
         self.chunk_size = None
         self.file_count = 0
         self.file_num = 0
         self.futures = []
+        self.limiter = BandwidthLimiter.shared()
+        self.progress = TransferProgress(total=asset["filesize"] if asset else None)
+
+        # With a client, part URLs that expire during a long upload are re-fetched
+        self.urls = None
+        if client is not None and asset and asset.get("id"):
+            self.urls = PresignedUrls(asset, lambda: client.assets.get(asset["id"]))
 
     def _calculate_chunks(self, total_size: int, chunk_count: int) -> List[int]:
         """
@@ -40,9 +55,8 @@ class FrameioUploader(object):
         return chunk_offsets
 
     def _get_session(self):
-        if not hasattr(thread_local, "session"):
-            thread_local.session = requests.Session()
-        return thread_local.session
+        # Parts go over the same process-wide pool as downloads
+        return TransferSessionPool.get_session()
 
     def _smart_read_chunk(self, chunk_offset: int, is_final_chunk: bool) -> bytes:
         with open(os.path.realpath(self.file.name), "rb") as file:
@@ -69,28 +83,76 @@ class FrameioUploader(object):
         session = self._get_session()
         chunk_data = self._smart_read_chunk(chunk_offset, is_final_chunk)
 
-        try:
-            r = session.put(
-                url,
-                data=chunk_data,
-                headers={
-                    "content-type": self.asset["filetype"],
-                    "x-amz-acl": "private",
-                },
-            )
+        refreshes = 0
+        attempt = 0
+        while True:
+            # Another part may already have swapped this URL for a fresh one
+            if self.urls is not None:
+                url = self.urls.current(url)
+
+            # Only pay for the throttled reader when a cap is actually in effect
+            body = chunk_data
+            if self.limiter.current_rate():
+                body = ThrottledReader(chunk_data, self.limiter)
+
+            try:
+                r = session.put(
+                    url,
+                    data=body,
+                    headers={
+                        "content-type": self.asset["filetype"],
+                        "x-amz-acl": "private",
+                    },
+                )
+            except requests.exceptions.ConnectionError:
+                # The pool already reconnected a few times, back off before the next go
+                attempt += 1
+                if attempt > self.part_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
             # print("Completed chunk, status: {}".format(r.status_code))
-        except Exception as e:
-            print(e)
+
+            if r.ok:
+                break
+
+            # The part URL ran out while earlier parts were uploading, retry with a fresh one
+            if self.urls is not None and PresignedUrls.is_expired(r):
+                fresh = self.urls.refresh(url)
+                if fresh != url and refreshes < self.url_refreshes:
+                    url = fresh
+                    refreshes += 1
+                    continue
+
+            # Throttling and server errors may clear up, anything else won't
+            if r.status_code < 500 and r.status_code != 429:
+                break
+
+            attempt += 1
+            if attempt > self.part_retries:
+                break
+            time.sleep(self._retry_delay(attempt))
 
         r.raise_for_status()
 
+        self.progress.add("bytes_written", len(chunk_data))
+        self.progress.add("bytes_completed", len(chunk_data))
+        self.progress.add("parts_completed")
+
         return len(chunk_data)
 
+    def _retry_delay(self, attempt: int) -> float:
+        # Exponential backoff with jitter so failed parts don't retry in lockstep
+        delay = min(self.retry_backoff * 2 ** (attempt - 1), self.retry_backoff_max)
+        return delay * (0.5 + random() / 2)
+
     def upload(self):
         total_size = self.asset["filesize"]
+        self.progress.total = total_size
         upload_urls = self.asset["upload_urls"]
 
         chunk_offsets = self._calculate_chunks(total_size, chunk_count=len(upload_urls))
+        TransferSessionPool.ensure_capacity(5)
         with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
             for i in range(len(upload_urls)):
                 url = upload_urls[i]
@@ -103,11 +165,12 @@ class FrameioUploader(object):
             # Wait on threads to finish
             for future in concurrent.futures.as_completed(self.futures):
                 try:
-                    chunk_size = future.result()
-                    print(chunk_size)
+                    future.result()
                 except Exception as exc:
                     print(exc)
 
+        self.progress.finish()
+
     def file_counter(self, folder):
         matches = []
         for root, dirnames, filenames in os.walk(folder):
@@ -1,11 +1,14 @@
 import enum
 import os
 import re
+import shutil
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import xxhash
 
+from .iopolicy import IOPolicy, PageCache
+
 KB = 1024
 MB = KB * KB
 ENV = os.getenv("FRAMEIO_ENVIRONMENT", "prod")
@@ -78,31 +81,110 @@ class Utils:
             return formatted
 
     @staticmethod
-    def calculate_hash(file_path: str, progress_callback: Optional[Any] = None):
+    def calculate_hash(
+        file_path: str,
+        progress_callback: Optional[Any] = None,
+        io_policy: Optional[IOPolicy] = IOPolicy.BUFFERED,
+    ):
         """
         Calculate an xx64hash
 
         :param file_path: The path on your system to the file you'd like to checksum
         :param progress_callback: A progress callback to use when you want to callback w/ progress
+        :param io_policy: An IOPolicy, DONTNEED drops what was read from the page cache and DIRECT bypasses it
         """
+        io_policy = IOPolicy.resolve(io_policy)
+
+        fd = None
+        if io_policy == IOPolicy.DIRECT:
+            fd = PageCache.open_direct(file_path, os.O_RDONLY)
+            if fd is None:
+                io_policy = IOPolicy.DONTNEED
+        if fd is None:
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+
         xxh64_hash = xxhash.xxh64()
-        b = bytearray(MB * 8)
-        f = open(file_path, "rb")
-        while True:
-            numread = f.readinto(b)
-            if not numread:
-                break
+        if io_policy == IOPolicy.DIRECT:
+            b = PageCache.aligned_buffer(MB * 8)  # O_DIRECT reads need an aligned buffer
+        else:
+            b = bytearray(MB * 8)
+            PageCache.advise_sequential(fd)
+
+        view = memoryview(b)
+        position = 0
+        with open(fd, "rb", buffering=0) as f:
+            while True:
+                numread = f.readinto(view)
+                if not numread:
+                    break
 
-            xxh64_hash.update(b[:numread])
+                xxh64_hash.update(view[:numread])
 
-            if progress_callback:
-                # Should only subtract 1 here when necessary, not every time!
-                progress_callback(float(numread - 1), force=True)
+                if io_policy == IOPolicy.DONTNEED:
+                    PageCache.drop(fd, position, numread)
+                position += numread
 
+                if progress_callback:
+                    # Should only subtract 1 here when necessary, not every time!
+                    progress_callback(float(numread - 1), force=True)
+
+        view.release()
         xxh64_digest = xxh64_hash.hexdigest()
 
         return xxh64_digest
 
+    @staticmethod
+    def link_or_copy(
+        source: str,
+        destination: str,
+        modes: Optional[Tuple] = ("reflink", "hardlink", "copy"),
+    ) -> str:
+        """
+        Make destination hold the same bytes as source as cheaply as the \
+            filesystem allows, and return the mode that worked.
+
+        :param source: Path of the existing file
+        :param destination: Path to create, it must not exist yet
+        :param modes: Methods to try in order: 'reflink' (copy-on-write clone), \
+            'hardlink' or 'copy'
+        """
+        error = None
+        for mode in modes:
+            try:
+                if mode == "reflink":
+                    Utils._reflink(source, destination)
+                elif mode == "hardlink":
+                    os.link(source, destination)
+                elif mode == "copy":
+                    shutil.copyfile(source, destination)
+                else:
+                    raise ValueError(f"Unknown link mode ({mode})")
+                return mode
+            except OSError as e:
+                # Not supported here (other filesystem, other volume), try the next one
+                error = e
+
+        raise error or OSError(f"Unable to link or copy {source}")
+
+    @staticmethod
+    def _reflink(source: str, destination: str):
+        try:
+            import fcntl
+
+            FICLONE = 0x40049409  # Linux, Btrfs / XFS / bcachefs
+        except ImportError:
+            raise OSError("Reflinks aren't supported on this platform")
+
+        with open(source, "rb") as src:
+            fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            try:
+                fcntl.ioctl(fd, FICLONE, src.fileno())
+            except OSError:
+                os.close(fd)
+                os.remove(destination)
+                raise
+            os.close(fd)
+
     @staticmethod
     def compare_items(dict1: Dict, dict2: Dict) -> bool:
         """
@@ -161,6 +243,29 @@ class Utils:
                 out += "_"
         return out
 
+    @staticmethod
+    def content_size(status_code: int, headers: Dict) -> Optional[int]:
+        """
+        Total size of a remote object from the headers of a response to a \
+            ranged GET. Content-Range looks like "bytes 0-0/1234" and its \
+            total is "*" when the server doesn't know it; a server that \
+            ignored the range answers 200 with the whole body's Content-Length.
+
+        :param status_code: HTTP status of the response
+        :param headers: The response headers
+
+        Example::
+
+            Utils.content_size(206, {"Content-Range": "bytes 0-0/1234"})
+        """
+        content_range = headers.get("Content-Range", "")
+        if "/" in content_range and not content_range.endswith("*"):
+            return int(content_range.rsplit("/", 1)[1])
+        if status_code == 200 and headers.get("Content-Length"):
+            return int(headers["Content-Length"])
+
+        return None
+
     @staticmethod
     def format_headers(token: str, version: str) -> Dict:
         """[summary]
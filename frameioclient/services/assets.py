@@ -1,11 +1,24 @@
 import mimetypes
 import os
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, Iterable, List, Optional, Union
 from uuid import UUID
 
 from frameioclient.lib.transfer import AWSClient
 
-from ..lib import ApiReference, FrameioDownloader, FrameioUploader, constants
+from ..lib import (
+    ApiReference,
+    AsyncAWSClient,
+    DownloadCache,
+    FrameioDownloader,
+    FrameioRemoteFile,
+    FrameioUploader,
+    HeaderProber,
+    KB,
+    RenditionSelector,
+    ThumbnailCache,
+    ThumbnailFetcher,
+    constants,
+)
 from ..lib.service import Service
 from .projects import Project
 
@@ -303,7 +316,7 @@ class Asset(Service):
 
             client.upload(asset, open('example.mp4'))
         """
-        uploader = FrameioUploader(asset, file)
+        uploader = FrameioUploader(asset, file, client=self.client)
         uploader.upload()
 
     def upload(
@@ -365,6 +378,12 @@ class Asset(Service):
         prefix: Optional[str] = None,
         multi_part: Optional[bool] = None,
         replace: Optional[bool] = False,
+        preallocation: Optional[str] = "none",
+        memory_map: Optional[bool] = False,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        rendition: Optional[RenditionSelector] = None,
+        cache: Optional[DownloadCache] = None,
+        io_policy: Optional[str] = "buffered",
     ):
         """
         Download an asset. The method will exit once the file is downloaded.
@@ -373,15 +392,194 @@ class Asset(Service):
         :param download_folder: The location to download the file to.
         :param multi_part: Attempt to do a multi-part download (non-WMID assets).
         :param replace: Whether or not you want to replace a file if one is found at the destination path.
+        :param preallocation: How to claim disk space up front: 'none', 'sparse' or 'reserve' (fallocate).
+        :param memory_map: Write multi-part downloads through a memory-mapped file instead of pwrite.
+        :param progress_callback: Called with a progress snapshot (bytes, percent, rate, eta) at most twice a second.
+        :param rendition: A RenditionSelector to download a proxy or h264 rendition instead of the original.
+        :param cache: A DownloadCache to satisfy repeated downloads of the same original from disk.
+        :param io_policy: How writes treat the page cache: 'buffered', 'dontneed' (drop written pages) or 'direct' (O_DIRECT).
 
         Example::
 
-            client.assets.download(asset, "~./Downloads")
+            client.assets.download(asset, "~./Downloads", preallocation="reserve")
+            client.assets.download(asset, "~./Downloads", rendition=RenditionSelector(min_height=720))
         """
         downloader = FrameioDownloader(
-            asset, download_folder, prefix, multi_part, replace
+            asset,
+            download_folder,
+            prefix,
+            multi_part,
+            replace,
+            preallocation,
+            memory_map,
+            rendition,
+            cache,
+            io_policy,
+            client=self.client,
         )
-        return AWSClient(downloader, concurrency=5).multi_thread_download()
+        if progress_callback:
+            downloader.progress.subscribe(progress_callback)
+
+        return downloader.download()
+
+    def download_many(
+        self,
+        assets: List[Dict],
+        download_folder: str,
+        prefix: Optional[str] = None,
+        replace: Optional[bool] = False,
+        connections: Optional[int] = constants.max_async_connections,
+    ):
+        """
+        Download many assets at once on a single asyncio event loop. \
+          Requires the optional aiohttp dependency (pip install frameioclient[async]).
+
+        :param assets: The asset objects.
+        :param download_folder: The location to download the files to.
+        :param replace: Whether or not you want to replace files found at the destination path.
+        :param connections: Total number of range requests in flight across all assets.
+
+        Example::
+
+            client.assets.download_many(assets, "~./Downloads", connections=256)
+        """
+        downloaders = [
+            FrameioDownloader(
+                asset, download_folder, prefix, True, replace, client=self.client
+            )
+            for asset in assets
+        ]
+
+        return AsyncAWSClient.run(
+            AsyncAWSClient.download_many(downloaders, connections=connections)
+        )
+
+    def stream(
+        self,
+        asset: Dict,
+        sink: object,
+        window: Optional[int] = constants.stream_reorder_window,
+    ):
+        """
+        Download an asset with parallel range requests straight into a \
+          writable stream (a pipe, a socket, stdout) instead of a file. \
+          Bytes are written in order and the checksum is still verified.
+
+        :param asset: The asset object.
+        :param sink: Anything with a write() method, it is flushed but not closed.
+        :param window: Maximum number of out-of-order bytes held in memory.
+
+        Example::
+
+            ffmpeg = subprocess.Popen(["ffmpeg", "-i", "-", "out.mp4"], stdin=subprocess.PIPE)
+            client.assets.stream(asset, ffmpeg.stdin)
+            ffmpeg.stdin.close()
+        """
+        downloader = FrameioDownloader(asset, os.curdir, None, True, client=self.client)
+        return AWSClient(downloader).stream(sink, window=window)
+
+    def download_into(self, asset: Dict, buffer: Optional[object] = None):
+        """
+        Download an asset with parallel range requests into memory instead \
+          of a file. Every range is received straight into its slice of the buffer.
+
+        :param asset: The asset object.
+        :param buffer: A writable bytearray, memoryview or NumPy array of at least filesize bytes, allocated if omitted.
+
+        Example::
+
+            data, checksum = client.assets.download_into(asset)
+            frames = numpy.frombuffer(data, dtype=numpy.uint8)
+        """
+        if buffer is None:
+            buffer = bytearray(asset["filesize"])
+
+        downloader = FrameioDownloader(asset, os.curdir, None, True, client=self.client)
+        return AWSClient(downloader).download_into(buffer)
+
+    def open(
+        self,
+        asset: Dict,
+        block_size: Optional[int] = constants.download_block_size,
+        cache_blocks: Optional[int] = 64,
+    ):
+        """
+        Open an asset's original as a read-only, seekable file object. \
+          Only the byte ranges you actually read are fetched.
+
+        :param asset: The asset object.
+        :param block_size: Size of each cached range request block.
+        :param cache_blocks: Number of blocks to keep in memory.
+
+        Example::
+
+            with client.assets.open(asset) as remote:
+                remote.seek(-8, io.SEEK_END)
+                trailer = remote.read(8)
+        """
+        return FrameioRemoteFile(asset, block_size=block_size, cache_blocks=cache_blocks)
+
+    def probe_headers(
+        self,
+        assets: Iterable[Dict],
+        length: Optional[int] = 256 * KB,
+        offset: Optional[int] = 0,
+        concurrency: Optional[int] = 64,
+        requests_per_second: Optional[float] = None,
+    ):
+        """
+        Fetch the same byte range (e.g. the container headers) from many assets \
+          concurrently. Yields (asset_id, bytes) as each request finishes, or \
+          (asset_id, exception) for assets that failed.
+
+        :param assets: The asset objects, folders and other non-files are skipped.
+        :param length: Number of bytes to fetch from each asset.
+        :param offset: First byte to fetch.
+        :param concurrency: Number of requests in flight.
+        :param requests_per_second: Cap on new requests per second.
+
+        Example::
+
+            for asset_id, header in client.assets.probe_headers(assets, length=512 * 1024):
+                print(asset_id, header[:8])
+        """
+        return HeaderProber(
+            length=length,
+            offset=offset,
+            concurrency=concurrency,
+            requests_per_second=requests_per_second,
+        ).probe(assets)
+
+    def fetch_thumbnails(
+        self,
+        assets: Iterable[Union[Dict, str]],
+        kind: Optional[str] = "thumb",
+        cache: Optional[ThumbnailCache] = None,
+        concurrency: Optional[int] = 16,
+        max_age: Optional[float] = 24 * 60 * 60,
+    ):
+        """
+        Fetch thumbnails (or the smallest proxy) for many assets at once \
+          through a persistent on-disk cache. Returns a dict of asset id -> \
+          local file path, or the exception for assets that failed.
+
+        :param assets: Asset objects or asset IDs.
+        :param kind: 'thumb', 'thumb_small', 'thumb_scrub' or 'proxy'.
+        :param cache: A ThumbnailCache, defaults to one in ~/.frameio/thumbnails.
+        :param concurrency: Number of requests in flight.
+        :param max_age: Seconds a cached file is used without checking it again.
+
+        Example::
+
+            paths = client.assets.fetch_thumbnails(asset_ids, kind="thumb")
+        """
+        return ThumbnailFetcher(
+            client=self.client,
+            kind=kind,
+            cache=cache,
+            concurrency=concurrency,
+            max_age=max_age,
+        ).fetch(assets)
 
     def upload_folder(self, source_path: str, destination_id: Union[str, UUID]):
         """
@@ -3,7 +3,9 @@ import os
 from pathlib import Path
 from time import time, sleep
 
+from ..lib.scheduler import DownloadScheduler
 from ..lib.service import Service
+from ..lib.transfer import FrameioDownloader
 from ..lib.utils import Utils
 
 from copy import deepcopy
@@ -93,14 +95,36 @@ class FrameioHelpers(Service):
 
         return initial_tree
 
-    def download_project(self, project_id, destination):
+    def download_project(
+        self, project_id, destination, concurrency=None, deduplicate=True
+    ):
         project = self.client.projects.get(project_id)
         initial_tree = self.get_assets_recursively(project["root_asset_id"])
-        self.recursive_downloader(destination, initial_tree)
-        # pprint(initial_tree)
-        # print(f"Downloading {Utils.format_bytes(total_bytes, type='size')}")
 
-    def recursive_downloader(self, directory, asset, count=0):
+        # Build the folder structure and collect every file first, then let one
+        # scheduler spread all of their ranges over a shared worker budget
+        downloads = list()
+        self.recursive_downloader(destination, initial_tree, downloads=downloads)
+
+        # Copies of the same file in several folders are only transferred once
+        return DownloadScheduler(
+            downloads, concurrency=concurrency, deduplicate=deduplicate
+        ).run()
+
+    def iter_files(self, tree):
+        """
+        Walk a tree from get_assets_recursively() and yield every file in it.
+
+        :Args:
+          tree (list): Assets, folders carry their contents in "children"
+        """
+        for asset in tree:
+            if asset.get("_type") == "file":
+                yield asset
+            elif asset.get("_type") == "folder":
+                yield from self.iter_files(asset.get("children") or [])
+
+    def recursive_downloader(self, directory, asset, count=0, downloads=None):
         print(f"Directory {directory}")
 
         try:
@@ -115,7 +139,7 @@ class FrameioHelpers(Service):
 
         if type(asset) == list:
             for i in asset:
-                self.recursive_downloader(directory, i)
+                self.recursive_downloader(directory, i, downloads=downloads)
 
         else:
             try:
@@ -139,10 +163,21 @@ class FrameioHelpers(Service):
                         self.recursive_downloader(
                             f"{directory}/{str(asset['name']).replace('/', '-')}",
                             asset["children"],
+                            downloads=downloads,
                         )
 
                 if asset["_type"] == "file":
                     count += 1
+
+                    # Hand the file to the caller's scheduler instead of downloading it now
+                    if downloads is not None:
+                        downloads.append(
+                            FrameioDownloader(
+                                asset, target_directory, None, True, client=self.client
+                            )
+                        )
+                        return True
+
                     return self.client.assets.download(
                         asset, target_directory, multi_part=True
                     )
@@ -68,12 +68,21 @@ class Project(Service):
 
         return FrameioHelpers(self.client).build_project_tree(project_id, slim)
 
-    def download(self, project_id: Union[str, UUID], destination_directory="downloads"):
+    def download(
+        self,
+        project_id: Union[str, UUID],
+        destination_directory="downloads",
+        concurrency: Optional[int] = None,
+        deduplicate: Optional[bool] = True,
+    ):
         """
-        Download the provided project to disk.
+        Download the provided project to disk. All files share one pool of \
+            download workers, large files first with small ones packed in between.
 
         :param project_id: The project's id.
         :param destination_directory: Directory on disk that you want to download the project to.
+        :param concurrency: Fixed number of concurrent range requests, adaptive when omitted.
+        :param deduplicate: Download files that appear in several places once and link or copy the rest.
 
         Example::
 
@@ -84,7 +93,46 @@ class Project(Service):
         """
 
         return FrameioHelpers(self.client).download_project(
-            project_id, destination=destination_directory
+            project_id,
+            destination=destination_directory,
+            concurrency=concurrency,
+            deduplicate=deduplicate,
+        )
+
+    def probe_headers(
+        self,
+        project_id: Union[str, UUID],
+        length: Optional[int] = 256 * 1024,
+        offset: Optional[int] = 0,
+        concurrency: Optional[int] = 64,
+        requests_per_second: Optional[float] = None,
+    ):
+        """
+        Fetch the first bytes (container headers, for QC) of every file in a \
+            project without downloading the files. Yields (asset_id, bytes) \
+            as each request finishes, or (asset_id, exception) on failure.
+
+        :param project_id: The project's id.
+        :param length: Number of bytes to fetch from each file.
+        :param offset: First byte to fetch.
+        :param concurrency: Number of requests in flight.
+        :param requests_per_second: Cap on new requests per second.
+
+        Example::
+
+            for asset_id, header in client.projects.probe_headers(project_id="123"):
+                print(asset_id, header[:8])
+        """
+        helpers = FrameioHelpers(self.client)
+        project = self.get(project_id)
+        tree = helpers.get_assets_recursively(project["root_asset_id"])
+
+        return self.client.assets.probe_headers(
+            helpers.iter_files(tree),
+            length=length,
+            offset=offset,
+            concurrency=concurrency,
+            requests_per_second=requests_per_second,
         )
 
     def get_collaborators(self, project_id: Union[str, UUID], **kwargs):
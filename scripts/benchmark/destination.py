@@ -0,0 +1,51 @@
+import concurrent.futures
+import os
+import random
+import sys
+
+from utils import timefunc
+
+from frameioclient.lib.destination import FileDestination, MmapDestination
+from frameioclient.lib.utils import MB
+
+
+def write_ranges(
+    destination_class, folder: str, size: int, chunk_size: int = 8 * MB, threads: int = 8
+):
+    """Write a file the way multi-part downloads do: shuffled ranges, 1 MB blocks, many threads."""
+    path = os.path.join(folder, "frameio-destination-benchmark.bin")
+    block = os.urandom(MB)
+
+    ranges = list(range(0, size, chunk_size))
+    random.shuffle(ranges)
+
+    with destination_class(path, size=size).open() as destination:
+
+        def write_range(start):
+            for offset in range(start, min(start + chunk_size, size), MB):
+                destination.write_at(offset, block[: min(MB, size - offset)])
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(write_range, ranges))
+
+        # Count getting the bytes to the device, not just into the page cache
+        if getattr(destination, "map", None) is not None:
+            destination.map.flush()
+        os.fsync(destination.fd)
+
+    os.remove(path)
+
+
+def run_benchmark(folders, size: int = 2048 * MB):
+    for folder in folders:
+        for destination_class in (FileDestination, MmapDestination):
+            print(f"{destination_class.__name__} -> {folder}")
+            timefunc(write_ranges, destination_class, folder, size, iterations=3)
+
+
+if __name__ == "__main__":
+    # Usage: python destination.py /mnt/nvme /mnt/nfs [size in MB]
+    folders = [arg for arg in sys.argv[1:] if not arg.isdigit()] or ["."]
+    sizes = [int(arg) * MB for arg in sys.argv[1:] if arg.isdigit()]
+
+    run_benchmark(folders, *sizes[:1])
@@ -35,6 +35,9 @@ setuptools.setup(
     'xxhash',
   ],
   extras_require={
+    'async': [
+      'aiohttp'
+    ],
     'dev': [
       'bump2version',
       'sphinx',
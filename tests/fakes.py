@@ -0,0 +1,206 @@
+"""Stand-ins for S3/CloudFront shared by the transfer tests.
+
+RangeSession replaces TransferSessionPool.get_session() in-process, \
+    RangeServer serves the same bytes over real sockets for tests that \
+    need the actual adapter in the loop. Both honour Range headers and \
+    can be subclassed (respond / RangeHandler.respond) to inject failures. \
+    make_asset / make_downloader build the file assets they serve.
+"""
+
+import http.server
+import os
+import socketserver
+import threading
+
+import requests
+import urllib3
+import xxhash
+
+from frameioclient.lib.transfer import FrameioDownloader
+
+data = bytes(range(256)) * 64  # 16 KB
+
+
+def make_asset(name="file.bin", url="https://example.com", body=data, **fields):
+    # A downloadable file asset for ``body`` at url/name, fields override any key
+    return {
+        "_type": "file",
+        "name": name,
+        "filesize": len(body),
+        "is_session_watermarked": False,
+        "upload_completed_at": "2021-01-01T00:00:00Z",
+        "original": f"{url}/{name}",
+        "checksums": {"xx_hash": xxhash.xxh64(body).hexdigest()},
+        **fields,
+    }
+
+
+def make_downloader(folder, name="file.bin", url="https://example.com", **fields):
+    os.makedirs(str(folder), exist_ok=True)
+    return FrameioDownloader(make_asset(name, url, **fields), str(folder), None, True)
+
+
+def parse_range(headers, size):
+    # (start, end) of a "bytes=a-b" header, None without one
+    value = (headers or {}).get("Range")
+    if not value:
+        return None
+
+    start, end = value[len("bytes=") :].split("-")
+    return int(start), min(int(end), size - 1)
+
+
+class FakeRaw(object):
+    def __init__(self, body, drop_after=None):
+        self.body = body
+        self.position = 0
+        self.drop_after = drop_after
+
+    def readinto(self, buffer):
+        if self.drop_after is not None and self.position >= self.drop_after:
+            raise urllib3.exceptions.ProtocolError("Connection broken")
+
+        count = min(len(buffer), len(self.body) - self.position, 1024)
+        buffer[:count] = self.body[self.position : self.position + count]
+        self.position += count
+        return count
+
+
+class FakeResponse(object):
+    def __init__(self, status_code, body=b"", headers=None, drop_after=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.body = body
+        self.content = body
+        self.text = body.decode("latin-1")
+        self.headers = headers or {}
+        self.drop_after = drop_after
+        self.raw = FakeRaw(body, drop_after)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error", response=self)
+
+    def iter_content(self, chunk_size=1):
+        for offset in range(0, len(self.body), 1024):
+            if self.drop_after is not None and offset >= self.drop_after:
+                raise requests.exceptions.ChunkedEncodingError("Connection broken")
+            yield self.body[offset : offset + 1024]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class RangeSession(object):
+    """Serves ranges of ``body`` for any URL and records what was asked for."""
+
+    def __init__(self, body=data, etag='"abc"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []  # (url, headers)
+        self.ranges = []  # (start, end) of every ranged request
+        self.urls = set()
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, **kwargs):
+        with self.lock:
+            self.requests.append((url, headers or {}))
+            self.urls.add(url)
+            requested = parse_range(headers, len(self.body))
+            if requested is not None:
+                self.ranges.append(requested)
+
+        return self.respond(url, headers or {}, requested)
+
+    def respond(self, url, headers, requested):
+        if requested is None:
+            return FakeResponse(200, self.body, self.response_headers())
+
+        start, end = requested
+        return FakeResponse(
+            206,
+            self.body[start : end + 1],
+            self.response_headers(
+                {"Content-Range": "bytes %d-%d/%d" % (start, end, len(self.body))}
+            ),
+        )
+
+    def response_headers(self, extra=None):
+        return {"Accept-Ranges": "bytes", "ETag": self.etag, **(extra or {})}
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves ranges of ``server.body`` over HTTP, override respond() to fail."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like S3
+
+    def do_GET(self):
+        self.server.record(self)
+        self.respond()
+
+    def do_PUT(self):
+        self.server.record(self)
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.respond()
+
+    def respond(self):
+        body = self.server.body
+        requested = parse_range(self.headers, len(body))
+        if requested is None:
+            self.reply(200, body)
+            return
+
+        start, end = requested
+        self.reply(
+            206,
+            body[start : end + 1],
+            {"Content-Range": "bytes %d-%d/%d" % (start, end, len(body))},
+        )
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in {"Accept-Ranges": "bytes", "ETag": '"abc"', **(headers or {})}.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RangeServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """A local HTTP server on a free port, run it with ``with RangeServer() as server``."""
+
+    daemon_threads = True
+
+    def __init__(self, handler=RangeHandler, body=data):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.body = body
+        self.requests = []  # (method, path)
+        self.clients = set()  # (host, port) of every connection used
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, request):
+        with self.lock:
+            self.requests.append((request.command, request.path))
+            self.clients.add(request.client_address)
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
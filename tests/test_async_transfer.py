@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from frameioclient.lib.async_transfer import AsyncAWSClient
+from frameioclient.lib.planner import ChunkPlanner
+
+from fakes import RangeHandler, RangeServer, data, make_downloader
+
+pytest.importorskip("aiohttp")
+
+
+class SlowHandler(RangeHandler):
+    """Holds every range for a moment and tracks how many overlap."""
+
+    def respond(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            if "missing" in self.path:
+                self.reply(404)
+                return
+            time.sleep(0.05)
+            super().respond()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class DroppingHandler(RangeHandler):
+    """Cuts the first response of every planned range but the first off after 1 KB."""
+
+    def respond(self):
+        body = self.server.body
+        start, end = (int(x) for x in self.headers["Range"][len("bytes=") :].split("-"))
+        end = min(end, len(body) - 1)
+
+        with self.server.lock:
+            first = start % 4096 == 0 and start > 0 and start not in self.server.dropped
+            self.server.dropped.add(start)
+            self.server.starts.append(start)
+
+        if not first:
+            super().respond()
+            return
+
+        # Promise the whole range, deliver part of it and hang up
+        self.send_response(206)
+        self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, len(body)))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(body[start : start + 1024])
+        self.close_connection = True
+
+
+@pytest.fixture(autouse=True)
+def small_ranges(monkeypatch):
+    # Split the 16 KB test file into 4 KB ranges
+    monkeypatch.setattr(ChunkPlanner, "min_chunk_size", 4096)
+    monkeypatch.setattr(ChunkPlanner, "alignment", 1024)
+    monkeypatch.setattr(ChunkPlanner, "rtt_budget", 0)
+    monkeypatch.setattr(AsyncAWSClient, "retry_backoff", 0)
+
+
+def test_download_writes_off_the_loop(tmp_path):
+    with RangeServer() as server:
+        downloader = make_downloader(tmp_path, url=server.url)
+        client = AsyncAWSClient(downloader, concurrency=2)
+
+        threads = set()
+        write_block = client._write_block
+        client._write_block = lambda *args: threads.add(threading.get_ident()) or write_block(
+            *args
+        )
+
+        result = AsyncAWSClient.run(client.download())
+
+    assert open(downloader.destination, "rb").read() == data
+    assert result["chunks"] == 4
+    assert downloader.checksum == downloader.original_checksum
+    assert threads and threading.get_ident() not in threads
+
+
+def test_dropped_ranges_resume(tmp_path):
+    with RangeServer(DroppingHandler) as server:
+        server.dropped = set()
+        server.starts = []
+        downloader = make_downloader(tmp_path, url=server.url)
+
+        result = AsyncAWSClient.run(AsyncAWSClient(downloader, concurrency=2).download())
+
+    assert open(downloader.destination, "rb").read() == data
+    assert result["retries"] == 3
+
+    # The probe, the first range, then each later range twice: cut after 1 KB and resumed there
+    assert sorted(server.starts) == [0, 0, 4096, 5120, 8192, 9216, 12288, 13312]
+
+
+def test_download_many_shares_the_connection_budget(tmp_path):
+    with RangeServer(SlowHandler) as server:
+        server.active = server.peak = 0
+        downloaders = [make_downloader(tmp_path, f"{i}.bin", server.url) for i in range(4)]
+        downloaders.append(make_downloader(tmp_path, "missing.bin", server.url))
+
+        results = AsyncAWSClient.run(
+            AsyncAWSClient.download_many(downloaders, connections=3, concurrency=2)
+        )
+
+    assert 1 < server.peak <= 3
+    assert isinstance(results[-1], Exception)
+    for downloader, result in zip(downloaders[:-1], results):
+        assert result["destination"] == downloader.destination
+        assert open(downloader.destination, "rb").read() == data
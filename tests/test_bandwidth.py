@@ -0,0 +1,41 @@
+import time
+from datetime import datetime
+
+from frameioclient.lib.bandwidth import BandwidthLimiter, ThrottledReader
+
+
+def test_schedule_windows():
+    limiter = BandwidthLimiter(
+        rate=100, schedule=[("09:00", "17:00", 50), ("22:00", "06:00", None)]
+    )
+
+    assert limiter.current_rate(datetime(2021, 1, 1, 12, 0)) == 50
+    assert limiter.current_rate(datetime(2021, 1, 1, 23, 30)) is None
+    assert limiter.current_rate(datetime(2021, 1, 1, 3, 0)) is None
+    assert limiter.current_rate(datetime(2021, 1, 1, 19, 0)) == 100
+
+
+def test_consume_unlimited_does_not_block():
+    limiter = BandwidthLimiter()
+
+    start = time.time()
+    limiter.consume(10 ** 12)
+    assert time.time() - start < 0.1
+
+
+def test_consume_throttles():
+    limiter = BandwidthLimiter(rate=100000, burst=0.1)
+
+    start = time.time()
+    limiter.consume(30000)
+    assert time.time() - start >= 0.15
+
+
+def test_throttled_reader_rewinds():
+    reader = ThrottledReader(b"0123456789", BandwidthLimiter())
+
+    assert len(reader) == 10
+    assert reader.read(4) == b"0123"
+    reader.seek(0)
+    assert reader.read() == b"0123456789"
+    assert reader.read(4) == b""
@@ -0,0 +1,88 @@
+import os
+import time
+
+from frameioclient.lib.cache import DownloadCache
+from frameioclient.lib.transfer import FrameioDownloader
+from frameioclient.lib.transport import TransferSessionPool
+from frameioclient.lib.utils import Utils
+
+from fakes import make_asset
+
+
+def write(path, data):
+    with open(path, "wb") as handle:
+        handle.write(data)
+    return str(path)
+
+
+def test_store_and_fetch(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"))
+    source = write(tmp_path / "source.bin", b"x" * 100)
+    cache.store("abcdef", source)
+
+    destination = str(tmp_path / "copy.bin")
+    assert cache.fetch("abcdef", 100, destination) in ("reflink", "hardlink", "copy")
+    assert open(destination, "rb").read() == b"x" * 100
+
+    assert cache.fetch("missing", 100, str(tmp_path / "other.bin")) is None
+    assert cache.stats() == {"cache_hits": 1, "cache_misses": 1}
+
+
+def test_size_mismatch_is_a_miss(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"), modes=("copy",))
+    cache.store("abcdef", write(tmp_path / "source.bin", b"x" * 100))
+
+    assert cache.fetch("abcdef", 99, str(tmp_path / "copy.bin")) is None
+    assert not os.path.exists(cache.path("abcdef"))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"), max_size=250, modes=("copy",))
+    for name in ("aa01", "bb02"):
+        cache.store(name, write(tmp_path / name, b"x" * 100))
+
+    # Using the older entry makes the other one the eviction candidate
+    past = time.time() - 60
+    os.utime(cache.path("aa01"), (past, past))
+    os.utime(cache.path("bb02"), (past + 1, past + 1))
+    cache.lookup("aa01", 100)
+
+    cache.store("cc03", write(tmp_path / "cc03", b"x" * 100))
+
+    assert os.path.exists(cache.path("aa01"))
+    assert not os.path.exists(cache.path("bb02"))
+    assert os.path.exists(cache.path("cc03"))
+
+
+def test_link_or_copy_falls_back(tmp_path, monkeypatch):
+    source = write(tmp_path / "source.bin", b"data")
+    destination = str(tmp_path / "copy.bin")
+
+    def cross_device(source, destination):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", cross_device)
+
+    assert Utils.link_or_copy(source, destination, ("hardlink", "copy")) == "copy"
+    assert open(destination, "rb").read() == b"data"
+
+
+def test_download_is_served_from_cache(tmp_path, monkeypatch):
+    data = b"cached bytes" * 100
+    checksum = Utils.calculate_hash(write(tmp_path / "seed.bin", data))
+    cache = DownloadCache(str(tmp_path / "cache"))
+    cache.store(checksum, str(tmp_path / "seed.bin"))
+
+    def no_network():
+        raise AssertionError("A cache hit shouldn't touch the network")
+
+    monkeypatch.setattr(TransferSessionPool, "get_session", no_network)
+
+    downloader = FrameioDownloader(
+        make_asset(body=data), str(tmp_path / "downloads"), None, cache=cache
+    )
+    stats = downloader.download()
+
+    assert stats["cache_hits"] == 1
+    assert stats["size"] == len(data)
+    assert open(downloader.destination, "rb").read() == data
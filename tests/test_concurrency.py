@@ -0,0 +1,61 @@
+from frameioclient.lib import concurrency
+from frameioclient.lib.concurrency import AdaptiveConcurrency
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def run_window(controller, clock, nbytes):
+    controller.set_active(controller.limit)
+    clock.now += controller.interval
+    return controller.record(nbytes)
+
+
+def test_slow_start_then_backoff(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(concurrency, "time", clock)
+
+    controller = AdaptiveConcurrency(initial=4, maximum=32)
+    controller.start()
+
+    assert run_window(controller, clock, 100) == 4  # First window is the baseline
+    assert run_window(controller, clock, 200) == 8  # Growing fast, double
+    assert run_window(controller, clock, 100) == 6  # Throughput dropped, back off
+    assert controller.slow_start is False
+
+
+def test_errors_halve_the_limit(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(concurrency, "time", clock)
+
+    controller = AdaptiveConcurrency(initial=16)
+    controller.start()
+
+    clock.now += controller.interval
+    assert controller.record_error() == 8
+
+
+def test_transfers_share_only_the_learned_limit(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(concurrency, "time", clock)
+    monkeypatch.setattr(AdaptiveConcurrency, "_learned", dict())
+
+    first = AdaptiveConcurrency.for_cdn("S3")
+    second = AdaptiveConcurrency.for_cdn("S3")
+    assert first is not second
+    first.start()
+    run_window(first, clock, 100)
+
+    # A second transfer starting up doesn't touch the first one's window or worker count
+    second.start()
+    second.set_active(1)
+    assert run_window(first, clock, 200) == 2 * second.limit
+
+    # The next transfer starts where the last one left off, other CDNs don't
+    assert AdaptiveConcurrency.for_cdn("S3").limit == first.limit
+    assert AdaptiveConcurrency.for_cdn("Cloudfront").limit == second.limit
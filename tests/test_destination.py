@@ -0,0 +1,172 @@
+import errno
+import io
+import os
+import shutil
+import threading
+import types
+
+import pytest
+import xxhash
+
+from frameioclient.lib.destination import (
+    FileDestination,
+    MmapDestination,
+    Preallocation,
+    SinkDestination,
+)
+from frameioclient.lib.exceptions import DownloadException, InsufficientDiskSpace
+from frameioclient.lib.iopolicy import IOPolicy
+from frameioclient.lib.utils import MB, Utils
+
+
+def test_mmap_destination_writes_in_place(tmp_path):
+    path = str(tmp_path / "file.bin")
+
+    with MmapDestination(path, size=10).open() as destination:
+        destination.write_at(5, b"world")
+        destination.write_at(0, b"hello")
+        assert destination.read_at(3, 4) == b"lowo"
+
+    assert open(path, "rb").read() == b"helloworld"
+
+
+def test_mmap_destination_reserves_and_receives_in_place(tmp_path):
+    path = str(tmp_path / "file.bin")
+
+    with MmapDestination(path, size=4 * MB).open() as destination:
+        assert os.stat(path).st_blocks * 512 >= 4 * MB  # No holes to SIGBUS on
+        destination.view_at(MB, 5)[:] = b"hello"
+        assert destination.read_at(MB, 5) == b"hello"
+
+
+def test_mmap_destination_refuses_unreserved_space(tmp_path, monkeypatch):
+    monkeypatch.delattr(os, "posix_fallocate", raising=False)
+
+    with pytest.raises(DownloadException):
+        MmapDestination(str(tmp_path / "file.bin"), size=10).open()
+
+
+def test_sink_receives_blocks_in_order():
+    sink = io.BytesIO()
+    seen = []
+    destination = SinkDestination(
+        sink, size=9, on_write=lambda offset, data: seen.append(offset)
+    )
+
+    destination.write_at(6, b"ghi")
+    destination.write_at(3, b"def")
+    assert sink.getvalue() == b""
+    destination.write_at(0, b"abc")
+
+    assert sink.getvalue() == b"abcdefghi"
+    assert seen == [0, 3, 6]
+    assert destination.buffered == 0
+
+
+def test_sink_window_blocks_until_caught_up():
+    sink = io.BytesIO()
+    destination = SinkDestination(sink, size=6 * MB, window=2 * MB)
+
+    ahead = threading.Thread(target=destination.write_at, args=(4 * MB, b"x" * MB))
+    ahead.start()
+    ahead.join(0.1)
+    assert ahead.is_alive() and destination.buffered == 0
+
+    destination.write_at(0, b"x" * (4 * MB))
+    ahead.join(1)
+    assert not ahead.is_alive()
+    assert len(sink.getvalue()) == 5 * MB
+
+
+def test_sink_abort_wakes_waiting_writers():
+    destination = SinkDestination(io.BytesIO(), size=6 * MB, window=2 * MB)
+    errors = []
+
+    def write():
+        try:
+            destination.write_at(4 * MB, b"x" * MB)
+        except DownloadException as e:
+            errors.append(e)
+
+    waiting = threading.Thread(target=write)
+    waiting.start()
+    destination.abort(Exception("range failed"))
+    waiting.join(1)
+
+    assert len(errors) == 1
+    with pytest.raises(DownloadException):
+        destination.write_at(0, b"x")
+
+
+@pytest.mark.parametrize("policy", ["buffered", "dontneed", "direct"])
+def test_io_policies_write_the_same_bytes(tmp_path, policy):
+    data = os.urandom(3 * MB + 123)
+    path = str(tmp_path / "file.bin")
+
+    # Unaligned blocks, out of order, like ranges landing from several workers
+    cuts = [0, 5000, 1 * MB + 17, 2 * MB, len(data)]
+    blocks = list(zip(cuts, cuts[1:]))
+    with FileDestination(path, size=len(data), io_policy=policy).open() as destination:
+        for start, end in reversed(blocks):
+            destination.write_at(start, data[start:end])
+        assert destination.read_at(0, 10) == data[:10]
+
+    assert open(path, "rb").read() == data
+    assert Utils.calculate_hash(path, io_policy=policy) == xxhash.xxh64(data).hexdigest()
+
+
+def test_unsupported_io_policy_falls_back(monkeypatch):
+    monkeypatch.delattr(os, "O_DIRECT", raising=False)
+    monkeypatch.delattr(os, "posix_fadvise", raising=False)
+
+    assert IOPolicy.resolve("direct") == IOPolicy.BUFFERED
+
+
+@pytest.mark.parametrize(
+    "mode, size",
+    [(Preallocation.NONE, 0), (Preallocation.SPARSE, 4 * MB), (Preallocation.RESERVE, 4 * MB)],
+)
+def test_preallocation_modes(tmp_path, mode, size):
+    path = str(tmp_path / "file.bin")
+
+    with FileDestination(path, size=4 * MB, preallocation=mode).open():
+        stat = os.stat(path)
+
+    assert stat.st_size == size
+    if mode == Preallocation.RESERVE and hasattr(os, "posix_fallocate"):
+        assert stat.st_blocks * 512 >= 4 * MB  # Every block claimed up front
+    else:
+        assert stat.st_blocks * 512 < 4 * MB
+
+
+def test_reserve_reports_a_full_disk(tmp_path, monkeypatch):
+    def full(fd, offset, length):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(os, "posix_fallocate", full, raising=False)
+    destination = FileDestination(
+        str(tmp_path / "file.bin"), size=4 * MB, preallocation=Preallocation.RESERVE
+    )
+
+    with pytest.raises(InsufficientDiskSpace):
+        destination.open()
+    assert destination.fd is None
+
+
+def test_free_space_preflight(tmp_path, monkeypatch):
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: types.SimpleNamespace(free=MB))
+    path = str(tmp_path / "file.bin")
+
+    FileDestination.check_free_space(path, MB)
+    with pytest.raises(InsufficientDiskSpace):
+        FileDestination.check_free_space(path, 2 * MB)
+
+    # The blocks a partial file already holds don't need new space
+    with open(path, "wb") as fp:
+        fp.write(os.urandom(MB))
+    FileDestination.check_free_space(path, 2 * MB)
+
+    # Opening checks before the file is created
+    with pytest.raises(InsufficientDiskSpace):
+        FileDestination(str(tmp_path / "other.bin"), size=2 * MB).open()
+    assert not os.path.exists(str(tmp_path / "other.bin"))
@@ -0,0 +1,34 @@
+import random
+
+import xxhash
+
+from frameioclient.lib.hashing import IncrementalHasher
+
+data = bytes(random.getrandbits(8) for _ in range(256 * 1024))
+blocks = [(offset, data[offset : offset + 4096]) for offset in range(0, len(data), 4096)]
+
+
+def read_at(offset, length):
+    return data[offset : offset + length]
+
+
+def test_out_of_order_blocks_match_whole_file_hash():
+    shuffled = list(blocks)
+    random.shuffle(shuffled)
+
+    hasher = IncrementalHasher(len(data), read_at)
+    for offset, block in shuffled:
+        hasher.update(offset, block)
+
+    assert hasher.hexdigest() == xxhash.xxh64(data).hexdigest()
+    assert hasher.bytes_reread == 0
+
+
+def test_overflowing_reorder_buffer_reads_back_from_disk():
+    hasher = IncrementalHasher(len(data), read_at, max_buffer=8192)
+    for offset, block in reversed(blocks):
+        hasher.update(offset, block)
+
+    assert hasher.buffered <= 8192
+    assert hasher.hexdigest() == xxhash.xxh64(data).hexdigest()
+    assert hasher.bytes_reread > 0
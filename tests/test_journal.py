@@ -0,0 +1,37 @@
+import os
+
+from frameioclient.lib.journal import RangeJournal, RangeSet
+
+
+def test_rangeset_merges_touching_ranges():
+    ranges = RangeSet([(0, 10), (20, 30), (10, 20)])
+    assert ranges.ranges == [(0, 30)]
+
+
+def test_rangeset_missing_returns_gaps():
+    ranges = RangeSet([(10, 20), (30, 40)])
+    assert ranges.missing(0, 50) == [(0, 10), (20, 30), (40, 50)]
+    assert ranges.missing(12, 18) == []
+    assert ranges.covers(10, 20)
+
+
+def test_journal_resumes_matching_object(tmp_path):
+    destination = os.path.join(tmp_path, "file.mov")
+
+    journal = RangeJournal(destination)
+    journal.load(etag='"abc"', filesize=100)
+    journal.record(0, 50)
+
+    assert RangeJournal.exists(destination)
+    assert RangeJournal(destination).load(etag='"abc"', filesize=100).ranges == [(0, 50)]
+
+
+def test_journal_discarded_when_object_changes(tmp_path):
+    destination = os.path.join(tmp_path, "file.mov")
+
+    journal = RangeJournal(destination)
+    journal.load(etag='"abc"', filesize=100)
+    journal.record(0, 50)
+
+    assert len(RangeJournal(destination).load(etag='"def"', filesize=100)) == 0
+    assert not RangeJournal.exists(destination)
@@ -0,0 +1,43 @@
+from frameioclient.lib.planner import ByteRange, ChunkPlanner
+from frameioclient.lib.utils import MB
+
+GB = 1024 * MB
+
+
+def assert_contiguous(plan):
+    assert plan.ranges[0].start == 0
+    assert plan.ranges[-1].end == plan.filesize - 1
+    for previous, current in zip(plan.ranges, plan.ranges[1:]):
+        assert current.start == previous.end + 1
+
+
+def test_ranges_do_not_overlap():
+    plan = ChunkPlanner().plan(10 * GB + 12345, rtt=0.02, concurrency=8)
+
+    assert_contiguous(plan)
+    assert sum(r.length for r in plan.ranges) == plan.filesize
+    assert plan.chunk_size % MB == 0
+
+
+def test_small_tail_is_merged():
+    plan = ChunkPlanner().plan(65 * MB, concurrency=2)
+
+    assert_contiguous(plan)
+    assert plan.chunk_size == 9 * MB
+    assert plan.ranges[-1] == ByteRange(54 * MB, 65 * MB - 1)
+
+
+def test_high_latency_means_bigger_ranges():
+    planner = ChunkPlanner()
+
+    near = planner.plan(2 * GB, rtt=0.005, concurrency=16)
+    far = planner.plan(2 * GB, rtt=0.3, concurrency=16)
+
+    assert far.chunk_size > near.chunk_size
+    assert far.chunks < near.chunks
+
+
+def test_small_file_is_a_single_range():
+    plan = ChunkPlanner().plan(3 * MB, concurrency=5)
+
+    assert plan.ranges == [ByteRange(0, 3 * MB - 1)]
@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+from frameioclient.lib.async_transfer import AsyncAWSClient
+from frameioclient.lib.presigned import PresignedUrls
+from frameioclient.lib.transfer import AWSClient, FrameioDownloader
+from frameioclient.lib.transport import TransferSessionPool
+from frameioclient.lib.upload import FrameioUploader
+
+from fakes import FakeResponse, RangeHandler, RangeServer, RangeSession, data, make_asset
+
+
+class ExpiringSession(RangeSession):
+    """Serves ranges of data, but only for URLs signed after the expiry."""
+
+    def __init__(self, valid_from):
+        super().__init__()
+        self.valid_from = valid_from
+        self.expired = 0
+
+    def respond(self, url, headers, requested):
+        if int(url.rsplit("sig=", 1)[1]) < self.valid_from:
+            self.expired += 1
+            return FakeResponse(403, b"<Message>Request has expired</Message>")
+
+        return super().respond(url, headers, requested)
+
+
+class ExpiredTokenHandler(RangeHandler):
+    """S3's answer to a URL signed with a temporary token that has run out."""
+
+    def respond(self):
+        if int(self.path.rsplit("sig=", 1)[1]) < self.server.valid_from:
+            self.reply(400, b"<Code>ExpiredToken</Code><Message>The provided token has expired.</Message>")
+            return
+
+        super().respond()
+
+
+@pytest.fixture()
+def server():
+    with RangeServer(ExpiredTokenHandler) as server:
+        server.valid_from = 2
+        yield server
+
+
+class FakeAssets(object):
+    def __init__(self, asset):
+        self.asset = asset
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, asset_id):
+        # Every fetch signs the asset's URLs again
+        with self.lock:
+            self.calls += 1
+            sign = lambda url: url.replace("sig=1", f"sig={self.calls + 1}")
+            return {
+                **self.asset,
+                "original": sign(self.asset["original"]),
+                "upload_urls": [sign(url) for url in self.asset.get("upload_urls", [])],
+            }
+
+
+class FakeClient(object):
+    def __init__(self, asset):
+        self.assets = FakeAssets(asset)
+
+
+def test_refresh_finds_the_url_in_the_asset():
+    asset = {"id": "1", "upload_urls": ["https://s3/part0?sig=1", "https://s3/part1?sig=1"]}
+    fetched = {"id": "1", "upload_urls": ["https://s3/part0?sig=2", "https://s3/part1?sig=2"]}
+    urls = PresignedUrls(asset, lambda: fetched)
+
+    assert urls.refresh("https://s3/part1?sig=1") == "https://s3/part1?sig=2"
+    assert urls.current("https://s3/part1?sig=1") == "https://s3/part1?sig=2"
+    assert asset["upload_urls"][1] == "https://s3/part1?sig=2"
+
+    # Nothing newer to offer, so the caller should give up
+    assert urls.refresh("https://elsewhere/?sig=1") == "https://elsewhere/?sig=1"
+
+
+def test_expired_original_is_refreshed_once(tmp_path, monkeypatch):
+    session = ExpiringSession(valid_from=2)
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+
+    asset = make_asset(id="1", original="https://example.com/file.bin?sig=1")
+    client = FakeClient(asset)
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True, client=client)
+    aws = AWSClient(downloader, concurrency=2)
+
+    # Every range was planned against the stale URL
+    aws.multi_thread_download("https://example.com/file.bin?sig=1")
+
+    assert open(downloader.destination, "rb").read() == data
+    assert client.assets.calls == 1
+    assert asset["original"] == "https://example.com/file.bin?sig=2"
+
+
+def signed_asset(url):
+    return make_asset(
+        id="1",
+        filetype="application/octet-stream",
+        original=f"{url}/file.bin?sig=1",
+        upload_urls=[f"{url}/part0?sig=1", f"{url}/part1?sig=1"],
+    )
+
+
+def test_expired_token_download_through_the_adapter(server, tmp_path):
+    asset = signed_asset(server.url)
+    client = FakeClient(asset)
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True, client=client)
+
+    AWSClient(downloader, concurrency=2).multi_thread_download(asset["original"])
+
+    assert open(downloader.destination, "rb").read() == data
+    assert client.assets.calls == 1
+    assert ("GET", "/file.bin?sig=1") in server.requests
+
+
+def test_expired_token_upload_through_the_adapter(server, tmp_path):
+    asset = signed_asset(server.url)
+    client = FakeClient(asset)
+    source = tmp_path / "file.bin"
+    source.write_bytes(data)
+
+    uploader = FrameioUploader(asset, source.open("rb"), client=client)
+    uploader._calculate_chunks(len(data), 2)
+    for index, url in enumerate(list(asset["upload_urls"])):
+        uploader._upload_chunk((url, uploader.chunk_size * index, index))
+
+    assert client.assets.calls == 1
+    # One fetch renewed both parts, the second never used its stale URL
+    assert [path for method, path in server.requests if method == "PUT"] == [
+        "/part0?sig=1",
+        "/part0?sig=2",
+        "/part1?sig=2",
+    ]
+
+
+def test_expired_token_async_download(server, tmp_path):
+    asset = signed_asset(server.url)
+    client = FakeClient(asset)
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True, client=client)
+
+    AsyncAWSClient.run(AsyncAWSClient(downloader, concurrency=2).download())
+
+    assert open(downloader.destination, "rb").read() == data
+    assert client.assets.calls == 1
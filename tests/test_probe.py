@@ -0,0 +1,91 @@
+import pytest
+import requests
+
+from frameioclient.lib.probe import HeaderProber
+from frameioclient.lib.transport import TransferSessionPool
+from frameioclient.lib.utils import Utils
+from frameioclient.services.assets import Asset
+from frameioclient.services.helpers import FrameioHelpers
+from frameioclient.services.projects import Project
+
+from fakes import FakeResponse, RangeSession, data
+
+
+class ProbeSession(RangeSession):
+    """Refuses URLs ending in 'missing', ignores the range of those ending in 'norange'."""
+
+    def respond(self, url, headers, requested):
+        if url.endswith("missing"):
+            return FakeResponse(403)
+        if url.endswith("norange"):
+            requested = None
+
+        return super().respond(url, headers, requested)
+
+
+def test_probes_every_file(monkeypatch):
+    session = ProbeSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+
+    assets = [
+        {"id": str(i), "_type": "file", "original": f"https://example.com/{i}"}
+        for i in range(50)
+    ]
+    assets.append({"id": "folder", "_type": "folder"})
+
+    results = dict(HeaderProber(length=100, offset=10, concurrency=4).probe(assets))
+
+    assert len(results) == 50
+    assert all(header == data[10:110] for header in results.values())
+    assert len(session.requests) == 50
+
+
+def test_failures_and_ignored_ranges(monkeypatch):
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: ProbeSession())
+
+    assets = [
+        {"id": "ok", "original": "https://example.com/norange"},
+        {"id": "denied", "original": "https://example.com/missing"},
+        {"id": "pending"},
+    ]
+
+    results = dict(HeaderProber(length=100, offset=10).probe(assets))
+
+    assert results["ok"] == data[10:110]
+    assert isinstance(results["denied"], requests.exceptions.HTTPError)
+    assert isinstance(results["pending"], Exception)
+
+
+
+def test_project_probe_is_rate_limited_like_assets(monkeypatch):
+    tree = [
+        {"id": "a", "_type": "file", "original": "https://example.com/a"},
+        {"id": "f", "_type": "folder", "children": [{"id": "b", "_type": "file"}]},
+    ]
+    monkeypatch.setattr(Project, "get", lambda self, project_id: {"root_asset_id": "root"})
+    monkeypatch.setattr(FrameioHelpers, "get_assets_recursively", lambda self, asset_id: tree)
+
+    calls = []
+    monkeypatch.setattr(HeaderProber, "probe", lambda self, assets: calls.append((self, list(assets))))
+
+    client = type("Client", (), {})()
+    client.assets = Asset(client)
+    Project(client).probe_headers("123", length=100, requests_per_second=5)
+
+    [(prober, assets)] = calls
+    assert [asset["id"] for asset in assets] == ["a", "b"]
+    assert prober.length == 100
+    assert prober.requests_per_second == 5
+
+@pytest.mark.parametrize(
+    "status_code, headers, size",
+    [
+        (206, {"Content-Range": "bytes 0-0/1234"}, 1234),
+        (206, {"Content-Range": "bytes 0-0/*"}, None),
+        (200, {"Content-Length": "1234"}, 1234),
+        (206, {"Content-Length": "1"}, None),
+        (200, {}, None),
+    ],
+)
+def test_content_size(status_code, headers, size):
+    assert Utils.content_size(status_code, headers) == size
@@ -0,0 +1,50 @@
+import threading
+
+from frameioclient.lib.progress import TransferProgress
+
+
+def test_counters_merge_across_threads():
+    progress = TransferProgress(total=4 * 1000 * 10)
+
+    def work():
+        for _ in range(1000):
+            progress.add("bytes_written", 10)
+        progress.add("ranges_completed")
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert progress.get("bytes_written") == 40000
+    assert progress.counters() == {"bytes_written": 40000, "ranges_completed": 4}
+    assert progress.snapshot()["percent"] == 100.0
+
+
+def test_callbacks_are_rate_capped():
+    progress = TransferProgress(total=100, interval=60)
+    snapshots = []
+    progress.subscribe(snapshots.append)
+
+    for _ in range(100):
+        progress.add("bytes_written")
+    assert snapshots == []
+
+    progress.finish()
+    progress.finish()
+    assert len(snapshots) == 1
+    assert snapshots[0]["finished"] and snapshots[0]["bytes_written"] == 100
+
+
+def test_sampler_ticks_after_interval():
+    progress = TransferProgress(interval=0)
+    snapshots = []
+    progress.subscribe(snapshots.append)
+
+    progress.add("bytes_written", 5)
+    progress.add("bytes_written", 5)
+
+    assert len(snapshots) == 2
+    assert snapshots[-1]["bytes_written"] == 10
+    assert len(progress.samples) == 3
@@ -0,0 +1,48 @@
+import io
+
+from frameioclient.lib.remote_file import FrameioRemoteFile
+from frameioclient.lib.transport import TransferSessionPool
+
+from fakes import RangeSession
+
+data = bytes(range(256)) * 40  # 10240 bytes
+
+
+def open_remote(monkeypatch, **kwargs):
+    session = RangeSession(data)
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    remote = FrameioRemoteFile("https://example.com/file.mov", **kwargs)
+    return remote, session
+
+
+def test_random_access_reads(monkeypatch):
+    remote, session = open_remote(monkeypatch, block_size=1024)
+
+    assert remote.size == len(data)
+    remote.seek(-100, io.SEEK_END)
+    assert remote.read() == data[-100:]
+    remote.seek(1000)
+    assert remote.read(100) == data[1000:1100]
+
+    # Probe, the last block, then blocks 0 and 1 in a single request
+    assert session.ranges == [(0, 0), (9216, 10239), (0, 2047)]
+
+
+def test_sequential_reads_use_read_ahead_and_cache(monkeypatch):
+    remote, session = open_remote(monkeypatch, block_size=1024, read_ahead=4)
+
+    reader = io.BufferedReader(remote, buffer_size=512)
+    assert reader.read() == data
+    assert remote.requests < 10
+
+    remote.seek(0)
+    requests = remote.requests
+    assert remote.read(1024) == data[:1024]
+    assert remote.requests == requests
+
+
+def test_cache_is_bounded(monkeypatch):
+    remote, session = open_remote(monkeypatch, block_size=1024, cache_blocks=2)
+
+    assert remote.read() == data
+    assert len(remote._cache) <= 2
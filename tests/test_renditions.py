@@ -0,0 +1,90 @@
+import pytest
+
+from frameioclient.lib.exceptions import DownloadException
+from frameioclient.lib.renditions import RenditionSelector
+from frameioclient.lib.transfer import FrameioDownloader
+from frameioclient.lib.transport import TransferSessionPool
+
+from fakes import RangeSession, data, make_asset
+
+asset = {
+    "original": "https://cdn/original",
+    "filesize": 1000,
+    "transcodes": {"original_height": 2160},
+    "downloads": {
+        "h264_360": "https://cdn/360",
+        "h264_720": "https://cdn/720",
+        "h264_1080_best": "https://cdn/1080",
+        "h264_2160": None,
+    },
+    "proxy": "https://cdn/proxy",
+}
+
+sizes = {
+    "https://cdn/original": 1000,
+    "https://cdn/1080": 400,
+    "https://cdn/720": 200,
+    "https://cdn/360": 50,
+}
+
+
+@pytest.fixture
+def probed(monkeypatch):
+    monkeypatch.setattr(RenditionSelector, "probe_size", staticmethod(sizes.get))
+
+
+def test_candidates_best_first():
+    keys = [r.key for r in RenditionSelector.candidates(asset)]
+    assert keys == ["original", "h264_1080_best", "h264_720", "h264_360", "proxy"]
+
+
+def test_default_is_the_original():
+    assert RenditionSelector().select(asset).key == "original"
+
+
+def test_watermarked_default_is_the_highest_resolution():
+    # '1080' sorts before '360' and '720' as a string
+    watermarked = {"downloads": {"h264_360": "a", "h264_1080_best": "b", "h264_720": "c"}}
+    assert RenditionSelector().select(watermarked).key == "h264_1080_best"
+
+
+def test_min_height_picks_the_smallest_acceptable():
+    assert RenditionSelector(min_height=720).select(asset).key == "h264_720"
+
+
+def test_min_height_unavailable():
+    with pytest.raises(DownloadException):
+        RenditionSelector(min_height=4320).select({"downloads": {"h264_720": "a"}})
+
+
+def test_size_budget(probed):
+    rendition = RenditionSelector(max_size=300).select(asset)
+    assert rendition.key == "h264_720"
+    assert rendition.size == 200
+
+
+def test_time_budget_with_bandwidth(probed):
+    selector = RenditionSelector(max_seconds=10, bandwidth=50)
+    assert selector.select(asset).key == "h264_1080_best"
+
+
+def test_nothing_fits(probed):
+    with pytest.raises(DownloadException):
+        RenditionSelector(min_height=720, max_size=100).select(asset)
+
+
+def test_rendition_download_is_sized_by_the_rendition(tmp_path, monkeypatch):
+    session = RangeSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+
+    # No disk holds the original
+    huge = make_asset("file.mov", **{**asset, "filesize": 117 * 1024 ** 4})
+    downloader = FrameioDownloader(
+        huge, str(tmp_path), None, True, rendition=RenditionSelector(max_size=1024 ** 2)
+    )
+
+    result = downloader.download()
+
+    assert downloader.selected.key == "h264_1080_best"
+    assert result["size"] == len(data)
+    assert open(downloader.destination, "rb").read() == data
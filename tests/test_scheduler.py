@@ -0,0 +1,182 @@
+import concurrent.futures
+from collections import deque
+
+import xxhash
+
+from frameioclient.lib.cache import DownloadCache
+from frameioclient.lib.scheduler import DownloadScheduler
+from frameioclient.lib.transfer import AWSClient
+from frameioclient.lib.transport import TransferSessionPool
+from frameioclient.lib.utils import MB
+
+from fakes import FakeResponse, RangeSession, data, make_downloader
+
+
+class FailingSession(RangeSession):
+    """Answers ranges of bad.bin past the probe with server errors."""
+
+    def respond(self, url, headers, requested):
+        if url.endswith("bad.bin") and requested != (0, 0):
+            return FakeResponse(500)
+
+        return super().respond(url, headers, requested)
+
+
+class PendingExecutor(object):
+    """Hands back futures the test completes by hand."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append((function, args))
+        return concurrent.futures.Future()
+
+
+def test_identical_files_are_downloaded_once(tmp_path, monkeypatch):
+    session = RangeSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+
+    downloaders = [
+        make_downloader(str(tmp_path / "a"), "one.bin"),
+        make_downloader(str(tmp_path / "b"), "two.bin"),
+        make_downloader(str(tmp_path / "c"), "three.bin", checksums={"xx_hash": None}),
+    ]
+
+    results = DownloadScheduler(downloaders, concurrency=2).run()
+
+    assert session.urls == {"https://example.com/one.bin", "https://example.com/three.bin"}
+    assert results[1]["duplicate_of"] == downloaders[0].destination
+    for downloader in downloaders:
+        assert open(downloader.destination, "rb").read() == data
+
+
+def make_scheduler(tmp_path, sizes, **kwargs):
+    downloaders = [
+        make_downloader(tmp_path, f"{size}.bin", filesize=size * MB, checksums={"xx_hash": None})
+        for size in sizes
+    ]
+    return DownloadScheduler(downloaders, **kwargs)
+
+
+def submit_all(scheduler, futures):
+    # What run() would hand out into the free slots of the budget
+    picked = []
+    while sum(1 for unit in futures.values() if unit[0] != "finish") < scheduler.budget:
+        unit = scheduler._pick()
+        if unit is None:
+            return picked
+        scheduler._submit(PendingExecutor(), futures, unit)
+        picked.append((unit[0], unit[1].downloader.filesize // MB))
+
+    return picked
+
+
+def test_large_files_first_with_a_share_for_small_ones(tmp_path):
+    scheduler = make_scheduler(tmp_path, [20, 5, 100, 1, 50], concurrency=8)
+
+    assert [job.downloader.filesize // MB for job in scheduler.large] == [100, 50, 20]
+    assert [job.downloader.filesize // MB for job in scheduler.small] == [1, 5]
+
+    # A quarter of the 8 slots goes to small files, smallest first, the rest to the largest
+    assert submit_all(scheduler, dict()) == [
+        ("start", 1),
+        ("start", 5),
+        ("start", 100),
+        ("start", 50),
+        ("start", 20),
+    ]
+    assert scheduler.small_in_flight == 2
+
+
+def test_small_files_keep_their_share_between_large_ranges(tmp_path):
+    scheduler = make_scheduler(tmp_path, [1, 100], concurrency=4)
+    small, large = scheduler.small[0], scheduler.large[0]
+    futures = dict()
+    submit_all(scheduler, futures)
+
+    for future, (_, job, _) in list(futures.items()):
+        job.client = AWSClient(job.downloader, concurrency=4)
+        future.set_result(deque(range(job.downloader.filesize // (10 * MB) + 2)))
+        scheduler._collect(PendingExecutor(), futures, future)
+
+    # One of the four slots stays with the small file, the largest file gets the rest
+    assert submit_all(scheduler, futures) == [
+        ("range", 1),
+        ("range", 100),
+        ("range", 100),
+        ("range", 100),
+    ]
+    assert len(small.tasks) == 1 and len(large.tasks) == 9
+
+
+def test_idle_slots_go_to_the_next_file(tmp_path):
+    scheduler = make_scheduler(tmp_path, [100, 50], concurrency=2, small_file_share=0)
+    big, medium = scheduler.large
+    big.tasks, medium.tasks = deque(["a"]), deque(["b", "c"])
+    big.client = medium.client = AWSClient(big.downloader, concurrency=2)
+    futures = dict()
+
+    # The big file has a single range left, its other slot goes to the next file
+    assert submit_all(scheduler, futures) == [("range", 100), ("range", 50)]
+
+    # Its last range lands: the file is verified and its slot moves on as well
+    executor = PendingExecutor()
+    future = next(f for f, unit in futures.items() if unit[1] is big)
+    future.set_result(25 * MB)
+    scheduler._collect(executor, futures, future)
+
+    assert big.finishing
+    assert executor.submitted == [(scheduler._finish, (big,))]
+    assert submit_all(scheduler, futures) == [("range", 50)]
+
+
+def test_one_failing_file_does_not_stop_the_others(tmp_path, monkeypatch):
+    session = FailingSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    monkeypatch.setattr(AWSClient, "retry_backoff", 0)
+
+    downloaders = [
+        make_downloader(str(tmp_path / "a"), "good.bin"),
+        make_downloader(str(tmp_path / "b"), "bad.bin"),
+        make_downloader(str(tmp_path / "c"), "fine.bin"),
+    ]
+
+    results = DownloadScheduler(downloaders, concurrency=2, deduplicate=False).run()
+
+    assert isinstance(results[1], Exception)
+    for index in (0, 2):
+        assert results[index]["destination"] == downloaders[index].destination
+        assert open(downloaders[index].destination, "rb").read() == data
+
+
+def test_assets_without_ranges_go_as_one_unit(tmp_path, monkeypatch):
+    session = RangeSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+
+    checksum = xxhash.xxh64(data).hexdigest()
+    source = tmp_path / "source.bin"
+    source.write_bytes(data)
+    cache = DownloadCache(str(tmp_path / "cache"))
+    cache.store(checksum, str(source))
+
+    watermarked = make_downloader(
+        str(tmp_path / "a"),
+        "marked.bin",
+        checksums={"xx_hash": None},
+        is_session_watermarked=True,
+        original=None,
+        downloads={"h264_1080_best": "https://example.com/marked.mp4"},
+    )
+    cached = make_downloader(str(tmp_path / "b"), "cached.bin")
+    cached.cache = cache
+
+    results = DownloadScheduler([watermarked, cached], concurrency=2).run()
+
+    # The watermarked stream is fetched whole, the cached original not at all
+    assert session.urls == {"https://example.com/marked.mp4"}
+    assert session.ranges == [(0, 0)]  # Its size probe, the body came in one response
+    assert results[0]["destination"] == watermarked.destination
+    assert results[1]["cache"] in ("reflink", "hardlink", "copy")
+    for downloader in (watermarked, cached):
+        assert open(downloader.destination, "rb").read() == data
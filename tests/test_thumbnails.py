@@ -0,0 +1,123 @@
+import os
+import time
+
+from frameioclient.lib.thumbnails import ThumbnailCache, ThumbnailFetcher
+from frameioclient.lib.transport import TransferSessionPool
+
+from fakes import FakeResponse, RangeSession
+
+
+class ThumbnailSession(RangeSession):
+    """Every URL serves its own path, with the file name as ETag."""
+
+    def respond(self, url, headers, requested):
+        etag = '"' + url.split("?")[0].rsplit("/", 1)[-1] + '"'
+        if headers.get("If-None-Match") == etag:
+            return FakeResponse(304)
+        if "missing" in url:
+            return FakeResponse(404)
+
+        return FakeResponse(200, url.split("?")[0].encode() * 10, {"ETag": etag})
+
+
+def make_assets(count, signature="1"):
+    return [
+        {"id": f"asset-{i}", "thumb_540": f"https://cdn.example.com/{i}.jpg?sig={signature}"}
+        for i in range(count)
+    ]
+
+
+def test_repeat_fetches_come_from_the_cache(monkeypatch, tmpdir):
+    session = ThumbnailSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    cache = ThumbnailCache(str(tmpdir))
+
+    paths = ThumbnailFetcher(kind="thumb", cache=cache, concurrency=4).fetch(make_assets(20))
+    assert len(session.requests) == 20
+    with open(paths["asset-3"], "rb") as fp:
+        assert fp.read() == b"https://cdn.example.com/3.jpg" * 10
+
+    # New signatures or bare IDs, nothing goes out
+    fetcher = ThumbnailFetcher(kind="thumb", cache=cache)
+    assert fetcher.fetch(make_assets(20, signature="2")) == paths
+    assert fetcher.fetch([f"asset-{i}" for i in range(20)]) == paths
+    assert len(session.requests) == 20
+    assert fetcher.stats()["hits"] == 40
+
+
+def test_stale_entries_are_revalidated(monkeypatch, tmpdir):
+    session = ThumbnailSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    cache = ThumbnailCache(str(tmpdir))
+
+    ThumbnailFetcher(cache=cache).fetch(make_assets(2))
+    fetcher = ThumbnailFetcher(cache=cache, max_age=0)
+    fetcher.fetch(make_assets(2, signature="2"))
+
+    revalidations = {url: headers for url, headers in session.requests if "sig=2" in url}
+    assert revalidations["https://cdn.example.com/1.jpg?sig=2"] == {"If-None-Match": '"1.jpg"'}
+    assert fetcher.stats() == {"hits": 0, "revalidated": 2, "fetched": 0}
+
+    # A new thumbnail path is fetched again without validators
+    fetcher.fetch([{"id": "asset-0", "thumb_540": "https://cdn.example.com/new.jpg"}])
+    assert session.requests[-1][1] == {}
+    assert fetcher.stats()["fetched"] == 1
+
+
+def test_failures_and_proxies(monkeypatch, tmpdir):
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: ThumbnailSession())
+
+    assets = [
+        {"id": "missing", "thumb": "https://cdn.example.com/missing.jpg"},
+        {"id": "none"},
+        {
+            "id": "video",
+            "original": "https://cdn.example.com/original.mov",
+            "h264_1080_best": "https://cdn.example.com/1080.mp4",
+            "h264_360": "https://cdn.example.com/360.mp4",
+        },
+    ]
+
+    results = ThumbnailFetcher(kind="proxy", cache=ThumbnailCache(str(tmpdir))).fetch(assets)
+
+    assert isinstance(results["missing"], Exception)
+    assert isinstance(results["none"], Exception)
+    with open(results["video"], "rb") as fp:
+        assert fp.read().startswith(b"https://cdn.example.com/360.mp4")
+
+
+def test_cache_evicts_least_recently_used(monkeypatch, tmpdir):
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: ThumbnailSession())
+    cache = ThumbnailCache(str(tmpdir), max_size=700)
+    fetcher = ThumbnailFetcher(cache=cache)
+
+    paths = fetcher.fetch(make_assets(2))
+    old = time.time() - 100
+    os.utime(paths["asset-0"], (old, old))
+
+    fetcher.fetch([{"id": "asset-2", "thumb_540": "https://cdn.example.com/2.jpg"}])
+
+    assert not os.path.exists(paths["asset-0"])
+    assert not os.path.exists(paths["asset-0"] + cache.sidecar_suffix)
+    assert os.path.exists(paths["asset-1"])
+    assert cache.size() <= 700
+
+
+def test_puts_only_walk_the_cache_when_it_is_full(monkeypatch, tmpdir):
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: ThumbnailSession())
+    cache = ThumbnailCache(str(tmpdir), max_size=300 * 50)  # Room for 50 entries
+
+    walks = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries", lambda: walks.append(1) or entries())
+
+    fetcher = ThumbnailFetcher(cache=cache, concurrency=1)
+    fetcher.fetch(make_assets(50))
+    assert len(walks) == 1  # Counting the store once on the first put
+
+    # Going over evicts a tenth of the cache, so the next few puts don't walk again
+    fetcher.fetch(
+        [{"id": f"extra-{i}", "thumb": f"https://cdn.example.com/{i + 50}.jpg"} for i in range(5)]
+    )
+    assert len(walks) == 2
+    assert cache.size() <= 300 * 50
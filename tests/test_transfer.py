@@ -0,0 +1,379 @@
+import concurrent.futures
+import functools
+import gzip
+import os
+import shutil
+import threading
+import time
+import types
+
+import pytest
+import urllib3
+import xxhash
+
+from frameioclient.lib.destination import FileDestination, MmapDestination
+from frameioclient.lib.exceptions import DownloadException, InsufficientDiskSpace
+from frameioclient.lib.hashing import IncrementalHasher
+from frameioclient.lib.journal import RangeJournal
+from frameioclient.lib.planner import ChunkPlanner
+from frameioclient.lib import transfer
+from frameioclient.lib.transfer import AWSClient, FrameioDownloader, RangeProgress
+from frameioclient.lib.transport import TransferSessionPool
+
+from fakes import (
+    FakeResponse,
+    RangeHandler,
+    RangeServer,
+    RangeSession,
+    data,
+    make_asset,
+    parse_range,
+)
+
+asset = make_asset()
+
+
+class FlakySession(RangeSession):
+    """Drops the connection of successive requests after the given byte counts."""
+
+    def __init__(self, drops):
+        super().__init__()
+        self.drops = list(drops)
+
+    def respond(self, url, headers, requested):
+        response = super().respond(url, headers, requested)
+        drop_after = self.drops.pop(0) if self.drops else None
+        return FakeResponse(response.status_code, response.body, response.headers, drop_after)
+
+
+class StallingHandler(RangeHandler):
+    """Sends 1 KB of the first request for each range in ``server.stalled``, then goes quiet."""
+
+    def respond(self):
+        body = self.server.body
+        start, end = parse_range(self.headers, len(body))
+        with self.server.lock:
+            stall = start in self.server.stalled
+            self.server.stalled.discard(start)
+
+        if not stall:
+            super().respond()
+            return
+
+        self.send_response(206)
+        self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, len(body)))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(body[start : start + 1024])
+        self.wfile.flush()
+        self.server.release.wait(10)
+        self.close_connection = True
+
+
+class EncodedHandler(RangeHandler):
+    """Serves ``server.body`` gzip-encoded, ranges are of the encoded bytes like on S3."""
+
+    def respond(self):
+        body = gzip.compress(self.server.body)
+        requested = parse_range(self.headers, len(body))
+        if requested is None:
+            self.reply(200, body, {"Content-Encoding": "gzip"})
+            return
+
+        start, end = requested
+        self.reply(
+            206,
+            body[start : end + 1],
+            {
+                "Content-Range": "bytes %d-%d/%d" % (start, end, len(body)),
+                "Content-Encoding": "gzip",
+            },
+        )
+
+
+class WholeSession(RangeSession):
+    """A server that ignores Range headers and doesn't advertise them."""
+
+    def respond(self, url, headers, requested):
+        return FakeResponse(200, self.body, {"ETag": self.etag})
+
+
+def make_client(tmp_path, monkeypatch, session):
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    monkeypatch.setattr(AWSClient, "retry_backoff", 0)
+
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True)
+    client = AWSClient(downloader, concurrency=2)
+    client.journal = RangeJournal(downloader.destination)
+    client.writer = FileDestination(downloader.destination, size=len(data)).open()
+    return client
+
+
+def test_range_retry_resumes_from_last_written_byte(tmp_path, monkeypatch):
+    session = FlakySession(drops=[4096, 2048])
+    client = make_client(tmp_path, monkeypatch, session)
+
+    assert client._download_chunk((asset["original"], 0, len(data) - 1, 0)) == len(data)
+    client.writer.close()
+
+    assert session.ranges == [(0, 16383), (4096, 16383), (6144, 16383)]
+    assert open(client.downloader.destination, "rb").read() == data
+    assert client.journal.completed.covers(0, len(data))
+
+
+def test_range_gives_up_and_journals_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(AWSClient, "range_retries", 1)
+    session = FlakySession(drops=[4096, 0])
+    client = make_client(tmp_path, monkeypatch, session)
+
+    with pytest.raises(DownloadException):
+        client._download_chunk((asset["original"], 0, len(data) - 1, 0))
+    client.writer.close()
+
+    assert client.journal.completed.covers(0, 4096)
+    assert not client.journal.completed.covers(0, 4097)
+
+
+def test_racing_requests_write_each_byte_once(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch, FlakySession(drops=[]))
+    written = []
+    client._write_block = lambda offset, block: written.append((offset, len(block))) or len(block)
+
+    progress = RangeProgress(0, 4095)
+    client._write_range_block(progress, 0, data[:2048])  # The original request
+    client._write_range_block(progress, 1024, data[1024:3072])  # A hedge that started late
+    client._write_range_block(progress, 2048, data[2048:3072])  # The original, now behind
+
+    assert written == [(0, 2048), (2048, 1024)]
+    assert progress.position == 3072
+
+
+def test_download_into_buffer(tmp_path, monkeypatch):
+    session = FlakySession(drops=[None, 3000])  # The probe, then the first range drops
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    monkeypatch.setattr(AWSClient, "retry_backoff", 0)
+
+    checksum = xxhash.xxh64(data).hexdigest()
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True)
+    buffer = memoryview(bytearray(len(data) + 10))
+
+    result, digest = AWSClient(downloader, concurrency=2).download_into(buffer)
+
+    assert result is buffer
+    assert digest == checksum
+    assert bytes(buffer[: len(data)]) == data
+    assert downloader.progress.get("retries") == 1
+    assert list(tmp_path.iterdir()) == []  # Nothing touched the disk
+
+
+def test_ranges_fit_the_hash_reorder_buffer(tmp_path, monkeypatch):
+    session = RangeSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    monkeypatch.setattr(
+        transfer, "IncrementalHasher", functools.partial(IncrementalHasher, max_buffer=4096)
+    )
+    # Left alone the planner would cut the 16 KB file in two 8 KB ranges
+    monkeypatch.setattr(ChunkPlanner, "min_chunk_size", 1024)
+    monkeypatch.setattr(ChunkPlanner, "alignment", 1024)
+    monkeypatch.setattr(ChunkPlanner, "ranges_per_worker", 1)
+    monkeypatch.setattr(ChunkPlanner, "rtt_budget", 0)
+
+    checksum = xxhash.xxh64(data).hexdigest()
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True)
+
+    result = AWSClient(downloader, concurrency=2).multi_thread_download()
+
+    assert result["chunk_size"] == 2048
+    assert result["bytes_reread"] == 0
+    assert downloader.checksum == checksum
+    assert open(downloader.destination, "rb").read() == data
+
+
+def test_bodies_are_read_without_intermediate_copies(tmp_path, monkeypatch):
+    def copying_read(*args, **kwargs):
+        raise AssertionError("urllib3 read() copies every block")
+
+    monkeypatch.setattr(urllib3.response.HTTPResponse, "read", copying_read)
+    checksum = xxhash.xxh64(data).hexdigest()
+
+    with RangeServer() as server:
+        whole = make_asset(url=server.url)
+        downloader = FrameioDownloader(whole, str(tmp_path), None, True)
+        AWSClient(downloader, concurrency=1)._download_whole(whole["original"])
+
+        buffer = bytearray(len(data))
+        downloader = FrameioDownloader(whole, str(tmp_path), None, True)
+        _, digest = AWSClient(downloader, concurrency=1).download_into(buffer)
+
+    assert open(str(tmp_path / "file.bin"), "rb").read() == data
+    assert bytes(buffer) == data and digest == checksum
+
+    # Every request went back to the pool and reused the one connection
+    assert len(server.clients) == 1
+
+
+def test_hedge_candidates_are_slow_old_and_big_enough(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch, RangeSession())
+    mb = 1024 * 1024
+    client.range_rates = [0.8 * mb] * 6
+
+    def running(name, size, written, age, hedged=False):
+        progress = RangeProgress(0, size - 1)
+        progress.started = time.time() - age
+        progress.position = written
+        progress.hedged = hedged
+        client.ranges[name] = ((asset["original"], 0, size - 1, 0), progress)
+
+    running("fast", 10 * mb, 8 * mb, 10)
+    running("slow", 10 * mb, 1 * mb, 10)
+    running("slowest", 10 * mb, mb // 2, 10)
+    running("young", 10 * mb, mb // 20, 0.5)  # Slow, but not running for hedge_after yet
+    running("nearly done", 2 * mb, 1 * mb, 10)  # Less than hedge_min_bytes left
+    running("hedged", 10 * mb, 1 * mb, 10, hedged=True)
+
+    # The median rate is 0.8 MB/s, so only ranges under 0.4 MB/s qualify
+    assert [future for future, _, _ in client._hedge_candidates()] == ["slowest", "slow"]
+
+    monkeypatch.setattr(AWSClient, "hedge_after", 20)
+    assert client._hedge_candidates() == []
+
+
+def test_hedge_that_starts_too_late_leaves_the_range_alone(tmp_path, monkeypatch):
+    session = RangeSession()
+    client = make_client(tmp_path, monkeypatch, session)
+    task = (asset["original"], 0, len(data) - 1, 0)
+    progress = RangeProgress(0, len(data) - 1)
+
+    # The original request wrote every byte but hasn't reported the range yet
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        executor.submit(client._write_range_block, progress, 0, data).result()
+
+    assert client._download_chunk(task, progress, hedge=True) == 0
+    assert session.requests == []
+    assert not progress.completed
+    assert not client.journal.completed.covers(0, 1)
+
+
+def test_winning_hedge_reports_the_range(tmp_path, monkeypatch):
+    session = RangeSession()
+    client = make_client(tmp_path, monkeypatch, session)
+    task = (asset["original"], 0, len(data) - 1, 0)
+    progress = RangeProgress(0, len(data) - 1)
+    client._write_range_block(progress, 0, data[:4096])  # The original, stuck after 4 KB
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        assert executor.submit(client._download_chunk, task, progress, True).result() == len(data)
+
+    assert session.ranges == [(4096, len(data) - 1)]
+    assert client.progress_manager.get("hedge_wins") == 1
+    assert client.journal.completed.covers(0, len(data))
+
+    # The original wakes up to a finished range and reports nothing
+    assert client._download_chunk(task, progress) == 0
+    assert client.downloader.request_logs[-1]["bytes_transferred"] == len(data)
+    assert len(client.downloader.request_logs) == 1
+
+
+def test_hedges_overtake_stalled_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(ChunkPlanner, "min_chunk_size", 4096)
+    monkeypatch.setattr(ChunkPlanner, "alignment", 1024)
+    monkeypatch.setattr(ChunkPlanner, "rtt_budget", 0)
+    monkeypatch.setattr(AWSClient, "retry_backoff", 0)
+    monkeypatch.setattr(AWSClient, "read_timeout", 1)
+    monkeypatch.setattr(AWSClient, "hedge_after", 0.3)
+    monkeypatch.setattr(AWSClient, "hedge_min_bytes", 0)
+    monkeypatch.setattr(AWSClient, "max_hedges", 1)
+    monkeypatch.setattr(transfer, "randint", lambda a, b: a)  # Start all ranges within 0.4s
+
+    checksum = xxhash.xxh64(data).hexdigest()
+    with RangeServer(StallingHandler) as server:
+        server.stalled = {4096, 12288}
+        server.release = threading.Event()
+        whole = make_asset(url=server.url)
+        downloader = FrameioDownloader(whole, str(tmp_path), None, True)
+
+        started = time.time()
+        try:
+            result = AWSClient(downloader, concurrency=4).multi_thread_download()
+        finally:
+            server.release.set()
+
+    # One range was hedged, the other stalled one hit the read timeout and resumed
+    assert time.time() - started < 5
+    assert (result["hedges"], result["hedge_wins"], result["retries"]) == (1, 1, 1)
+    assert downloader.checksum == checksum
+    assert open(downloader.destination, "rb").read() == data
+
+
+def test_too_little_free_space_fails_before_fetching(tmp_path, monkeypatch):
+    session = RangeSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    monkeypatch.setattr(
+        shutil, "disk_usage", lambda path: types.SimpleNamespace(free=len(data) - 1)
+    )
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True)
+
+    with pytest.raises(InsufficientDiskSpace):
+        AWSClient(downloader, concurrency=2).multi_thread_download()
+    assert session.ranges == [(0, 0)]  # Just the probe
+
+    with pytest.raises(InsufficientDiskSpace):
+        AWSClient(downloader, concurrency=1)._download_whole(asset["original"])
+    assert len(session.requests) == 1
+
+
+@pytest.mark.parametrize("reservable", [True, False])
+def test_memory_mapped_downloads(tmp_path, monkeypatch, reservable):
+    session = RangeSession()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    if reservable:
+        # Responses are read straight into the mapping
+        monkeypatch.setattr(FakeResponse, "iter_content", None)
+    else:
+        monkeypatch.delattr(os, "posix_fallocate", raising=False)
+
+    checksum = xxhash.xxh64(data).hexdigest()
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True, memory_map=True)
+    client = AWSClient(downloader, concurrency=2)
+    client.multi_thread_download()
+
+    # Without reserved blocks the download falls back to positional writes
+    assert isinstance(client.writer, MmapDestination) == reservable
+    assert downloader.checksum == checksum
+    assert open(downloader.destination, "rb").read() == data
+
+
+@pytest.fixture()
+def small_ranges(monkeypatch):
+    # Split the 16 KB test file into 4 KB ranges
+    monkeypatch.setattr(ChunkPlanner, "min_chunk_size", 4096)
+    monkeypatch.setattr(ChunkPlanner, "alignment", 1024)
+    monkeypatch.setattr(ChunkPlanner, "rtt_budget", 0)
+
+
+@pytest.mark.parametrize("server, chunks", [(RangeSession, 4), (WholeSession, 1)])
+def test_single_stream_switches_to_ranges_when_offered(
+    tmp_path, monkeypatch, small_ranges, server, chunks
+):
+    session = server()
+    monkeypatch.setattr(TransferSessionPool, "get_session", lambda: session)
+    downloader = FrameioDownloader(asset, str(tmp_path), None, True)
+
+    result = AWSClient(downloader, concurrency=2)._download_whole(asset["original"])
+
+    assert result["chunks"] == chunks
+    assert len(session.requests) == chunks + 1  # The probe, then the ranges or the stream
+    assert open(downloader.destination, "rb").read() == data
+
+
+def test_encoded_bodies_stay_on_the_single_stream(tmp_path, monkeypatch, small_ranges):
+    body = os.urandom(len(data))  # Doesn't compress, so it's big enough for ranges
+
+    with RangeServer(EncodedHandler, body=body) as server:
+        encoded = make_asset(url=server.url, body=body)
+        downloader = FrameioDownloader(encoded, str(tmp_path), None, True)
+        result = AWSClient(downloader, concurrency=2)._download_whole(encoded["original"])
+
+    assert result["chunks"] == 1
+    assert len(server.requests) == 2  # The probe and one GET, decoded on the way in
+    assert open(downloader.destination, "rb").read() == body
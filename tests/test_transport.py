@@ -0,0 +1,75 @@
+import time
+
+import pytest
+import requests
+
+from frameioclient.lib.transfer import AWSClient
+from frameioclient.lib.transport import HTTPClient, TransferSessionPool
+from frameioclient.lib.upload import FrameioUploader
+
+from fakes import RangeHandler, RangeServer, make_downloader
+
+
+class StatusHandler(RangeHandler):
+    """Answers /<status> with that status, and a Retry-After that must be ignored."""
+
+    def respond(self):
+        status = int(self.path.strip("/"))
+        body = b"<Code>ExpiredToken</Code>" if status == 400 else b""
+        self.reply(status, body, {"Retry-After": "1"})
+
+
+@pytest.fixture()
+def server():
+    with RangeServer(StatusHandler) as server:
+        yield server
+
+
+@pytest.mark.parametrize("status", [400, 429, 500, 503])
+def test_statuses_reach_the_caller_untouched(server, status):
+    session = TransferSessionPool.get_session()
+
+    started = time.time()
+    assert session.put(f"{server.url}/{status}", data=b"part").status_code == status
+    assert session.get(f"{server.url}/{status}").status_code == status
+
+    assert len(server.requests) == 2
+    assert time.time() - started < 1
+
+
+def test_refused_connections_fail_quickly():
+    session = TransferSessionPool.get_session()
+
+    started = time.time()
+    with pytest.raises(Exception):
+        session.get("http://127.0.0.1:9/")  # Nothing listens on discard
+    assert time.time() - started < 5
+
+
+def test_upload_parts_retry_server_errors_only(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(FrameioUploader, "retry_backoff", 0)
+    source = tmp_path / "part.bin"
+    source.write_bytes(b"part")
+
+    for status, attempts in ((503, FrameioUploader.part_retries + 1), (400, 1)):
+        del server.requests[:]
+        asset = {
+            "filesize": 4,
+            "filetype": "application/octet-stream",
+            "upload_urls": [f"{server.url}/{status}"],
+        }
+        uploader = FrameioUploader(asset, source.open("rb"))
+        uploader._calculate_chunks(4, 1)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            uploader._upload_chunk((asset["upload_urls"][0], 0, 0))
+        assert len(server.requests) == attempts
+
+
+def test_transfers_hold_no_http_state_of_their_own(tmp_path):
+    client = AWSClient(make_downloader(tmp_path), concurrency=2)
+
+    assert not isinstance(client, HTTPClient)
+    assert not hasattr(client, "retry_strategy") and not hasattr(client, "thread_local")
+    assert client.shared_headers is TransferSessionPool.shared_headers()
+    assert client._get_session() is TransferSessionPool.get_session()